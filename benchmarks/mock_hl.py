@@ -0,0 +1,389 @@
+"""Local stand-in for the HyperLiquid API and an Arbitrum JSON-RPC node.
+
+Serves the `/info` and `/exchange` requests the handlers make, plus
+JSON-RPC (single and batched) on `/rpc`, from in-memory state with a
+configurable per-request latency. Signatures are not checked. A USDC
+transfer sent with `eth_sendRawTransaction` is credited to the sender's
+HyperLiquid account at once, and `withdraw3` debits it, so `deposit` and
+`withdraw` run end to end.
+
+    python benchmarks/mock_hl.py --port 8765 --latency-ms 20
+
+then point hlexec at it with `HLEXEC_API_URL=http://127.0.0.1:8765` and
+`HLEXEC_ARB_RPC=http://127.0.0.1:8765/rpc`.
+"""
+
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+import argparse
+import json
+import threading
+import time
+import eth_account
+import rlp
+from web3 import Web3
+
+UNIVERSE = [
+    {"name": "BTC", "szDecimals": 5, "maxLeverage": 40},
+    {"name": "ETH", "szDecimals": 4, "maxLeverage": 25},
+    {"name": "SOL", "szDecimals": 2, "maxLeverage": 20},
+    {"name": "DOGE", "szDecimals": 0, "maxLeverage": 10},
+]
+MIDS = {"BTC": "60000.0", "ETH": "3000.0", "SOL": "150.0", "DOGE": "0.1"}
+
+# Starting balances of every account
+ACCOUNT_VALUE_USDC = 100_000.0
+ARB_ETH_WEI = 10 * 10**18
+ARB_USDC_RAW = 1_000_000 * 10**6
+
+ARB_CHAIN_ID = 421614
+USDC_DECIMALS = 6
+TRANSFER_GAS = 60_000
+
+_SELECTOR_DECIMALS = "0x313ce567"
+_SELECTOR_BALANCE_OF = "0x70a08231"
+
+
+class MockState:
+    """Accounts, orders and the chain, shared by all request threads."""
+
+    def __init__(self, user: str = "") -> None:
+        self.user = user
+        self.lock = threading.Lock()
+        self.accounts: Dict[str, Dict[str, Any]] = {}
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.next_oid = 1_000_000
+        self.head = 1_000_000
+        self.nonces: Dict[str, int] = {}
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        self.requests = 0
+
+    def account(self, user: str) -> Dict[str, Any]:
+        return self.accounts.setdefault(
+            user.lower(), {"value": ACCOUNT_VALUE_USDC, "ledger": []}
+        )
+
+    # /info
+
+    def info(self, payload: Dict[str, Any]) -> Any:
+        kind = payload.get("type")
+        user = payload.get("user", "")
+        if kind == "meta":
+            return {"universe": UNIVERSE}
+        if kind == "spotMeta":
+            return {"universe": [], "tokens": []}
+        if kind == "allMids":
+            return MIDS
+        if kind == "clearinghouseState":
+            value = f"{self.account(user)['value']:.6f}"
+            summary = {
+                "accountValue": value,
+                "totalNtlPos": "0.0",
+                "totalRawUsd": value,
+                "totalMarginUsed": "0.0",
+            }
+            return {
+                "marginSummary": summary,
+                "crossMarginSummary": summary,
+                "crossMaintenanceMarginUsed": "0.0",
+                "withdrawable": value,
+                "assetPositions": [],
+                "time": int(time.time() * 1000),
+            }
+        if kind in ("openOrders", "frontendOpenOrders"):
+            return [
+                o["order"]
+                for o in self.orders.values()
+                if o["user"] == user.lower() and o["status"] == "open"
+            ]
+        if kind == "orderStatus":
+            order = self._find_order(user, payload.get("oid"))
+            if order is None:
+                return {"status": "unknownOid"}
+            return {
+                "status": "order",
+                "order": {
+                    "order": order["order"],
+                    "status": order["status"],
+                    "statusTimestamp": order["updated"],
+                },
+            }
+        if kind == "userRateLimit":
+            return {"cumVlm": "0.0", "nRequestsUsed": 0, "nRequestsCap": 10_000}
+        if kind == "userNonFundingLedgerUpdates":
+            start = int(payload.get("startTime") or 0)
+            return [u for u in self.account(user)["ledger"] if u["time"] >= start]
+        if kind == "l2Book":
+            px = float(MIDS.get(payload.get("coin", ""), "1"))
+            return {
+                "coin": payload.get("coin"),
+                "time": int(time.time() * 1000),
+                "levels": [
+                    [{"px": f"{px * 0.999:g}", "sz": "10", "n": 1}],
+                    [{"px": f"{px * 1.001:g}", "sz": "10", "n": 1}],
+                ],
+            }
+        return []
+
+    def _find_order(self, user: str, oid: Any) -> Dict[str, Any] | None:
+        if isinstance(oid, int):
+            order = self.orders.get(oid)
+        else:
+            order = next(
+                (o for o in self.orders.values() if o["order"].get("cloid") == oid),
+                None,
+            )
+        if order is None or order["user"] != user.lower():
+            return None
+        return order
+
+    # /exchange
+
+    def exchange(self, payload: Dict[str, Any]) -> Any:
+        action = payload.get("action") or {}
+        kind = action.get("type")
+        # Signatures are not verified, so actions act for the configured user
+        user = (payload.get("vaultAddress") or self.user).lower()
+        if kind == "order":
+            statuses = [self._place(user, wire) for wire in action["orders"]]
+        elif kind == "batchModify":
+            statuses = []
+            for modify in action["modifies"]:
+                old = self._find_order(user, modify["oid"])
+                if old is None or old["status"] != "open":
+                    statuses.append({"error": "Cannot modify canceled or filled order"})
+                    continue
+                old["status"] = "canceled"
+                statuses.append(self._place(user, modify["order"]))
+        elif kind == "cancel":
+            statuses = []
+            for cancel in action["cancels"]:
+                order = self._find_order(user, cancel["o"])
+                if order is None or order["status"] != "open":
+                    statuses.append(
+                        {"error": "Order was never placed or already canceled"}
+                    )
+                    continue
+                order["status"] = "canceled"
+                order["updated"] = int(time.time() * 1000)
+                statuses.append("success")
+        elif kind == "withdraw3":
+            self.account(user)["value"] -= float(action["amount"])
+            return {"status": "ok", "response": {"type": "default"}}
+        elif kind == "usdSend":
+            self.account(user)["value"] -= float(action["amount"])
+            self.account(action["destination"])["value"] += float(action["amount"])
+            return {"status": "ok", "response": {"type": "default"}}
+        else:
+            return {"status": "ok", "response": {"type": "default"}}
+        return {
+            "status": "ok",
+            "response": {"type": kind, "data": {"statuses": statuses}},
+        }
+
+    def _place(self, user: str, wire: Dict[str, Any]) -> Dict[str, Any]:
+        oid = self.next_oid
+        self.next_oid += 1
+        now = int(time.time() * 1000)
+        limit = wire.get("t", {}).get("limit", {})
+        order = {
+            "coin": UNIVERSE[wire["a"]]["name"],
+            "side": "B" if wire["b"] else "A",
+            "limitPx": wire["p"],
+            "sz": wire["s"],
+            "origSz": wire["s"],
+            "oid": oid,
+            "timestamp": now,
+            "orderType": "Limit",
+            "tif": limit.get("tif", "Gtc"),
+            "reduceOnly": wire.get("r", False),
+            "cloid": wire.get("c"),
+        }
+        self.orders[oid] = {
+            "user": user,
+            "order": order,
+            "status": "open",
+            "updated": now,
+        }
+        resting: Dict[str, Any] = {"oid": oid}
+        if wire.get("c"):
+            resting["cloid"] = wire["c"]
+        return {"resting": resting}
+
+    # /rpc
+
+    def rpc(self, method: str, params: List[Any]) -> Any:
+        if method == "eth_blockNumber":
+            self.head += 1
+            return hex(self.head)
+        if method == "eth_chainId":
+            return hex(ARB_CHAIN_ID)
+        if method == "eth_getBalance":
+            return hex(ARB_ETH_WEI)
+        if method == "eth_getTransactionCount":
+            return hex(self.nonces.get(params[0].lower(), 0))
+        if method == "eth_call":
+            data = params[0].get("data") or params[0].get("input") or ""
+            if data.startswith(_SELECTOR_DECIMALS):
+                return "0x" + USDC_DECIMALS.to_bytes(32, "big").hex()
+            if data.startswith(_SELECTOR_BALANCE_OF):
+                return "0x" + ARB_USDC_RAW.to_bytes(32, "big").hex()
+            return "0x" + bytes(32).hex()
+        if method == "eth_feeHistory":
+            blocks = int(params[0], 16)
+            return {
+                "oldestBlock": hex(self.head - blocks + 1),
+                "baseFeePerGas": [hex(10**7)] * (blocks + 1),
+                "gasUsedRatio": [0.5] * blocks,
+                "reward": [[hex(10**6)] for _ in range(blocks)],
+            }
+        if method in ("eth_gasPrice", "eth_maxPriorityFeePerGas"):
+            return hex(10**7)
+        if method == "eth_estimateGas":
+            return hex(TRANSFER_GAS)
+        if method == "eth_sendRawTransaction":
+            return self._send(params[0])
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0].lower())
+        if method == "eth_getLogs":
+            return []
+        raise ValueError(f"Unsupported method {method}")
+
+    def _send(self, raw_hex: str) -> str:
+        raw = bytes.fromhex(raw_hex.removeprefix("0x"))
+        sender = eth_account.Account.recover_transaction(raw).lower()
+        fields = rlp.decode(raw[1:]) if raw[0] < 0x7F else rlp.decode(raw)
+        data = fields[7] if raw[0] == 2 else fields[5]
+        tx_hash = Web3.keccak(raw).hex()
+        tx_hash = tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+        self.nonces[sender] = self.nonces.get(sender, 0) + 1
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(self.head),
+            "status": "0x1",
+            "gasUsed": hex(TRANSFER_GAS),
+            "effectiveGasPrice": hex(10**7),
+            "cumulativeGasUsed": hex(TRANSFER_GAS),
+            "logs": [],
+        }
+        if len(data) >= 68:
+            amount = int.from_bytes(data[36:68], "big") / 10**USDC_DECIMALS
+            account = self.account(sender)
+            account["value"] += amount
+            account["ledger"].append(
+                {
+                    "time": int(time.time() * 1000),
+                    "hash": tx_hash,
+                    "delta": {"type": "deposit", "usdc": f"{amount:g}"},
+                }
+            )
+        return tx_hash
+
+
+class MockServer:
+    """Runs MockState behind an HTTP server on a background thread."""
+
+    def __init__(self, port: int = 0, latency_s: float = 0.0, user: str = ""):
+        self.state = MockState(user)
+        self.latency_s = latency_s
+        # path -> seconds to hold back the answer of the next request to it,
+        # once processed: a response that is slow to come back
+        self.stall_s: Dict[str, float] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self) -> type:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if mock.latency_s:
+                    time.sleep(mock.latency_s)
+                with mock.state.lock:
+                    mock.state.requests += 1
+                    try:
+                        body = mock._dispatch(self.path, payload)
+                    except Exception as e:
+                        self._reply(500, {"error": str(e)})
+                        return
+                    stall = mock.stall_s.pop(self.path, 0.0)
+                if stall:
+                    time.sleep(stall)
+                try:
+                    self._reply(200, body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting
+                    pass
+
+            def _reply(self, status: int, body: Any) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def _dispatch(self, path: str, payload: Any) -> Any:
+        if path == "/info":
+            return self.state.info(payload)
+        if path == "/exchange":
+            return self.state.exchange(payload)
+        if path == "/rpc":
+            if isinstance(payload, list):
+                return [self._rpc_call(call) for call in payload]
+            return self._rpc_call(payload)
+        raise ValueError(f"Unknown path {path}")
+
+    def _rpc_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": call.get("id")}
+        try:
+            response["result"] = self.state.rpc(
+                call["method"], call.get("params") or []
+            )
+        except Exception as e:
+            response["error"] = {"code": -32601, "message": str(e)}
+        return response
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--user", default="", help="Account every exchange action acts for"
+    )
+    args = parser.parse_args()
+    server = MockServer(args.port, args.latency_ms / 1000, args.user).start()
+    print(f"Mock HyperLiquid API on {server.url} (JSON-RPC on {server.url}/rpc)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
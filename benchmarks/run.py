@@ -0,0 +1,257 @@
+"""End-to-end CLI benchmarks against the local mock HyperLiquid API.
+
+Each case runs `hlexec` in a fresh interpreter, as a user would, with
+`HLEXEC_API_URL` and `HLEXEC_ARB_RPC` pointing at benchmarks/mock_hl.py:
+
+- cold start: `hlexec --help`, i.e. interpreter start plus imports
+- per command: wall time of status, order new/modify/cancel, deposit and
+  withdraw
+- bulk: rows per second through `withdraw batch` and `transfer --file`
+
+    python benchmarks/run.py --save        # record benchmarks/baseline.json
+    python benchmarks/run.py               # compare against it
+
+A comparison exits with status 1 when any median is slower than the
+baseline by more than --tolerance. Baselines are machine specific and
+are not checked in.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import eth_account
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+from mock_hl import MockServer
+
+ROOT = Path(__file__).resolve().parent.parent
+CLI = ROOT / "src" / "hl_executor.py"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Fixed key so the mock account and the baseline are the same every run
+BENCH_KEY = "0x" + "42" * 32
+BENCH_DESTINATION = "0x" + "11" * 20
+
+# A case that has not finished by then counts as hung
+CASE_TIMEOUT_S = 120
+
+
+class Bench:
+    """Runs hlexec against one mock server and collects timings."""
+
+    def __init__(self, latency_s: float, runs: int, rows: int):
+        self.runs = runs
+        self.rows = rows
+        self.user = eth_account.Account.from_key(BENCH_KEY).address
+        self.server = MockServer(latency_s=latency_s, user=self.user).start()
+        self.tmp = tempfile.TemporaryDirectory(prefix="hlexec-bench-")
+        self.env = dict(
+            os.environ,
+            HLEXEC_API_URL=self.server.url,
+            HLEXEC_ARB_RPC=f"{self.server.url}/rpc",
+            HLEXEC_CACHE_DIR=self.tmp.name,
+            PRIVATE_KEY=BENCH_KEY,
+            ACCOUNT_ADDRESS=self.user,
+            COLUMNS="120",
+        )
+
+    def close(self) -> None:
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def hlexec(self, *args: str) -> float:
+        """Run one command; returns its wall time in seconds."""
+        # The shared rate limiter (kept in the testnet cache directory, as
+        # the mock URL is not mainnet) would otherwise throttle later runs
+        Path(self.tmp.name, "testnet", "rate_limit.json").unlink(missing_ok=True)
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, str(CLI), *args],
+            env=self.env,
+            cwd=self.tmp.name,
+            capture_output=True,
+            text=True,
+            timeout=CASE_TIMEOUT_S,
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(
+                f"hlexec {' '.join(args)} failed:\n{result.stdout}{result.stderr}"
+            )
+        return elapsed
+
+    def resting_order(self) -> str:
+        """Place an order straight into the mock; returns its oid."""
+        with self.server.state.lock:
+            status = self.server.state._place(
+                self.user.lower(),
+                {"a": 0, "b": True, "p": "50000", "s": "0.001", "r": False},
+            )
+        return str(status["resting"]["oid"])
+
+    def batch_file(self, name: str, line: str) -> str:
+        path = Path(self.tmp.name, name)
+        path.write_text("".join(line + "\n" for _ in range(self.rows)))
+        return str(path)
+
+    def cases(self) -> List[Tuple[str, Callable[[], List[str]], int]]:
+        """(name, args factory, rows) per case; rows > 0 marks a bulk case."""
+        withdrawals = self.batch_file("withdraw.csv", f"{BENCH_DESTINATION},2")
+        transfers = self.batch_file("transfer.csv", f"usd,{BENCH_DESTINATION},1")
+        return [
+            ("cold_start", lambda: ["--help"], 0),
+            ("status", lambda: ["status"], 0),
+            ("order_new", lambda: ["order", "new", "BTC", "buy", "0.001", "50000"], 0),
+            (
+                "order_modify",
+                lambda: ["order", "modify", self.resting_order(), "--price", "51000"],
+                0,
+            ),
+            ("order_cancel", lambda: ["order", "cancel", self.resting_order()], 0),
+            ("deposit", lambda: ["deposit", "5", "--confirmations", "1"], 0),
+            ("withdraw", lambda: ["withdraw", "5", "--no-confirm"], 0),
+            (
+                "withdraw_batch",
+                lambda: ["withdraw", "batch", withdrawals, "--no-confirm"],
+                self.rows,
+            ),
+            (
+                "transfer_file",
+                lambda: ["transfer", "--file", transfers, "--no-confirm"],
+                self.rows,
+            ),
+        ]
+
+    def measure(self, only: List[str]) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        for name, make_args, rows in self.cases():
+            if only and name not in only:
+                continue
+            # One unmeasured run warms the OS page cache and the hlexec cache
+            self.hlexec(*make_args())
+            times = [self.hlexec(*make_args()) for _ in range(self.runs)]
+            median = statistics.median(times)
+            results[name] = {
+                "median_s": round(median, 4),
+                "min_s": round(min(times), 4),
+                "max_s": round(max(times), 4),
+            }
+            if rows:
+                results[name]["rows"] = rows
+                results[name]["rows_per_s"] = round(rows / median, 2)
+        return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+) -> List[str]:
+    """Names of the cases whose median regressed beyond `tolerance`."""
+    return [
+        name
+        for name, result in results.items()
+        if name in baseline
+        and result["median_s"] > baseline[name]["median_s"] * (1 + tolerance)
+    ]
+
+
+def _render(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    regressed: List[str],
+) -> None:
+    table = Table(
+        title="hlexec benchmarks",
+        box=box.ROUNDED,
+        title_style="bold bright_cyan",
+        title_justify="left",
+    )
+    table.add_column("Case", style="cyan")
+    table.add_column("Median", justify="right")
+    table.add_column("Min", justify="right")
+    table.add_column("Rows/s", justify="right")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Change", justify="right")
+    for name, result in results.items():
+        base = baseline.get(name)
+        change = ""
+        if base:
+            delta = result["median_s"] / base["median_s"] - 1
+            color = "red" if name in regressed else "green" if delta < 0 else "white"
+            change = f"[{color}]{delta:+.1%}[/{color}]"
+        table.add_row(
+            name,
+            f"{result['median_s'] * 1000:.0f} ms",
+            f"{result['min_s'] * 1000:.0f} ms",
+            f"{result['rows_per_s']:.1f}" if "rows_per_s" in result else "",
+            f"{base['median_s'] * 1000:.0f} ms" if base else "",
+            change,
+        )
+    Console().print(table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="Only run these cases")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs per case")
+    parser.add_argument("--rows", type=int, default=50, help="Rows per bulk case")
+    parser.add_argument(
+        "--latency-ms", type=float, default=5.0, help="Mock latency per request"
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="Write the results as the new baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown against the baseline, as a fraction",
+    )
+    args = parser.parse_args()
+
+    bench = Bench(args.latency_ms / 1000, args.runs, args.rows)
+    try:
+        results = bench.measure(args.cases)
+    finally:
+        bench.close()
+
+    baseline: Dict[str, Dict[str, Any]] = {}
+    if args.baseline.exists() and not args.save:
+        baseline = json.loads(args.baseline.read_text())["results"]
+    regressed = compare(results, baseline, args.tolerance)
+    _render(results, baseline, regressed)
+
+    if args.save:
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "latency_ms": args.latency_ms,
+                    "runs": args.runs,
+                    "python": sys.version.split()[0],
+                    "recorded": int(time.time()),
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"Baseline saved to {args.baseline}")
+    elif regressed:
+        print(f"Regressed beyond {args.tolerance:.0%}: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+import threading
+import time
+import click
+from rich.console import Console
+
+# Snapshots younger than this are reused instead of fetching `user_state` again
+STATE_TTL_S = 2.0
+
+
+class AccountState:
+    """Typed view of one `user_state` snapshot."""
+
+    def __init__(self, raw: Dict[str, Any], fetched_at: float):
+        self.raw = raw
+        self.fetched_at = fetched_at
+
+    @property
+    def margin_summary(self) -> Dict[str, float]:
+        """marginSummary with its values as floats (accountValue, totalNtlPos,
+        totalRawUsd, totalMarginUsed)."""
+        return {
+            key: float(value)
+            for key, value in (self.raw.get("marginSummary") or {}).items()
+        }
+
+    @property
+    def account_value(self) -> float:
+        return self.margin_summary.get("accountValue", 0.0)
+
+    @property
+    def withdrawable(self) -> float:
+        return float(self.raw.get("withdrawable") or 0)
+
+    @property
+    def asset_positions(self) -> List[Dict[str, Any]]:
+        return self.raw.get("assetPositions") or self.raw.get("positions") or []
+
+
+class AccountStateService:
+    """Shares `user_state` snapshots between the steps of a command.
+
+    A snapshot is reused for `ttl` seconds, and callers asking for an
+    address while its fetch is in flight wait for that fetch instead of
+    starting another, so one snapshot is never requested twice. Failures
+    are raised to every waiting caller and are not cached. After an action
+    that moves funds, read with `max_age=0` to get a fresh snapshot.
+    """
+
+    def __init__(self, info: Any, ttl: float = STATE_TTL_S):
+        self.info = info
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: Dict[str, AccountState] = {}
+        self._inflight: Dict[str, Tuple[float, Future]] = {}
+
+    def get(self, address: str, max_age: float | None = None) -> AccountState:
+        key = address.lower()
+        max_age = self.ttl if max_age is None else max_age
+        requested = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and requested - cached.fetched_at <= max_age:
+                return cached
+            inflight = self._inflight.get(key)
+            # A fetch started before the age limit may predate what the
+            # caller needs to see, so only join fetches that are new enough
+            if inflight is not None and requested - inflight[0] <= max_age:
+                future = inflight[1]
+                owner = False
+            else:
+                future = Future()
+                self._inflight[key] = (requested, future)
+                owner = True
+
+        if owner:
+            try:
+                state = AccountState(self.info.user_state(address), requested)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                with self._lock:
+                    cached = self._cache.get(key)
+                    if cached is None or cached.fetched_at < requested:
+                        self._cache[key] = state
+                future.set_result(state)
+            finally:
+                with self._lock:
+                    if self._inflight.get(key, (0, None))[1] is future:
+                        del self._inflight[key]
+        return future.result()
+
+    def invalidate(self, address: str) -> None:
+        with self._lock:
+            self._cache.pop(address.lower(), None)
+
+
+def load_state(
+    states: AccountStateService, address: str, max_age: float | None = None
+) -> AccountState:
+    """`states.get` for handlers: a failed fetch aborts the command."""
+    try:
+        return states.get(address, max_age)
+    except Exception as e:
+        raise click.ClickException(f"Failed to fetch user_state: {e}")
+
+
+def load_state_after_action(
+    console: Console,
+    states: AccountStateService,
+    address: str,
+    max_age: float | None = None,
+) -> AccountState | None:
+    """`states.get` once an action went through: a failed fetch is only a
+    warning (returning None), since the action must not be reported as
+    failed."""
+    try:
+        return states.get(address, max_age)
+    except Exception as e:
+        console.print(f"⚠️  Could not fetch the balance of {address}: {e}")
+        return None
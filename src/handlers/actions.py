@@ -0,0 +1,280 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import threading
+import time
+from hyperliquid.utils.constants import MAINNET_API_URL
+from hyperliquid.utils.error import ClientError
+from hyperliquid.utils.signing import (
+    order_request_to_order_wire,
+    order_wires_to_order_action,
+    sign_l1_action,
+    sign_spot_transfer_action,
+    sign_usd_class_transfer_action,
+    sign_usd_transfer_action,
+    sign_withdraw_from_bridge_action,
+)
+from .rate_limit import is_rate_limited
+
+# Exchange actions submitted at once, and how fast new ones may start. The
+# shared RateLimiter holds the REST budget itself; this only keeps a queue
+# from starting its whole backlog at once.
+MAX_IN_FLIGHT = 8
+ACTIONS_PER_SECOND = 10.0
+
+# A 429 is retried after RATE_LIMIT_BACKOFF_S, doubling each time (clients
+# from `setup` already queue on the RateLimiter; this covers the others)
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF_S = 1.0
+
+
+class ActionNonces:
+    """Unique, increasing millisecond nonces for HyperLiquid actions.
+
+    The SDK uses the current time as an action's nonce, so two actions
+    signed in the same millisecond collide and one is rejected. Nonces
+    from here follow the clock but never repeat.
+    """
+
+    def __init__(self) -> None:
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        with self._lock:
+            self._last = max(int(time.time() * 1000), self._last + 1)
+            return self._last
+
+
+class ActionQueue:
+    """Submits exchange actions concurrently within a rate budget.
+
+    At most `max_in_flight` actions are outstanding and new ones start no
+    faster than `per_second`. An action rejected with a rate limit is
+    retried with backoff instead of failing.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        per_second: float = ACTIONS_PER_SECOND,
+    ):
+        self.max_in_flight = max_in_flight
+        self.interval = 1 / per_second
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def _pace(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def _submit(self, fn: Callable[[Any], Any], item: Any) -> Any:
+        backoff = RATE_LIMIT_BACKOFF_S
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self._pace()
+            try:
+                return fn(item)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == RATE_LIMIT_RETRIES:
+                    raise
+            time.sleep(backoff)
+            backoff *= 2
+
+    def run(self, fn: Callable[[Any], Any], items: Sequence[Any]) -> List[Any]:
+        """Call `fn` on every item; returns the results in order, with the
+        exception in place of the result for items that failed."""
+
+        def call(item: Any) -> Any:
+            try:
+                return self._submit(fn, item)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            return list(pool.map(call, items))
+
+
+# Builders for the transfer-like actions, mirroring the SDK's `Exchange`
+# methods but signed with a caller-chosen nonce
+
+
+def _is_mainnet(exchange: Any) -> bool:
+    return exchange.base_url == MAINNET_API_URL
+
+
+def withdraw(exchange: Any, nonce: int, amount: Decimal, destination: str) -> Any:
+    """`Exchange.withdraw_from_bridge`"""
+    action = {
+        "destination": destination,
+        "amount": str(amount),
+        "time": nonce,
+        "type": "withdraw3",
+    }
+    signature = sign_withdraw_from_bridge_action(
+        exchange.wallet, action, _is_mainnet(exchange)
+    )
+    return exchange._post_action(action, signature, nonce)
+
+
+def usd_send(exchange: Any, nonce: int, amount: Decimal, destination: str) -> Any:
+    """`Exchange.usd_transfer`: perp USDC to another HL account"""
+    action = {
+        "destination": destination,
+        "amount": str(amount),
+        "time": nonce,
+        "type": "usdSend",
+    }
+    signature = sign_usd_transfer_action(exchange.wallet, action, _is_mainnet(exchange))
+    return exchange._post_action(action, signature, nonce)
+
+
+def spot_send(
+    exchange: Any, nonce: int, amount: Decimal, destination: str, token: str
+) -> Any:
+    """`Exchange.spot_transfer`: a spot token (`NAME:tokenId`) to another account"""
+    action = {
+        "destination": destination,
+        "amount": str(amount),
+        "token": token,
+        "time": nonce,
+        "type": "spotSend",
+    }
+    signature = sign_spot_transfer_action(
+        exchange.wallet, action, _is_mainnet(exchange)
+    )
+    return exchange._post_action(action, signature, nonce)
+
+
+def usd_class_transfer(
+    exchange: Any, nonce: int, amount: Decimal, to_perp: bool
+) -> Any:
+    """`Exchange.usd_class_transfer`: USDC between the spot and perp balances"""
+    str_amount = str(amount)
+    if exchange.vault_address:
+        str_amount += f" subaccount:{exchange.vault_address}"
+    action = {
+        "type": "usdClassTransfer",
+        "amount": str_amount,
+        "toPerp": to_perp,
+        "nonce": nonce,
+    }
+    signature = sign_usd_class_transfer_action(
+        exchange.wallet, action, _is_mainnet(exchange)
+    )
+    return exchange._post_action(action, signature, nonce)
+
+
+def vault_transfer(
+    exchange: Any, nonce: int, vault: str, is_deposit: bool, usd: int
+) -> Any:
+    """`Exchange.vault_usd_transfer`; `usd` is in micro-USDC"""
+    action = {
+        "type": "vaultTransfer",
+        "vaultAddress": vault,
+        "isDeposit": is_deposit,
+        "usd": usd,
+    }
+    signature = sign_l1_action(
+        exchange.wallet,
+        action,
+        None,
+        nonce,
+        exchange.expires_after,
+        _is_mainnet(exchange),
+    )
+    return exchange._post_action(action, signature, nonce)
+
+
+def update_leverage(
+    exchange: Any, nonce: int, asset: int, is_cross: bool, leverage: int
+) -> Any:
+    """`Exchange.update_leverage` for an asset id"""
+    action = {
+        "type": "updateLeverage",
+        "asset": asset,
+        "isCross": is_cross,
+        "leverage": leverage,
+    }
+    signature = sign_l1_action(
+        exchange.wallet,
+        action,
+        exchange.vault_address,
+        nonce,
+        exchange.expires_after,
+        _is_mainnet(exchange),
+    )
+    return exchange._post_action(action, signature, nonce)
+
+
+def update_isolated_margin(exchange: Any, nonce: int, asset: int, ntli: int) -> Any:
+    """`Exchange.update_isolated_margin`; `ntli` is in micro-USDC, negative
+    to remove margin"""
+    action = {
+        "type": "updateIsolatedMargin",
+        "asset": asset,
+        "isBuy": True,
+        "ntli": ntli,
+    }
+    signature = sign_l1_action(
+        exchange.wallet,
+        action,
+        exchange.vault_address,
+        nonce,
+        exchange.expires_after,
+        _is_mainnet(exchange),
+    )
+    return exchange._post_action(action, signature, nonce)
+
+
+def signed_order(
+    exchange: Any,
+    nonce: int,
+    coin: str,
+    is_buy: bool,
+    sz: float,
+    limit_px: float,
+    order_type: Any,
+    reduce_only: bool,
+    cloid: Any,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """The action and signature of `Exchange.order`, for
+    `exchange._post_action(action, signature, nonce)`; posting them again
+    repeats the very same request"""
+    order: Any = {
+        "coin": coin,
+        "is_buy": is_buy,
+        "sz": sz,
+        "limit_px": limit_px,
+        "order_type": order_type,
+        "reduce_only": reduce_only,
+    }
+    if cloid:
+        order["cloid"] = cloid
+    action = order_wires_to_order_action(
+        [order_request_to_order_wire(order, exchange.info.name_to_asset(coin))]
+    )
+    signature = sign_l1_action(
+        exchange.wallet,
+        action,
+        exchange.vault_address,
+        nonce,
+        exchange.expires_after,
+        _is_mainnet(exchange),
+    )
+    return action, signature
+
+
+def action_error(result: Any) -> str | None:
+    """The error of an exchange response, or None if it succeeded."""
+    if isinstance(result, Exception):
+        if isinstance(result, ClientError):
+            return f"{result.status_code}: {result.error_message}"
+        return str(result)
+    if not result or result.get("status") != "ok":
+        return str(result.get("response", "Unknown error") if result else "No response")
+    return None
@@ -0,0 +1,232 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+import threading
+import time
+import click
+import numpy as np
+from hyperliquid.api import API
+from hyperliquid.websocket_manager import WebsocketManager
+from rich.console import Console, Group
+from rich.live import Live
+from rich.table import Table
+from rich.text import Text
+from rich import box
+from .rate_limit import RateLimiter, rate_limited
+from .setup import api_url
+from .tracing import traced
+
+# l2Book snapshots and updates carry at most this many levels per side
+MAX_LEVELS = 20
+
+# Distances from the mid, in basis points, that depth is reported for
+DEPTH_BANDS_BPS = (10, 50, 100)
+
+BID, ASK = 0, 1
+
+
+class L2Book:
+    """Fixed-size, array-backed top of book for one coin.
+
+    Each `l2Book` message replaces the top levels of both sides; they are
+    written into preallocated arrays in place, and cumulative size/notional
+    are recomputed into preallocated buffers on every update so readers only
+    index into them. Writers and readers synchronise on `lock`.
+    """
+
+    def __init__(self, coin: str, max_levels: int = MAX_LEVELS):
+        self.coin = coin
+        self.px = np.zeros((2, max_levels))
+        self.sz = np.zeros((2, max_levels))
+        self.n = np.zeros((2, max_levels), dtype=np.int64)
+        self.count = np.zeros(2, dtype=np.int64)
+        self.cum_sz = np.zeros((2, max_levels))
+        self.cum_ntl = np.zeros((2, max_levels))
+        self._ntl = np.zeros((2, max_levels))
+        self.time = 0
+        self.seq = 0
+        self.lock = threading.Lock()
+
+    def update(self, levels: List[List[Dict[str, Any]]], ts: int) -> None:
+        """Apply an l2Book `levels` pair ([bids, asks], best first)."""
+        px, sz, n = self.px, self.sz, self.n
+        limit = px.shape[1]
+        with self.lock:
+            for side in (BID, ASK):
+                count = 0
+                for level in levels[side][:limit]:
+                    px[side, count] = float(level["px"])
+                    sz[side, count] = float(level["sz"])
+                    n[side, count] = level["n"]
+                    count += 1
+                sz[side, count:] = 0.0
+                self.count[side] = count
+            np.multiply(px, sz, out=self._ntl)
+            np.cumsum(sz, axis=1, out=self.cum_sz)
+            np.cumsum(self._ntl, axis=1, out=self.cum_ntl)
+            self.time = ts
+            self.seq += 1
+
+    def on_message(self, msg: Dict[str, Any]) -> None:
+        """WebsocketManager callback for the `l2Book` channel."""
+        data = msg.get("data") or {}
+        if data.get("coin") == self.coin and "levels" in data:
+            self.update(data["levels"], int(data.get("time") or 0))
+
+    def stats(self, top: int = 5) -> Dict[str, Any]:
+        """Mid, spread, imbalance over the top `top` levels and depth per band."""
+        with self.lock:
+            n_bid, n_ask = int(self.count[BID]), int(self.count[ASK])
+            if not n_bid or not n_ask:
+                return {"mid": None, "seq": self.seq, "time": self.time}
+            bid, ask = float(self.px[BID, 0]), float(self.px[ASK, 0])
+            mid = (bid + ask) / 2
+            k_bid, k_ask = min(top, n_bid) - 1, min(top, n_ask) - 1
+            bid_top = float(self.cum_sz[BID, k_bid])
+            ask_top = float(self.cum_sz[ASK, k_ask])
+            depth = {}
+            for bps in DEPTH_BANDS_BPS:
+                lo, hi = mid * (1 - bps / 10_000), mid * (1 + bps / 10_000)
+                # Levels are sorted away from the mid on both sides
+                i_bid = int(np.searchsorted(-self.px[BID, :n_bid], -lo, "right"))
+                i_ask = int(np.searchsorted(self.px[ASK, :n_ask], hi, "right"))
+                depth[bps] = (
+                    float(self.cum_ntl[BID, i_bid - 1]) if i_bid else 0.0,
+                    float(self.cum_ntl[ASK, i_ask - 1]) if i_ask else 0.0,
+                )
+            return {
+                "bid": bid,
+                "ask": ask,
+                "mid": mid,
+                "spread": ask - bid,
+                "spread_bps": (ask - bid) / mid * 10_000,
+                "imbalance": (bid_top - ask_top) / (bid_top + ask_top)
+                if bid_top + ask_top
+                else 0.0,
+                "depth": depth,
+                "seq": self.seq,
+                "time": self.time,
+            }
+
+    def levels(self, depth: int) -> Dict[str, np.ndarray]:
+        """Copy of the top `depth` levels for rendering."""
+        with self.lock:
+            return {
+                "count": self.count.copy(),
+                "px": self.px[:, :depth].copy(),
+                "sz": self.sz[:, :depth].copy(),
+                "cum_sz": self.cum_sz[:, :depth].copy(),
+            }
+
+
+def run(
+    production: bool,
+    coin: str,
+    depth: int,
+    stream: bool,
+    refresh: float,
+) -> None:
+    """Show the L2 book for `coin`, once or streaming from the websocket."""
+    base_url = api_url(production)
+    book = L2Book(coin)
+    console = Console()
+
+    if not stream:
+        try:
+            api = rate_limited(
+                traced(API(base_url), "info"), RateLimiter.shared(production)
+            )
+            snapshot = api.post("/info", {"type": "l2Book", "coin": coin})
+        except Exception as e:
+            raise click.ClickException(f"Failed to fetch the L2 book: {e}")
+        if not isinstance(snapshot, dict) or "levels" not in snapshot:
+            raise click.ClickException(f"No L2 book for {coin}: {snapshot}")
+        book.update(snapshot["levels"], int(snapshot.get("time") or 0))
+        console.print("")
+        console.print(_render_book(book, depth))
+        return
+
+    ws = WebsocketManager(base_url)
+    ws.daemon = True
+    ws.start()
+    ws.subscribe({"type": "l2Book", "coin": coin}, book.on_message)
+
+    interval = 1.0 / refresh
+    rendered = -1
+    try:
+        with Live(
+            Text(f"Waiting for {coin} book...", style="dim"),
+            console=console,
+            auto_refresh=False,
+        ) as live:
+            while True:
+                # Coalesce however many updates arrived since the last frame
+                if book.seq != rendered:
+                    rendered = book.seq
+                    live.update(_render_book(book, depth), refresh=True)
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ws.stop()
+
+
+def _render_book(book: L2Book, depth: int) -> Group:
+    stats = book.stats()
+    levels = book.levels(depth)
+
+    summary = Table(show_header=False, box=None, padding=(0, 1))
+    summary.add_column("k", style="bold cyan", no_wrap=True)
+    summary.add_column("v")
+    if stats["mid"] is None:
+        summary.add_row("Book", "empty")
+    else:
+        summary.add_row("Mid", f"{stats['mid']:.6g}")
+        summary.add_row(
+            "Spread", f"{stats['spread']:.6g} ({stats['spread_bps']:.2f} bps)"
+        )
+        imbalance = stats["imbalance"]
+        summary.add_row(
+            "Imbalance (top 5)",
+            Text(f"{imbalance:+.2f}", style="green" if imbalance >= 0 else "red"),
+        )
+        for bps, (bid_ntl, ask_ntl) in stats["depth"].items():
+            summary.add_row(f"Depth ±{bps} bps", f"{bid_ntl:,.0f} / {ask_ntl:,.0f} USD")
+    summary.add_row("Updates", str(stats["seq"]))
+
+    table = Table(
+        title=f"{book.coin} L2 Book",
+        title_style="bold bright_cyan",
+        header_style="cyan",
+        border_style="cyan",
+        box=box.ROUNDED,
+        expand=False,
+    )
+    table.add_column("Bid Total", justify="right")
+    table.add_column("Bid Size", justify="right")
+    table.add_column("Bid", justify="right", style="green")
+    table.add_column("Ask", justify="right", style="red")
+    table.add_column("Ask Size", justify="right")
+    table.add_column("Ask Total", justify="right")
+
+    rows = int(max(min(levels["count"][BID], depth), min(levels["count"][ASK], depth)))
+    for i in range(rows):
+        cells: List[str] = []
+        if i < levels["count"][BID]:
+            cells += [
+                f"{levels['cum_sz'][BID, i]:g}",
+                f"{levels['sz'][BID, i]:g}",
+                f"{levels['px'][BID, i]:g}",
+            ]
+        else:
+            cells += ["", "", ""]
+        if i < levels["count"][ASK]:
+            cells += [
+                f"{levels['px'][ASK, i]:g}",
+                f"{levels['sz'][ASK, i]:g}",
+                f"{levels['cum_sz'][ASK, i]:g}",
+            ]
+        else:
+            cells += ["", "", ""]
+        table.add_row(*cells)
+
+    return Group(summary, table)
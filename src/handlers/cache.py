@@ -0,0 +1,16 @@
+from __future__ import annotations
+from pathlib import Path
+import os
+
+
+def cache_dir(production: bool) -> Path:
+    """Return the per-environment cache directory, creating it if needed.
+
+    - Defaults to `~/.cache/hlexec/<testnet|mainnet>`.
+    - Set `HLEXEC_CACHE_DIR` to relocate the root directory.
+    """
+    root = os.getenv("HLEXEC_CACHE_DIR")
+    base = Path(root) if root else Path.home() / ".cache" / "hlexec"
+    path = base / ("mainnet" if production else "testnet")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,365 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+import os
+import re
+import sys
+import time
+import click
+import numpy as np
+from hyperliquid.api import API
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from rich import box
+from .cache import cache_dir
+from .rate_limit import RateLimiter, rate_limited
+from .setup import api_url
+from .tracing import traced
+
+# Fixed-length candle intervals accepted by candleSnapshot ("1M" is not
+# fixed-length, so ranges of it cannot be tracked and it is left out)
+INTERVALS_MS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 3_600_000,
+    "2h": 2 * 3_600_000,
+    "4h": 4 * 3_600_000,
+    "8h": 8 * 3_600_000,
+    "12h": 12 * 3_600_000,
+    "1d": 86_400_000,
+    "3d": 3 * 86_400_000,
+    "1w": 7 * 86_400_000,
+}
+
+# candleSnapshot returns at most this many candles per response
+CANDLES_PAGE_SIZE = 5000
+CANDLE_WORKERS = 8
+
+CANDLE_COLUMNS = {
+    "t": np.int64,
+    "o": np.float64,
+    "h": np.float64,
+    "l": np.float64,
+    "c": np.float64,
+    "v": np.float64,
+    "n": np.int64,
+}
+
+Range = Tuple[int, int]
+
+
+def parse_time(value: str) -> int:
+    """Parse epoch seconds/milliseconds or an ISO date/datetime (UTC if naive) to ms."""
+    value = value.strip()
+    if re.fullmatch(r"[0-9]+", value):
+        n = int(value)
+        # Anything below 1e11 is too small to be a millisecond timestamp
+        return n if n >= 10**11 else n * 1000
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise click.BadParameter(
+            f"Expected epoch seconds/ms or an ISO date/datetime, got {value!r}"
+        )
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def subtract_ranges(covered: List[Range], lo: int, hi: int) -> List[Range]:
+    """Parts of [lo, hi) not inside any of the sorted, disjoint `covered` ranges."""
+    gaps: List[Range] = []
+    cursor = lo
+    for a, b in covered:
+        if b <= cursor:
+            continue
+        if a >= hi:
+            break
+        if a > cursor:
+            gaps.append((cursor, a))
+        cursor = max(cursor, b)
+    if cursor < hi:
+        gaps.append((cursor, hi))
+    return gaps
+
+
+def union_ranges(ranges: List[Range]) -> List[Range]:
+    """Merge overlapping or touching [lo, hi) ranges into a sorted disjoint list."""
+    merged: List[Range] = []
+    for a, b in sorted(r for r in ranges if r[1] > r[0]):
+        if merged and a <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+
+def candle_columns(raw: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Columnar view of candleSnapshot entries."""
+    return {
+        name: np.array([c[name] for c in raw], dtype=dtype)
+        for name, dtype in CANDLE_COLUMNS.items()
+    }
+
+
+class CandleCache:
+    """Per-(coin, interval) .npz files of candle columns plus the covered
+    ranges of open times, so only the missing parts of a query are fetched."""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def open(cls, production: bool) -> "CandleCache":
+        return cls(cache_dir(production) / "candles")
+
+    def path(self, coin: str, interval: str) -> Path:
+        safe = re.sub(r"[^A-Za-z0-9@_-]", "_", coin)
+        return self.root / f"{safe}-{interval}.npz"
+
+    def load(
+        self, coin: str, interval: str
+    ) -> Tuple[Dict[str, np.ndarray], List[Range]]:
+        path = self.path(coin, interval)
+        if path.exists():
+            try:
+                with np.load(path, allow_pickle=False) as npz:
+                    columns = {name: npz[name] for name in CANDLE_COLUMNS}
+                    covered = [(int(a), int(b)) for a, b in npz["covered"]]
+                return columns, covered
+            except (OSError, ValueError, KeyError):
+                pass
+        return candle_columns([]), []
+
+    def save(
+        self,
+        coin: str,
+        interval: str,
+        columns: Dict[str, np.ndarray],
+        covered: List[Range],
+    ) -> None:
+        path = self.path(coin, interval)
+        tmp = path.with_suffix(".tmp.npz")
+        arrays: Dict[str, Any] = {
+            "covered": np.array(covered, dtype=np.int64).reshape(-1, 2),
+            **columns,
+        }
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def missing(self, coin: str, interval: str, lo: int, hi: int) -> List[Range]:
+        return subtract_ranges(self.load(coin, interval)[1], lo, hi)
+
+    def merge(
+        self,
+        coin: str,
+        interval: str,
+        fresh: Dict[str, np.ndarray],
+        fetched: List[Range],
+        now_ms: int,
+    ) -> None:
+        """Add fetched candles and mark the fetched ranges as covered.
+
+        The candle still open at `now_ms` is stored but never marked covered,
+        so it is refreshed by the next query that includes it.
+        """
+        columns, covered = self.load(coin, interval)
+        step = INTERVALS_MS[interval]
+        current = now_ms // step * step
+        # Fresh rows win over cached rows with the same open time
+        combined = {
+            name: np.concatenate([fresh[name], columns[name]]) for name in columns
+        }
+        _, keep = np.unique(combined["t"], return_index=True)
+        combined = {name: col[keep] for name, col in combined.items()}
+        closed = [(a, min(b, current)) for a, b in fetched]
+        self.save(coin, interval, combined, union_ranges(covered + closed))
+
+    def query(
+        self, coin: str, interval: str, lo: int, hi: int
+    ) -> Dict[str, np.ndarray]:
+        columns, _ = self.load(coin, interval)
+        mask = (columns["t"] >= lo) & (columns["t"] < hi)
+        return {name: col[mask] for name, col in columns.items()}
+
+
+def align(interval: str, start: int, end: int) -> Range:
+    """Open-time range [lo, hi) of the candles overlapping [start, end]."""
+    step = INTERVALS_MS[interval]
+    return start // step * step, end // step * step + step
+
+
+def sync_candles(
+    api: Any,
+    cache: CandleCache,
+    coins: List[str],
+    interval: str,
+    lo: int,
+    hi: int,
+    now_ms: int,
+    max_workers: int = CANDLE_WORKERS,
+) -> Dict[str, int]:
+    """Fetch the uncovered parts of [lo, hi) for each coin, concurrently.
+
+    Returns the number of requests made per coin; zero when the cache
+    already covers the whole range.
+    """
+    step = INTERVALS_MS[interval]
+    tasks: List[Tuple[str, Range]] = []
+    for coin in coins:
+        for a, b in cache.missing(coin, interval, lo, hi):
+            tasks.extend(
+                (coin, (c, min(c + step * CANDLES_PAGE_SIZE, b)))
+                for c in range(a, b, step * CANDLES_PAGE_SIZE)
+            )
+
+    def fetch(task: Tuple[str, Range]) -> List[Dict[str, Any]]:
+        coin, (a, b) = task
+        req = {"coin": coin, "interval": interval, "startTime": a, "endTime": b - 1}
+        result = api.post("/info", {"type": "candleSnapshot", "req": req})
+        if not isinstance(result, list):
+            raise click.ClickException(f"Unexpected candleSnapshot response: {result}")
+        return result
+
+    if len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(fetch, tasks))
+    else:
+        results = [fetch(t) for t in tasks]
+
+    counts = {coin: 0 for coin in coins}
+    for coin in coins:
+        mine = [(r, raw) for (c, r), raw in zip(tasks, results) if c == coin]
+        if not mine:
+            continue
+        counts[coin] = len(mine)
+        raw = [candle for _, page in mine for candle in page]
+        cache.merge(coin, interval, candle_columns(raw), [r for r, _ in mine], now_ms)
+    return counts
+
+
+def run(
+    production: bool,
+    coins: List[str],
+    interval: str,
+    start: int | None,
+    end: int | None,
+    out: str | None,
+    csv: bool,
+) -> None:
+    """Serve candles from the local cache, fetching only uncovered ranges."""
+    now_ms = int(time.time() * 1000)
+    end_ms = now_ms if end is None else min(end, now_ms)
+    start_ms = end_ms - 86_400_000 if start is None else start
+    if start_ms > end_ms:
+        raise click.ClickException("--from must be before --to")
+
+    lo, hi = align(interval, start_ms, end_ms)
+    base_url = api_url(production)
+
+    try:
+        cache = CandleCache.open(production)
+    except OSError as e:
+        raise click.ClickException(f"Failed to open the candle cache: {e}")
+
+    try:
+        api = rate_limited(
+            traced(API(base_url), "info"), RateLimiter.shared(production)
+        )
+        fetched = sync_candles(api, cache, coins, interval, lo, hi, now_ms)
+    except click.ClickException:
+        raise
+    except Exception as e:
+        raise click.ClickException(f"Failed to fetch candles: {e}")
+
+    data = {coin: cache.query(coin, interval, lo, hi) for coin in coins}
+
+    if out:
+        arrays: Dict[str, Any] = {
+            f"{coin}.{name}": col
+            for coin, columns in data.items()
+            for name, col in columns.items()
+        }
+        np.savez(out, **arrays)
+
+    if csv:
+        _write_csv(data)
+        return
+
+    console = Console()
+    console.print("")
+    _render_summary(console, data, fetched, interval)
+    if out:
+        console.print(Text(f"Saved candles to {out}", style="dim"))
+
+
+def _write_csv(data: Dict[str, Dict[str, np.ndarray]]) -> None:
+    out = sys.stdout
+    out.write("coin," + ",".join(CANDLE_COLUMNS) + "\n")
+    for coin, columns in data.items():
+        for row in zip(*(columns[name] for name in CANDLE_COLUMNS)):
+            out.write(
+                coin
+                + ","
+                + ",".join(f"{v:g}" if isinstance(v, float) else str(v) for v in row)
+                + "\n"
+            )
+
+
+def _render_summary(
+    console: Console,
+    data: Dict[str, Dict[str, np.ndarray]],
+    requests: Dict[str, int],
+    interval: str,
+) -> None:
+    table = Table(
+        title=f"Candles ({interval})",
+        title_style="bold bright_cyan",
+        header_style="cyan",
+        border_style="cyan",
+        box=box.ROUNDED,
+        expand=False,
+    )
+    table.add_column("Coin", style="bold")
+    table.add_column("Candles", justify="right")
+    table.add_column("From (UTC)")
+    table.add_column("To (UTC)")
+    table.add_column("Open", justify="right")
+    table.add_column("High", justify="right")
+    table.add_column("Low", justify="right")
+    table.add_column("Close", justify="right")
+    table.add_column("Volume", justify="right")
+    table.add_column("Requests", justify="right")
+
+    fmt = "%Y-%m-%d %H:%M"
+    for coin, columns in data.items():
+        n = columns["t"].size
+        if not n:
+            table.add_row(
+                coin, "0", "-", "-", "-", "-", "-", "-", "-", str(requests[coin])
+            )
+            continue
+        first, last = (
+            datetime.fromtimestamp(int(t) / 1000, tz=timezone.utc).strftime(fmt)
+            for t in (columns["t"][0], columns["t"][-1])
+        )
+        table.add_row(
+            coin,
+            str(n),
+            first,
+            last,
+            f"{columns['o'][0]:.6g}",
+            f"{columns['h'].max():.6g}",
+            f"{columns['l'].min():.6g}",
+            f"{columns['c'][-1]:.6g}",
+            f"{columns['v'].sum():,.2f}",
+            str(requests[coin]),
+        )
+    console.print(table)
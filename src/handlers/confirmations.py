@@ -0,0 +1,204 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+import json
+import os
+import threading
+import time
+import websocket
+from web3 import Web3
+from .constants import ARB_PROD_WS, ARB_TEST_WS
+from .evm import RpcError, rpc_batch, to_int
+
+# Blocks a receipt must be buried under (1 = included in the head block)
+DEFAULT_CONFIRMATIONS = 1
+
+# Polling between passes adapts to the observed block time within these
+# bounds; with a newHeads subscription MAX_POLL_INTERVAL is only a fallback
+MIN_POLL_INTERVAL = 0.25
+MAX_POLL_INTERVAL = 4.0
+
+# Receipt fields that are hex quantities on the wire
+_QUANTITY_FIELDS = (
+    "blockNumber",
+    "status",
+    "gasUsed",
+    "cumulativeGasUsed",
+    "effectiveGasPrice",
+    "transactionIndex",
+    "type",
+)
+
+
+def arb_ws_url(production: bool) -> str | None:
+    """Arbitrum websocket endpoint for newHeads, or None to poll.
+
+    `HLEXEC_ARB_WS` overrides it (empty disables the subscription). The
+    default is not used when `HLEXEC_ARB_RPC` points elsewhere, since its
+    heads would belong to another chain.
+    """
+    override = os.getenv("HLEXEC_ARB_WS")
+    if override is not None:
+        return override or None
+    if os.getenv("HLEXEC_ARB_RPC"):
+        return None
+    return ARB_PROD_WS if production else ARB_TEST_WS
+
+
+def _format_receipt(receipt: Dict[str, Any]) -> Dict[str, Any]:
+    formatted = dict(receipt)
+    for field in _QUANTITY_FIELDS:
+        if isinstance(formatted.get(field), str):
+            formatted[field] = int(formatted[field], 16)
+    return formatted
+
+
+class ConfirmationTracker:
+    """Waits for many transactions to reach a confirmation depth at once.
+
+    Each pass is one JSON-RPC batch: `eth_blockNumber` plus a receipt
+    lookup for every hash still pending, whatever their number. A pass
+    runs on each new head pushed by an `eth_subscribe("newHeads")`
+    websocket when one is available. Otherwise the interval between passes
+    follows the observed block time, and stretches while the remaining
+    receipts still need several more blocks. Receipts are re-read until
+    they are deep enough, so a receipt dropped by a reorg goes back to
+    pending.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        confirmations: int = DEFAULT_CONFIRMATIONS,
+        ws_url: str | None = None,
+    ):
+        if confirmations < 1:
+            raise ValueError("confirmations must be at least 1")
+        self.w3 = w3
+        self.confirmations = confirmations
+        self.ws_url = ws_url
+        self.passes = 0
+        self._new_head = threading.Event()
+        self._last_head = -MAX_POLL_INTERVAL
+        self._ws: Any = None
+
+    def on_head(self, _number: int | None = None) -> None:
+        """Wake the tracker for a new block (called by the subscription)."""
+        self._last_head = time.monotonic()
+        self._new_head.set()
+
+    def _subscribe(self, url: str) -> None:
+        def on_open(ws: Any) -> None:
+            ws.send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["newHeads"],
+                    }
+                )
+            )
+
+        def on_message(_ws: Any, message: str) -> None:
+            try:
+                head = json.loads(message)["params"]["result"]
+                self.on_head(int(head["number"], 16))
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        self._ws = websocket.WebSocketApp(url, on_open=on_open, on_message=on_message)
+        threading.Thread(target=self._ws.run_forever, daemon=True).start()
+
+    def _close(self) -> None:
+        if self._ws is not None:
+            self._ws.close()
+            self._ws = None
+
+    def wait(self, tx_hashes: List[str], timeout: float) -> Dict[str, Any]:
+        """Return {tx hash: receipt} once each is `confirmations` deep.
+
+        Receipts are dicts with integer quantities. A hash that is not
+        confirmed before the timeout maps to a TimeoutError instead.
+        """
+        pending = list(dict.fromkeys(tx_hashes))
+        results: Dict[str, Any] = {}
+        if self.ws_url:
+            try:
+                self._subscribe(self.ws_url)
+            except Exception:
+                self._ws = None
+
+        deadline = time.monotonic() + timeout
+        interval = MIN_POLL_INTERVAL
+        block_time: float | None = None
+        last: Tuple[int, float] | None = None
+        try:
+            while pending:
+                self._new_head.clear()
+                try:
+                    head, receipts = self._pass(pending)
+                except Exception:
+                    head, receipts = None, {}
+
+                blocks_needed = 0
+                for tx_hash, receipt in receipts.items():
+                    depth = head - receipt["blockNumber"] + 1 if head else 0
+                    if depth >= self.confirmations:
+                        results[tx_hash] = receipt
+                        pending.remove(tx_hash)
+                    else:
+                        blocks_needed = max(blocks_needed, self.confirmations - depth)
+                if not pending:
+                    break
+
+                now = time.monotonic()
+                if head is not None:
+                    if last is not None and head > last[0]:
+                        sample = (now - last[1]) / (head - last[0])
+                        block_time = (
+                            sample if block_time is None else (block_time + sample) / 2
+                        )
+                    if last is None or head > last[0]:
+                        last = (head, now)
+                if block_time is not None:
+                    interval = block_time * max(1, blocks_needed)
+                else:
+                    interval = min(interval * 2, MAX_POLL_INTERVAL)
+                interval = min(max(interval, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    break
+                # Rely on the subscription only while heads are arriving
+                live = now - self._last_head < MAX_POLL_INTERVAL
+                if self._ws is not None and live and blocks_needed <= 1:
+                    self._new_head.wait(min(MAX_POLL_INTERVAL, remaining))
+                else:
+                    time.sleep(min(interval, remaining))
+        finally:
+            self._close()
+
+        for tx_hash in pending:
+            results[tx_hash] = TimeoutError(
+                f"{tx_hash} not confirmed ({self.confirmations} blocks) "
+                f"after {timeout:.0f}s"
+            )
+        return results
+
+    def _pass(self, pending: List[str]) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        """One batch: the head and every receipt that exists so far."""
+        self.passes += 1
+        responses = rpc_batch(
+            self.w3,
+            [("eth_blockNumber", [])]
+            + [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in pending],
+        )
+        head = to_int(responses[0])
+        receipts = {}
+        for tx_hash, receipt in zip(pending, responses[1:]):
+            if isinstance(receipt, RpcError) or not receipt:
+                continue
+            if receipt.get("blockNumber") is None:
+                continue
+            receipts[tx_hash] = _format_receipt(receipt)
+        return head, receipts
@@ -10,6 +10,25 @@ HYPEREVM_PROD_RPC = "https://rpc.hyperliquid.xyz/evm"
 ARB_TEST_RPC = "https://arbitrum-sepolia-rpc.publicnode.com"
 ARB_PROD_RPC = "https://arb-one-mainnet.gateway.tatum.io"
 
+# RPC pools: reads go to the fastest healthy endpoint, with failover
+ARB_TEST_RPCS = [
+    ARB_TEST_RPC,
+    "https://sepolia-rollup.arbitrum.io/rpc",
+    "https://arbitrum-sepolia.drpc.org",
+]
+ARB_PROD_RPCS = [
+    ARB_PROD_RPC,
+    "https://arb1.arbitrum.io/rpc",
+    "https://arbitrum-one-rpc.publicnode.com",
+    "https://arbitrum.drpc.org",
+]
+# newHeads subscriptions for receipt tracking
+ARB_TEST_WS = "wss://arbitrum-sepolia-rpc.publicnode.com"
+ARB_PROD_WS = "wss://arbitrum-one-rpc.publicnode.com"
+
+HYPEREVM_TEST_RPCS = [HYPEREVM_TEST_RPC]
+HYPEREVM_PROD_RPCS = [HYPEREVM_PROD_RPC, "https://rpc.hypurrscan.io"]
+
 
 ERC20_ABI = [
     {
@@ -139,3 +158,49 @@ ERC20_ABI = [
         "type": "event",
     },
 ]
+
+# EIP-2612 `nonces(owner)`, used to sign USDC permits
+PERMIT_ABI = [
+    {
+        "inputs": [{"internalType": "address", "name": "owner", "type": "address"}],
+        "name": "nonces",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
+# EIP-712 domain name and version of the bridged USDC permit
+USDC_PERMIT_PROD_DOMAIN = ("USD Coin", "2")
+USDC_PERMIT_TEST_DOMAIN = ("USDC2", "1")
+
+BRIDGE2_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "user", "type": "address"},
+                    {"internalType": "uint64", "name": "usd", "type": "uint64"},
+                    {"internalType": "uint64", "name": "deadline", "type": "uint64"},
+                    {
+                        "components": [
+                            {"internalType": "uint256", "name": "r", "type": "uint256"},
+                            {"internalType": "uint256", "name": "s", "type": "uint256"},
+                            {"internalType": "uint8", "name": "v", "type": "uint8"},
+                        ],
+                        "internalType": "struct Signature",
+                        "name": "signature",
+                        "type": "tuple",
+                    },
+                ],
+                "internalType": "struct DepositWithPermit[]",
+                "name": "deposits",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "batchedDepositWithPermit",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+]
@@ -2,36 +2,93 @@
 from .setup import setup
 import click
 from .constants import (
-    ARB_PROD_RPC,
-    ARB_TEST_RPC,
     USDC_ARB_PROD_ADDR,
     USDC_ARB_TEST_ADDR,
     ERC20_ABI,
     BRIDGE2_PROD_ADDR,
     BRIDGE2_TEST_ADDR,
 )
-from web3 import Web3, HTTPProvider
+from web3 import Web3
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from typing import Any
+from typing import Any, Dict, List, Sequence, Tuple
 from rich.table import Table
 from rich.text import Text
 from rich import box
 from decimal import Decimal
+from web3.types import Nonce
+from .evm import (
+    RpcError,
+    call_args,
+    cached_gas,
+    cached_token,
+    gas_key,
+    rpc_batch,
+    store_gas,
+    store_token,
+    to_int,
+)
+from .fees import eip1559_fees, fee_history_call, gas_limit
+from .rpc_pool import pool_provider
+from .confirmations import DEFAULT_CONFIRMATIONS, ConfirmationTracker, arb_ws_url
+from hyperliquid.websocket_manager import WebsocketManager
+from .nonce import NonceManager
+from .account_state import (
+    AccountStateService,
+    load_state,
+    load_state_after_action,
+)
+import threading
 import time
 
+# How long to wait for each Arbitrum receipt
+RECEIPT_TIMEOUT = 120.0
+
+# Bridge deposits are normally credited within a minute or two
+CREDIT_TIMEOUT = 300.0
+
+# Ledger polling backoff, used alongside the websocket subscription
+MIN_POLL_INTERVAL = 2.0
+MAX_POLL_INTERVAL = 20.0
+
+CLOCK_SKEW_MS = 60_000
+
+# The bridge does not credit (and loses) deposits below this amount
+MIN_DEPOSIT_USDC = Decimal(5)
+
 
 def run(
-    production: bool, private_key: str | None, account_address: str | None, amount: str
+    production: bool,
+    private_key: str | None,
+    account_address: str | None,
+    amounts: Sequence[str],
+    confirmations: int = DEFAULT_CONFIRMATIONS,
 ) -> None:
-    """Deposit USDC to HyperCore from Arbitrum via signer wallet address"""
-    info, exchange, address, account = setup(production, private_key, account_address)
+    """Deposit USDC to HyperCore from Arbitrum via signer wallet address.
+
+    Several amounts are sent as back-to-back transfers with consecutive
+    local nonces, without waiting for each receipt; their receipts and
+    credits are then tracked together.
+    """
+    deposit_amounts: List[Decimal] = []
+    for amount in amounts:
+        try:
+            deposit_amount = Decimal(amount)
+        except Exception as e:
+            raise click.ClickException(f"Invalid amount format: {e}")
 
-    url = ARB_PROD_RPC if production else ARB_TEST_RPC
-    w3 = Web3(HTTPProvider(url))
+        # Check minimum deposit amount
+        if deposit_amount < MIN_DEPOSIT_USDC:
+            raise click.ClickException(
+                f"Minimum deposit amount is {MIN_DEPOSIT_USDC} USDC. "
+                f"Requested: {deposit_amount:.6f}"
+            )
+        deposit_amounts.append(deposit_amount)
+    total_amount = sum(deposit_amounts, Decimal(0))
 
-    if not w3.is_connected():
-        raise click.ClickException("Failed to connect to Arbitrum RPC")
+    info, exchange, address, account = setup(production, private_key, account_address)
+
+    w3 = Web3(pool_provider("arb", production))
 
     usdc_address = (
         Web3.to_checksum_address(USDC_ARB_PROD_ADDR)
@@ -47,38 +104,42 @@ def run(
     console = Console()
     usdc_contract = w3.eth.contract(address=usdc_address, abi=ERC20_ABI)
 
-    eth_balance_wei = w3.eth.get_balance(account.address)
-    eth_balance = Decimal(str(w3.from_wei(eth_balance_wei, "ether")))
-    usdc_balance_raw = usdc_contract.functions.balanceOf(account.address).call()
-    usdc_decimals = usdc_contract.functions.decimals().call()
-    usdc_balance = Decimal(usdc_balance_raw) / Decimal(10**usdc_decimals)
-
-    _render_balances(console, eth_balance, usdc_balance, account.address)
-
     try:
-        deposit_amount = Decimal(amount)
-        deposit_amount_raw = int(deposit_amount * Decimal(10**usdc_decimals))
+        # Transfers differ only in amount, so one estimate covers every leg
+        reads = _presend_reads(
+            w3,
+            production,
+            usdc_contract,
+            bridge_address,
+            account.address,
+            max(deposit_amounts),
+        )
     except Exception as e:
-        raise click.ClickException(f"Invalid amount format: {e}")
+        raise click.ClickException(f"Failed to read from Arbitrum RPC: {e}")
 
-    # Check minimum deposit amount
-    if deposit_amount < 5:
-        raise click.ClickException(
-            f"Minimum deposit amount is 5 USDC. Requested: {deposit_amount:.6f}"
-        )
+    usdc_decimals = reads["decimals"]
+    eth_balance = Decimal(str(w3.from_wei(reads["eth_balance"], "ether")))
+    usdc_balance = Decimal(reads["usdc_balance"]) / Decimal(10**usdc_decimals)
 
-    if usdc_balance < deposit_amount:
+    _render_balances(console, eth_balance, usdc_balance, account.address)
+
+    if usdc_balance < total_amount:
         raise click.ClickException(
-            f"Insufficient USDC balance. Have: {usdc_balance:.6f}, Need: {deposit_amount:.6f}"
+            f"Insufficient USDC balance. Have: {usdc_balance:.6f}, Need: {total_amount:.6f}"
         )
 
-    if eth_balance < 0.001:
+    if eth_balance < 0.001 * len(deposit_amounts):
         console.print(Text("⚠️  Warning: Low ETH balance for gas fees", style="yellow"))
 
-    initial_hl_balance = _get_hl_usd_balance(info, account.address)
+    states = AccountStateService(info)
+    initial_hl_balance = load_state(states, account.address).account_value
     console.print(f"\n💰 Initial HL balance: ${initial_hl_balance:.2f}")
-    console.print(f"📤 Depositing: {deposit_amount:.6f} USDC\n")
+    for deposit_amount in deposit_amounts:
+        console.print(f"📤 Depositing: {deposit_amount:.6f} USDC")
+    console.print()
 
+    nonces = NonceManager(w3, account.address, start=reads["nonce"])
+    sent: List[Tuple[str, Decimal]] = []
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -86,135 +147,334 @@ def run(
     ) as progress:
         task = progress.add_task("Building transaction...", total=None)
 
-        nonce = w3.eth.get_transaction_count(account.address)
-        gas_price = w3.eth.gas_price
-
-        transfer_tx = usdc_contract.functions.transfer(
-            bridge_address, deposit_amount_raw
-        ).build_transaction(
-            {
-                "from": account.address,
-                "nonce": nonce,
-                "gasPrice": gas_price,
-            }
-        )
-
         try:
-            gas_estimate = w3.eth.estimate_gas(transfer_tx)
-            transfer_tx["gas"] = int(gas_estimate * 1.2)  # Add 20% buffer
+            gas_estimate = to_int(reads["gas_estimate"])
         except Exception as e:
             raise click.ClickException(f"Gas estimation failed: {e}")
 
-        progress.update(task, description="Signing transaction...")
-
-        signed_tx = w3.eth.account.sign_transaction(
-            transfer_tx, private_key=account.key.hex()
-        )
-
-        progress.update(task, description="Sending transaction to bridge...")
-
-        try:
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            console.print(f"✅ Transaction sent: {tx_hash.hex()}")
-        except Exception as e:
-            raise click.ClickException(f"Transaction failed: {e}")
+        # Ledger updates from before this point cannot be our credit; allow
+        # for clock skew between this host and the HyperLiquid nodes.
+        since_ms = int(time.time() * 1000) - CLOCK_SKEW_MS
+
+        for deposit_amount in deposit_amounts:
+            progress.update(task, description="Sending transaction to bridge...")
+            # Every field is supplied, so building the transaction needs no RPC calls
+            transfer_tx = usdc_contract.functions.transfer(
+                bridge_address, int(deposit_amount * Decimal(10**usdc_decimals))
+            ).build_transaction(
+                {
+                    "from": account.address,
+                    "nonce": Nonce(nonces.next()),
+                    "type": 2,
+                    **reads["fees"],
+                    "gas": gas_limit(gas_estimate),
+                    "chainId": reads["chain_id"],
+                }
+            )
+            signed_tx = w3.eth.account.sign_transaction(
+                transfer_tx, private_key=account.key.hex()
+            )
+
+            try:
+                tx_hash = Web3.to_hex(
+                    w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+                )
+            except Exception as e:
+                # Later nonces would queue behind the gap, so stop here
+                nonces.reset()
+                if not sent:
+                    raise click.ClickException(f"Transaction failed: {e}")
+                console.print(
+                    Text(
+                        f"⚠️  Transaction failed, not sending the remaining deposits: {e}",
+                        style="yellow",
+                    )
+                )
+                break
+            console.print(f"✅ Transaction sent: {tx_hash}")
+            sent.append((tx_hash, deposit_amount))
 
         progress.update(task, description="Waiting for confirmation...")
 
-        try:
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            if receipt["status"] != 1:
-                raise click.ClickException("Transaction failed on chain")
-            console.print(f"✅ Transaction confirmed in block {receipt['blockNumber']}")
-        except Exception as e:
-            raise click.ClickException(f"Transaction confirmation failed: {e}")
+        tracker = ConfirmationTracker(w3, confirmations, arb_ws_url(production))
+        receipts = tracker.wait([tx_hash for tx_hash, _ in sent], RECEIPT_TIMEOUT)
+        confirmed: List[Tuple[str, Decimal]] = []
+        for tx_hash, deposit_amount in sent:
+            receipt = receipts[tx_hash]
+            if isinstance(receipt, Exception):
+                console.print(
+                    Text(f"❌ {tx_hash} confirmation failed: {receipt}", style="red")
+                )
+            elif receipt["status"] != 1:
+                console.print(Text(f"❌ {tx_hash} failed on chain", style="red"))
+            else:
+                console.print(
+                    f"✅ Transaction confirmed in block {receipt['blockNumber']}"
+                )
+                confirmed.append((tx_hash, deposit_amount))
+
+    if not confirmed:
+        raise click.ClickException("Transaction failed on chain")
 
     console.print("\n⏳ Waiting for HyperLiquid credit...")
-    credited = _poll_for_hl_credit(
-        console, info, account.address, initial_hl_balance, float(deposit_amount)
+    credits = _wait_for_hl_credits(
+        console,
+        info,
+        info.base_url,
+        [
+            (account.address, tx_hash, deposit_amount)
+            for tx_hash, deposit_amount in confirmed
+        ],
+        since_ms,
     )
 
-    if not credited:
+    if len(credits) < len(confirmed):
         raise click.ClickException("Timeout waiting for HyperLiquid credit")
+    credited = sum(float(entry["delta"]["usdc"]) for entry in credits.values())
+    # The signer's snapshot from before the deposit is out of date now
+    states.invalidate(account.address)
+    console.print(f"\n✅ HyperLiquid account credited: ${credited:.2f}")
 
     if address.lower() != account.address.lower():
         console.print(
             f"\n🔄 Transferring from signer {account.address} to target {address}..."
         )
+        transfer_amount = float(sum((amount for _, amount in confirmed), Decimal(0)))
 
         try:
-            before_transfer = _get_hl_usd_balance(info, address)
-            transfer_result = exchange.usd_transfer(float(deposit_amount), address)
+            before_transfer = load_state(states, address, max_age=0).account_value
+            transfer_result = exchange.usd_transfer(transfer_amount, address)
 
             if transfer_result and transfer_result.get("status") == "ok":
                 console.print("✅ Internal transfer initiated")
 
                 time.sleep(2)
 
-                final_balance = _get_hl_usd_balance(info, address)
-                transferred = final_balance - before_transfer
-                fee = float(deposit_amount) - transferred
-
-                if transferred > float(deposit_amount) * 0.99:  # 1% tolerance for fees
-                    console.print(
-                        f"✅ Transfer complete. Amount: ${transferred:.2f}, Fee: ${fee:.4f}"
-                    )
-                else:
-                    console.print(
-                        f"⚠️  Transfer amount mismatch. Expected: ${deposit_amount:.2f}, Got: ${transferred:.2f}"
-                    )
+                after_transfer = load_state_after_action(
+                    console, states, address, max_age=0
+                )
+                if after_transfer is not None:
+                    transferred = after_transfer.account_value - before_transfer
+                    fee = transfer_amount - transferred
+
+                    if transferred > transfer_amount * 0.99:  # 1% tolerance for fees
+                        console.print(
+                            f"✅ Transfer complete. Amount: ${transferred:.2f}, Fee: ${fee:.4f}"
+                        )
+                    else:
+                        console.print(
+                            f"⚠️  Transfer amount mismatch. Expected: ${transfer_amount:.2f}, Got: ${transferred:.2f}"
+                        )
             else:
                 raise click.ClickException(f"USD transfer failed: {transfer_result}")
         except Exception as e:
             raise click.ClickException(f"Internal transfer failed: {e}")
 
-    final_hl_balance = _get_hl_usd_balance(info, address)
-    net_credited = final_hl_balance - initial_hl_balance
-
-    _render_summary(console, float(deposit_amount), net_credited, final_hl_balance)
-
-
-def _get_hl_usd_balance(info: Any, address: str) -> float:
-    """Get the USD balance from HyperLiquid"""
-    try:
-        state = info.user_state(address)
-        balances = state.get("marginSummary", {})
-        account_value = float(balances.get("accountValue", 0))
-        return account_value
-    except Exception:
-        return 0.0
-
-
-def _poll_for_hl_credit(
+    final_state = load_state_after_action(console, states, address)
+    final_hl_balance = final_state.account_value if final_state is not None else None
+
+    _render_summary(console, float(total_amount), credited, final_hl_balance)
+
+
+def _presend_reads(
+    w3: Web3,
+    production: bool,
+    usdc_contract: Any,
+    bridge_address: str,
+    signer: str,
+    amount: Decimal,
+) -> Dict[str, Any]:
+    """Read everything the deposit needs before signing in one JSON-RPC batch.
+
+    Chain id and USDC decimals never change, so they are cached per chain.
+    On the first run they are read in the batch instead. Fees come from
+    `eth_feeHistory`. The gas of a USDC transfer to the bridge does not
+    depend on the amount, so a recent estimate is reused and a new one is
+    only requested once it has expired. Without the decimals the estimate
+    transfers a single raw unit. `gas_estimate` may be an RpcError.
+    """
+    token = cached_token(production, usdc_contract.address)
+    gas_key_ = gas_key(usdc_contract, "transfer", bridge_address)
+    gas_estimate: Any = cached_gas(production, gas_key_)
+    calls: List[Tuple[str, List[Any]]] = [
+        ("eth_getBalance", [signer, "latest"]),
+        ("eth_call", [call_args(usdc_contract, "balanceOf", [signer]), "latest"]),
+        ("eth_getTransactionCount", [signer, "pending"]),
+        fee_history_call(),
+    ]
+    if token is None:
+        calls += [
+            ("eth_chainId", []),
+            ("eth_call", [call_args(usdc_contract, "decimals"), "latest"]),
+        ]
+    if gas_estimate is None:
+        raw = int(amount * Decimal(10 ** token["decimals"])) if token else 1
+        tx = call_args(usdc_contract, "transfer", [bridge_address, raw])
+        calls.append(("eth_estimateGas", [{"from": signer, **tx}]))
+
+    results = rpc_batch(w3, calls)
+    eth_balance, usdc_balance, nonce = (to_int(r) for r in results[:3])
+    fees = eip1559_fees(results[3])
+
+    if token is None:
+        token = {"chain_id": to_int(results[4]), "decimals": to_int(results[5])}
+        store_token(production, usdc_contract.address, **token)
+    if gas_estimate is None:
+        gas_estimate = results[-1]
+        if not isinstance(gas_estimate, RpcError):
+            store_gas(production, gas_key_, to_int(gas_estimate))
+
+    return {
+        "eth_balance": eth_balance,
+        "usdc_balance": usdc_balance,
+        "nonce": nonce,
+        "fees": fees,
+        "gas_estimate": gas_estimate,
+        "chain_id": token["chain_id"],
+        "decimals": token["decimals"],
+        "amount_raw": int(amount * Decimal(10 ** token["decimals"])),
+    }
+
+
+def _normalize_hash(tx_hash: str) -> str:
+    return tx_hash.lower().removeprefix("0x")
+
+
+def _match_deposit(
+    updates: List[Dict[str, Any]], tx_hash: str, amount: Decimal, since_ms: int
+) -> Dict[str, Any] | None:
+    """Find the ledger update crediting this bridge deposit.
+
+    An update whose hash is the Arbitrum transaction hash is an exact match.
+    Otherwise the first deposit of exactly `amount` recorded at or after
+    `since_ms` is taken.
+    """
+    wanted = _normalize_hash(tx_hash)
+    fallback = None
+    for update in updates:
+        delta = update.get("delta") or {}
+        if delta.get("type") != "deposit":
+            continue
+        if _normalize_hash(str(update.get("hash") or "")) == wanted:
+            return update
+        if (
+            fallback is None
+            and int(update.get("time") or 0) >= since_ms
+            and Decimal(str(delta.get("usdc") or 0)) == amount
+        ):
+            fallback = update
+    return fallback
+
+
+def _ledger_key(update: Dict[str, Any]) -> Tuple[Any, ...]:
+    delta = update.get("delta") or {}
+    return (update.get("hash"), update.get("time"), delta.get("usdc"))
+
+
+def _wait_for_hl_credits(
     console: Console,
     info: Any,
-    address: str,
-    initial_balance: float,
-    expected_amount: float,
-    max_attempts: int = 60,
-    poll_interval: float = 2.0,
-) -> bool:
-    """Poll HyperLiquid for balance credit"""
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Checking HyperLiquid balance...", total=max_attempts)
-
-        for attempt in range(max_attempts):
-            current_balance = _get_hl_usd_balance(info, address)
-            credited = current_balance - initial_balance
-
-            progress.update(task, advance=1)
-
-            if credited >= expected_amount * 0.999:
-                console.print(f"\n✅ HyperLiquid account credited: ${credited:.2f}")
-                return True
+    base_url: str,
+    deposits: List[Tuple[str, str, Decimal]],
+    since_ms: int,
+    timeout: float = CREDIT_TIMEOUT,
+) -> Dict[int, Dict[str, Any]]:
+    """Wait for the ledger updates crediting each (address, tx hash, amount).
+
+    Subscribes to `userNonFundingLedgerUpdates` for every address so a credit
+    is seen as soon as it lands (the subscription's initial snapshot covers a
+    credit that landed before it). As a fallback, and in case the websocket
+    cannot connect, the ledger of each address still pending is polled with
+    exponential backoff. A ledger update is matched to at most one deposit.
+    Returns the matched entry by index into `deposits`; deposits missing
+    from the result were not credited before the timeout.
+    """
+    found: Dict[int, Dict[str, Any]] = {}
+    claimed = set()
+    lock = threading.Lock()
+    landed = threading.Event()
+    addresses = list(dict.fromkeys(address for address, _, _ in deposits))
+
+    def record(address: str, updates: List[Dict[str, Any]]) -> None:
+        with lock:
+            for i, (owner, tx_hash, amount) in enumerate(deposits):
+                if i in found or owner != address:
+                    continue
+                unclaimed = [u for u in updates if _ledger_key(u) not in claimed]
+                entry = _match_deposit(unclaimed, tx_hash, amount, since_ms)
+                if entry is not None:
+                    found[i] = entry
+                    claimed.add(_ledger_key(entry))
+            if len(found) == len(deposits):
+                landed.set()
+
+    def pending(address: str) -> bool:
+        with lock:
+            return any(
+                i not in found and owner == address
+                for i, (owner, _, _) in enumerate(deposits)
+            )
+
+    def on_updates_for(address: str):
+        def on_updates(msg: Dict[str, Any]) -> None:
+            data = msg.get("data") or {}
+            record(address, data.get("nonFundingLedgerUpdates") or [])
+
+        return on_updates
+
+    ws = None
+    try:
+        ws = WebsocketManager(base_url)
+        ws.daemon = True
+        ws.start()
+        for address in addresses:
+            ws.subscribe(
+                {"type": "userNonFundingLedgerUpdates", "user": address},
+                on_updates_for(address),
+            )
+    except Exception:
+        ws = None
 
-            time.sleep(poll_interval)
+    def describe() -> str:
+        if len(deposits) == 1:
+            return "Waiting for the HyperLiquid ledger credit..."
+        return (
+            f"Waiting for HyperLiquid ledger credits ({len(found)}/{len(deposits)})..."
+        )
 
-    return False
+    deadline = time.monotonic() + timeout
+    delay = MIN_POLL_INTERVAL
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            task = progress.add_task(describe(), total=None)
+            while not landed.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if landed.wait(min(delay, remaining)):
+                    break
+                for address in addresses:
+                    if not pending(address):
+                        continue
+                    try:
+                        updates = info.user_non_funding_ledger_updates(
+                            address, since_ms
+                        )
+                    except Exception:
+                        updates = []
+                    record(address, updates or [])
+                progress.update(task, description=describe())
+                delay = min(delay * 2, MAX_POLL_INTERVAL)
+    finally:
+        if ws is not None:
+            ws.stop()
+
+    with lock:
+        return dict(found)
 
 
 def _render_balances(
@@ -238,9 +498,10 @@ def _render_balances(
 
 
 def _render_summary(
-    console: Console, requested: float, credited: float, final_balance: float
+    console: Console, requested: float, credited: float, final_balance: float | None
 ) -> None:
-    """Render the deposit summary"""
+    """Render the deposit summary; `final_balance` is None if it could not
+    be fetched"""
     table = Table(
         show_header=False,
         box=box.DOUBLE,
@@ -253,7 +514,8 @@ def _render_summary(
     table.add_column("Value", justify="right")
     table.add_row("Requested", f"${requested:.2f}")
     table.add_row("Credited", f"${credited:.2f}")
-    table.add_row("Final Balance", f"${final_balance:.2f}")
+    if final_balance is not None:
+        table.add_row("Final Balance", f"${final_balance:.2f}")
 
     if credited >= requested * 0.99:
         status = Text("✅ SUCCESS", style="bold green")
@@ -0,0 +1,376 @@
+from __future__ import annotations
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Tuple
+import os
+import time
+import click
+import eth_account
+from eth_account.signers.local import LocalAccount
+from rich import box
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from web3 import Web3
+from .constants import (
+    BRIDGE2_ABI,
+    BRIDGE2_PROD_ADDR,
+    BRIDGE2_TEST_ADDR,
+    ERC20_ABI,
+    PERMIT_ABI,
+    USDC_ARB_PROD_ADDR,
+    USDC_ARB_TEST_ADDR,
+    USDC_PERMIT_PROD_DOMAIN,
+    USDC_PERMIT_TEST_DOMAIN,
+)
+from .deposit import (
+    CLOCK_SKEW_MS,
+    MIN_DEPOSIT_USDC,
+    RECEIPT_TIMEOUT,
+    _wait_for_hl_credits,
+)
+from .evm import (
+    RpcError,
+    call_args,
+    cached_token,
+    rpc_batch,
+    store_token,
+    to_int,
+)
+from .fees import eip1559_fees, fee_history_call, gas_limit
+from .rpc_pool import pool_provider
+from .confirmations import DEFAULT_CONFIRMATIONS, ConfirmationTracker, arb_ws_url
+from .setup import setup
+
+# Permits must outlive gas estimation and a slow inclusion of the batch
+PERMIT_TTL_S = 3600
+
+PERMIT_TYPES = {
+    "Permit": [
+        {"name": "owner", "type": "address"},
+        {"name": "spender", "type": "address"},
+        {"name": "value", "type": "uint256"},
+        {"name": "nonce", "type": "uint256"},
+        {"name": "deadline", "type": "uint256"},
+    ]
+}
+
+
+def run(
+    production: bool,
+    private_key: str | None,
+    account_address: str | None,
+    path: str,
+    confirmations: int = DEFAULT_CONFIRMATIONS,
+) -> None:
+    """Deposit USDC for several accounts in one Bridge2 transaction.
+
+    Every depositor signs an EIP-2612 permit for its amount; the signer of
+    the session only submits `batchedDepositWithPermit` and pays the gas.
+    Each account is credited on HyperCore with its own deposit.
+    """
+    deposits = load_batch(path)
+    info, _, _, account = setup(production, private_key, account_address)
+    console = Console()
+
+    w3 = Web3(pool_provider("arb", production))
+    tx_hash, since_ms = submit_batch(
+        console, w3, production, account, deposits, confirmations
+    )
+
+    expected: List[Tuple[str, str, Decimal]] = [
+        (d.address, tx_hash, amount) for d, amount in deposits
+    ]
+    console.print("\n⏳ Waiting for HyperLiquid credits...")
+    credits = _wait_for_hl_credits(console, info, info.base_url, expected, since_ms)
+    _render_credits(console, expected, credits)
+
+    missing = len(expected) - len(credits)
+    if missing:
+        raise click.ClickException(
+            f"Timeout waiting for {missing} of {len(expected)} HyperLiquid credits"
+        )
+
+
+def load_batch(path: str) -> List[Tuple[LocalAccount, Decimal]]:
+    """Parse a batch file with one `<private key>,<amount>` per line.
+
+    - Blank lines and lines starting with `#` are skipped.
+    - A key written as `$NAME` is read from the environment variable NAME,
+      so keys do not have to be stored in the file.
+    - Each signer may appear once, since permits consume sequential nonces.
+    """
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        raise click.ClickException(f"Cannot read batch file: {e}")
+
+    deposits: List[Tuple[LocalAccount, Decimal]] = []
+    seen = set()
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) != 2:
+            raise click.ClickException(
+                f"{path}:{lineno}: expected '<private key>,<amount>'"
+            )
+        key, amount_str = fields
+        if key.startswith("$"):
+            env_key = os.getenv(key[1:])
+            if not env_key:
+                raise click.ClickException(f"{path}:{lineno}: {key} is not set")
+            key = env_key
+        try:
+            depositor = eth_account.Account.from_key(key)  # type: ignore[attr-defined]
+        except Exception:
+            raise click.ClickException(f"{path}:{lineno}: invalid private key")
+        try:
+            amount = Decimal(amount_str)
+        except InvalidOperation:
+            raise click.ClickException(f"{path}:{lineno}: invalid amount {amount_str}")
+        if amount < MIN_DEPOSIT_USDC:
+            raise click.ClickException(
+                f"{path}:{lineno}: minimum deposit amount is {MIN_DEPOSIT_USDC} USDC"
+            )
+        if depositor.address in seen:
+            raise click.ClickException(
+                f"{path}:{lineno}: {depositor.address} appears more than once"
+            )
+        seen.add(depositor.address)
+        deposits.append((depositor, amount))
+
+    if not deposits:
+        raise click.ClickException(f"No deposits in {path}")
+    return deposits
+
+
+def submit_batch(
+    console: Console,
+    w3: Web3,
+    production: bool,
+    submitter: LocalAccount,
+    deposits: List[Tuple[LocalAccount, Decimal]],
+    confirmations: int = DEFAULT_CONFIRMATIONS,
+) -> Tuple[str, int]:
+    """Sign a permit per deposit and send them as one batched deposit.
+
+    Returns the transaction hash and the time (ms) before which no ledger
+    update can be one of its credits.
+    """
+    usdc = w3.eth.contract(
+        address=Web3.to_checksum_address(
+            USDC_ARB_PROD_ADDR if production else USDC_ARB_TEST_ADDR
+        ),
+        abi=ERC20_ABI + PERMIT_ABI,
+    )
+    bridge = w3.eth.contract(
+        address=Web3.to_checksum_address(
+            BRIDGE2_PROD_ADDR if production else BRIDGE2_TEST_ADDR
+        ),
+        abi=BRIDGE2_ABI,
+    )
+
+    try:
+        reads = _batch_reads(
+            w3, production, usdc, submitter.address, [d.address for d, _ in deposits]
+        )
+    except Exception as e:
+        raise click.ClickException(f"Failed to read from Arbitrum RPC: {e}")
+
+    scale = Decimal(10 ** reads["decimals"])
+    raw_amounts = [int(amount * scale) for _, amount in deposits]
+    _render_batch(console, deposits, [Decimal(b) / scale for b in reads["balances"]])
+
+    short = [
+        f"{depositor.address} has {Decimal(balance) / scale:.6f}, needs {amount:.6f}"
+        for (depositor, amount), balance in zip(deposits, reads["balances"])
+        if balance < int(amount * scale)
+    ]
+    if short:
+        raise click.ClickException(
+            "Insufficient USDC balance:\n  - " + "\n  - ".join(short)
+        )
+    if reads["eth_balance"] < w3.to_wei(0.001, "ether"):
+        console.print(Text("⚠️  Warning: Low ETH balance for gas fees", style="yellow"))
+
+    name, version = USDC_PERMIT_PROD_DOMAIN if production else USDC_PERMIT_TEST_DOMAIN
+    domain = {
+        "name": name,
+        "version": version,
+        "chainId": reads["chain_id"],
+        "verifyingContract": usdc.address,
+    }
+    deadline = int(time.time()) + PERMIT_TTL_S
+    permits = [
+        sign_permit(depositor, domain, bridge.address, raw, nonce, deadline)
+        for (depositor, _), raw, nonce in zip(
+            deposits, raw_amounts, reads["permit_nonces"]
+        )
+    ]
+
+    call = call_args(bridge, "batchedDepositWithPermit", [permits])
+    estimate = ("eth_estimateGas", [{"from": submitter.address, **call}])
+    try:
+        gas_estimate = to_int(rpc_batch(w3, [estimate])[0])
+    except RpcError as e:
+        raise click.ClickException(f"Gas estimation failed: {e}")
+
+    tx = bridge.functions.batchedDepositWithPermit(permits).build_transaction(
+        {
+            "from": submitter.address,
+            "nonce": reads["nonce"],
+            "type": 2,
+            **reads["fees"],
+            "gas": gas_limit(gas_estimate),
+            "chainId": reads["chain_id"],
+        }
+    )
+    signed_tx = w3.eth.account.sign_transaction(tx, private_key=submitter.key.hex())
+
+    since_ms = int(time.time() * 1000) - CLOCK_SKEW_MS
+    try:
+        tx_hash = Web3.to_hex(w3.eth.send_raw_transaction(signed_tx.raw_transaction))
+    except Exception as e:
+        raise click.ClickException(f"Transaction failed: {e}")
+    console.print(f"\n✅ Batch transaction sent: {tx_hash}")
+
+    tracker = ConfirmationTracker(w3, confirmations, arb_ws_url(production))
+    receipt = tracker.wait([tx_hash], RECEIPT_TIMEOUT)[tx_hash]
+    if isinstance(receipt, Exception):
+        raise click.ClickException(f"Transaction confirmation failed: {receipt}")
+    if receipt["status"] != 1:
+        raise click.ClickException("Transaction failed on chain")
+    console.print(
+        f"✅ Confirmed in block {receipt['blockNumber']} "
+        f"({len(deposits)} deposits, {receipt['gasUsed']:,} gas)"
+    )
+    return tx_hash, since_ms
+
+
+def sign_permit(
+    depositor: LocalAccount,
+    domain: Dict[str, Any],
+    spender: str,
+    value: int,
+    nonce: int,
+    deadline: int,
+) -> Tuple[str, int, int, Tuple[int, int, int]]:
+    """Sign an EIP-2612 permit as a Bridge2 `DepositWithPermit` tuple."""
+    signed = depositor.sign_typed_data(
+        domain,
+        PERMIT_TYPES,
+        {
+            "owner": depositor.address,
+            "spender": spender,
+            "value": value,
+            "nonce": nonce,
+            "deadline": deadline,
+        },
+    )
+    return (depositor.address, value, deadline, (signed.r, signed.s, signed.v))
+
+
+def _batch_reads(
+    w3: Web3,
+    production: bool,
+    usdc: Any,
+    submitter: str,
+    owners: List[str],
+) -> Dict[str, Any]:
+    """Read the submitter's nonce, balance and fees and each owner's USDC balance and
+    permit nonce in one JSON-RPC batch (chain id and decimals are cached)."""
+    token = cached_token(production, usdc.address)
+    calls: List[Tuple[str, List[Any]]] = [
+        ("eth_getBalance", [submitter, "latest"]),
+        ("eth_getTransactionCount", [submitter, "pending"]),
+        fee_history_call(),
+    ]
+    for owner in owners:
+        calls += [
+            ("eth_call", [call_args(usdc, "balanceOf", [owner]), "latest"]),
+            ("eth_call", [call_args(usdc, "nonces", [owner]), "latest"]),
+        ]
+    if token is None:
+        calls += [
+            ("eth_chainId", []),
+            ("eth_call", [call_args(usdc, "decimals"), "latest"]),
+        ]
+
+    responses = rpc_batch(w3, calls)
+    eth_balance, nonce = (to_int(r) for r in responses[:2])
+    fees = eip1559_fees(responses[2])
+    results = [to_int(r) for r in responses[3:]]
+    per_owner = results[: 2 * len(owners)]
+    if token is None:
+        token = {"chain_id": results[-2], "decimals": results[-1]}
+        store_token(production, usdc.address, **token)
+
+    return {
+        "eth_balance": eth_balance,
+        "nonce": nonce,
+        "fees": fees,
+        "balances": per_owner[0::2],
+        "permit_nonces": per_owner[1::2],
+        "chain_id": token["chain_id"],
+        "decimals": token["decimals"],
+    }
+
+
+def _render_batch(
+    console: Console,
+    deposits: List[Tuple[LocalAccount, Decimal]],
+    balances: List[Decimal],
+) -> None:
+    """Render the deposits about to be batched"""
+    table = Table(
+        box=box.ROUNDED,
+        title="Batched Deposits",
+        title_style="bold bright_cyan",
+        title_justify="left",
+    )
+    table.add_column("Depositor", style="bold cyan", no_wrap=True)
+    table.add_column("Amount", justify="right")
+    table.add_column("Arbitrum USDC", justify="right")
+    for (depositor, amount), balance in zip(deposits, balances):
+        table.add_row(depositor.address, f"{amount:.6f}", f"{balance:.6f}")
+    table.add_section()
+    table.add_row(
+        "Total", f"{sum((amount for _, amount in deposits), Decimal(0)):.6f}", ""
+    )
+    console.print(table)
+
+
+def _render_credits(
+    console: Console,
+    expected: List[Tuple[str, str, Decimal]],
+    credits: Dict[int, Dict[str, Any]],
+) -> None:
+    """Render the HyperCore credit of each deposit"""
+    table = Table(
+        box=box.ROUNDED,
+        title="Deposit Credits",
+        title_style="bold bright_green",
+        title_justify="left",
+    )
+    table.add_column("Account", style="bold cyan", no_wrap=True)
+    table.add_column("Requested", justify="right")
+    table.add_column("Credited", justify="right")
+    table.add_column("Status")
+    for i, (address, _, amount) in enumerate(expected):
+        entry = credits.get(i)
+        if entry is None:
+            table.add_row(
+                address, f"${amount:.2f}", "-", Text("⏳ PENDING", style="yellow")
+            )
+        else:
+            credited = Decimal(str(entry["delta"]["usdc"]))
+            table.add_row(
+                address,
+                f"${amount:.2f}",
+                f"${credited:.2f}",
+                Text("✅ CREDITED", style="bold green"),
+            )
+    console.print("\n")
+    console.print(table)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+import json
+import os
+import time
+from web3 import Web3
+from web3.types import RPCEndpoint
+from .cache import cache_dir
+
+
+class RpcError(Exception):
+    """A JSON-RPC error, either for the whole batch or for one of its calls."""
+
+
+def rpc_batch(w3: Web3, calls: List[Tuple[str, List[Any]]]) -> List[Any]:
+    """Send `calls` ([(method, params), ...]) as a single JSON-RPC batch.
+
+    Returns the raw results in call order; a call that failed is returned as
+    an RpcError instance rather than raised, so callers can decide which
+    failures matter. Raises RpcError if the batch as a whole is rejected.
+    """
+    if not calls:
+        return []
+    # Only JSON-RPC providers (HTTPProvider and friends) support batching
+    provider: Any = w3.provider
+    responses = provider.make_batch_request(
+        [(RPCEndpoint(method), params) for method, params in calls]
+    )
+    if not isinstance(responses, list):
+        error = responses.get("error") or responses
+        raise RpcError(f"Batch request failed: {error}")
+    results: List[Any] = []
+    for response in responses:
+        error = response.get("error")
+        if error:
+            message = error.get("message") if isinstance(error, dict) else error
+            results.append(RpcError(str(message)))
+        else:
+            results.append(response.get("result"))
+    return results
+
+
+def to_int(result: Any) -> int:
+    """Decode a hex quantity or single-word eth_call result, raising RPC errors."""
+    if isinstance(result, Exception):
+        raise result
+    return int(result, 16) if isinstance(result, str) else int(result)
+
+
+def call_args(contract: Any, fn: str, args: List[Any] | None = None) -> Dict[str, Any]:
+    """eth_call / eth_estimateGas transaction object for a contract function."""
+    return {"to": contract.address, "data": contract.encode_abi(fn, args=args or [])}
+
+
+# Cached gas estimates are refreshed this often: on Arbitrum they include
+# the L1 data cost, which moves with the L1 base fee
+GAS_ESTIMATE_TTL_S = 600
+
+
+def _chain_cache_path(production: bool):
+    return cache_dir(production) / "chain.json"
+
+
+def cached_token(production: bool, token: str) -> Dict[str, int] | None:
+    """Immutable facts about `token` on this environment's chain (chain id,
+    decimals), or None if they have not been read yet."""
+    try:
+        data = json.loads(_chain_cache_path(production).read_text())
+    except (OSError, ValueError):
+        return None
+    entry = data.get(token.lower())
+    if isinstance(entry, dict) and {"chain_id", "decimals"} <= entry.keys():
+        return entry
+    return None
+
+
+def _update_chain_cache(production: bool, key: str, value: Any) -> None:
+    path = _chain_cache_path(production)
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        data = {}
+    data[key] = value
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+def store_token(production: bool, token: str, chain_id: int, decimals: int) -> None:
+    _update_chain_cache(
+        production, token.lower(), {"chain_id": chain_id, "decimals": decimals}
+    )
+
+
+def gas_key(contract: Any, fn: str, to: str) -> str:
+    """Cache key for the gas of calling `fn` on `contract` towards `to`
+    (e.g. an ERC20 transfer to the bridge), whatever the amount."""
+    return f"gas:{contract.address}:{fn}:{to}".lower()
+
+
+def cached_gas(
+    production: bool, key: str, ttl_s: float = GAS_ESTIMATE_TTL_S
+) -> int | None:
+    """A gas estimate stored less than `ttl_s` ago, else None."""
+    try:
+        entry = json.loads(_chain_cache_path(production).read_text()).get(key)
+    except (OSError, ValueError):
+        return None
+    if isinstance(entry, dict) and time.time() - entry.get("time", 0) < ttl_s:
+        return int(entry["gas"])
+    return None
+
+
+def store_gas(production: bool, key: str, gas: int) -> None:
+    _update_chain_cache(production, key, {"gas": gas, "time": time.time()})
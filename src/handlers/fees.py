@@ -0,0 +1,42 @@
+from __future__ import annotations
+from statistics import median
+from typing import Any, Dict, List, Tuple
+
+# Blocks of fee history behind each suggestion, and the tip percentile
+FEE_HISTORY_BLOCKS = 10
+PRIORITY_PERCENTILE = 50
+
+# maxFeePerGas allows the base fee to double before the transaction is
+# priced out; only the actual base fee plus the tip is charged
+BASE_FEE_HEADROOM = 2
+
+# Gas limit padding over an estimate (unused gas is not charged)
+GAS_BUFFER = 1.2
+
+
+def fee_history_call(blocks: int = FEE_HISTORY_BLOCKS) -> Tuple[str, List[Any]]:
+    """`eth_feeHistory` request to include in a JSON-RPC batch."""
+    return ("eth_feeHistory", [hex(blocks), "latest", [PRIORITY_PERCENTILE]])
+
+
+def eip1559_fees(history: Any) -> Dict[str, int]:
+    """maxFeePerGas / maxPriorityFeePerGas from an `eth_feeHistory` result.
+
+    `baseFeePerGas` has one entry more than the blocks returned: the base
+    fee of the next block, which is what the transaction will pay. The tip
+    is the median of the recent blocks' reward percentile (Arbitrum's is 0).
+    """
+    if isinstance(history, Exception):
+        raise history
+    base_fees = [int(fee, 16) for fee in history["baseFeePerGas"]]
+    rewards = [int(block[0], 16) for block in history.get("reward") or [] if block]
+    tip = int(median(rewards)) if rewards else 0
+    next_base = base_fees[-1]
+    return {
+        "maxFeePerGas": BASE_FEE_HEADROOM * max(next_base, max(base_fees)) + tip,
+        "maxPriorityFeePerGas": tip,
+    }
+
+
+def gas_limit(estimate: int) -> int:
+    return int(estimate * GAS_BUFFER)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Dict
+import time
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from rich import box
+from .pnl import BUCKETS_MS, funding_arrays
+from .setup import setup
+from .status import _colorize_number
+from .store import OrderStore
+
+# Coins beyond this many (by absolute funding) are folded into "Other"
+MAX_DAY_COLUMNS = 6
+
+
+def funding_by_day(
+    funding: Dict[str, np.ndarray], day_ms: int = BUCKETS_MS["day"]
+) -> Dict[str, np.ndarray]:
+    """Pivot funding payments into a (day, coin) grid of USDC totals.
+
+    Returns the day start times, the coin order (largest absolute total
+    first), the grid, and per-coin totals and payment counts in that order.
+    """
+    day_idx = funding["time"] // day_ms
+    first = int(day_idx.min()) if day_idx.size else 0
+    n_days = int(day_idx.max()) - first + 1 if day_idx.size else 0
+    n_coins = funding["coins"].size
+
+    grid = np.zeros((n_days, n_coins))
+    np.add.at(grid, (day_idx - first, funding["coin_idx"]), funding["usdc"])
+    counts = np.bincount(funding["coin_idx"], minlength=n_coins)
+
+    totals = grid.sum(axis=0)
+    order = np.argsort(-np.abs(totals), kind="stable")
+    days = (np.arange(n_days) + first) * day_ms
+    # Drop days without any payment so quiet stretches don't pad the report
+    active = np.flatnonzero(np.bincount(day_idx - first, minlength=n_days))
+    return {
+        "days": days[active],
+        "coins": funding["coins"][order],
+        "grid": grid[active][:, order],
+        "totals": totals[order],
+        "counts": counts[order],
+    }
+
+
+def run(
+    production: bool,
+    private_key: str | None,
+    account_address: str | None,
+    days: int,
+    offline: bool,
+) -> None:
+    """Sync funding payments into the local store and report them by coin and day."""
+    info, _exchange, address, _account = setup(production, private_key, account_address)
+
+    try:
+        store = OrderStore.open(production)
+    except Exception as e:
+        raise click.ClickException(f"Failed to open the local order store: {e}")
+
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - days * BUCKETS_MS["day"]
+
+    if not offline:
+        try:
+            store.sync_funding(info, address, start_ms, now_ms)
+        except Exception as e:
+            raise click.ClickException(f"Failed to sync funding history: {e}")
+
+    funding = funding_arrays(store.funding_rows(address, start_ms, now_ms).fetchall())
+
+    console = Console()
+    console.print("")
+    if not funding["time"].size:
+        console.print(Text("No funding payments in the selected period", style="dim"))
+        return
+    report = funding_by_day(funding)
+    _render_by_coin(console, report)
+    console.print("")
+    _render_by_day(console, report)
+
+
+def _render_by_coin(console: Console, report: Dict[str, np.ndarray]) -> None:
+    table = Table(
+        title="Funding by Coin",
+        title_style="bold bright_cyan",
+        header_style="cyan",
+        border_style="cyan",
+        box=box.ROUNDED,
+        expand=False,
+    )
+    table.add_column("Coin", style="bold")
+    table.add_column("Payments", justify="right")
+    table.add_column("Funding", justify="right")
+
+    for coin, count, total in zip(report["coins"], report["counts"], report["totals"]):
+        table.add_row(str(coin), str(int(count)), _colorize_number(round(total, 2)))
+
+    table.add_section()
+    table.add_row(
+        "Total",
+        str(int(report["counts"].sum())),
+        _colorize_number(round(float(report["totals"].sum()), 2)),
+    )
+    console.print(table)
+
+
+def _render_by_day(console: Console, report: Dict[str, np.ndarray]) -> None:
+    table = Table(
+        title="Funding by Day",
+        title_style="bold bright_yellow",
+        header_style="yellow",
+        border_style="yellow",
+        box=box.ROUNDED,
+        expand=False,
+    )
+    coins = report["coins"]
+    grid = report["grid"]
+    shown = min(coins.size, MAX_DAY_COLUMNS)
+    if coins.size > shown + 1:
+        columns = [str(c) for c in coins[:shown]] + ["Other"]
+        grid = np.column_stack([grid[:, :shown], grid[:, shown:].sum(axis=1)])
+    else:
+        columns = [str(c) for c in coins]
+
+    table.add_column("Day (UTC)")
+    for name in columns:
+        table.add_column(name, justify="right")
+    table.add_column("Total", justify="right")
+
+    for day, row in zip(report["days"], grid):
+        label = datetime.fromtimestamp(int(day) / 1000, tz=timezone.utc).strftime(
+            "%Y-%m-%d"
+        )
+        table.add_row(
+            label,
+            *[_colorize_number(round(v, 2)) if v else "-" for v in row],
+            _colorize_number(round(float(row.sum()), 2)),
+        )
+
+    console.print(table)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Sequence
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from .account_state import AccountStateService, load_state
+from .actions import (
+    MAX_IN_FLIGHT,
+    ActionNonces,
+    ActionQueue,
+    action_error,
+    update_isolated_margin,
+    update_leverage,
+)
+from .setup import setup
+from .status import _normalize_positions
+
+# Isolated margin adjustments are denominated in micro-USDC
+USD_DECIMALS = 6
+
+# `user_state` only has the leverage of coins with a position; up to this
+# many others are looked up with `activeAssetData` (weight 20 each, where
+# an update weighs 1) so unchanged ones are skipped, and the rest are
+# resubmitted
+SETTING_LOOKUPS_MAX = 20
+
+
+def _describe(setting: Dict[str, Any] | None) -> str:
+    if not setting:
+        return "-"
+    return f"{setting['value']}x {setting['type']}"
+
+
+def plan_updates(
+    universe: Sequence[Mapping[str, Any]],
+    positions: List[Dict[str, Any]],
+    coins: Sequence[str],
+    leverage: int | None,
+    is_cross: bool,
+    margin: Decimal | None,
+    settings: Mapping[str, Dict[str, Any]] | None = None,
+) -> List[Dict[str, Any]]:
+    """Work out the actions needed per coin (every listed coin when `coins`
+    is empty).
+
+    Returns one row per coin: {"coin", "asset", "current", "target",
+    "actions", "note"}, where actions are ("leverage", is_cross, value) and
+    ("margin", ntli). The current leverage comes from the positions, or
+    from `settings` for coins without one; coins already at the target are
+    skipped, and coins whose setting is unknown are updated with the note
+    "unknown, resubmitted". Leverage above an asset's maximum is capped.
+    """
+    by_name = {
+        asset["name"].upper(): (i, asset)
+        for i, asset in enumerate(universe)
+        if not asset.get("isDelisted")
+    }
+    current = {
+        p["coin"]: p.get("leverage")
+        for p in positions
+        if isinstance(p.get("leverage"), dict)
+    }
+
+    if coins:
+        unknown = [coin for coin in coins if coin.upper() not in by_name]
+        if unknown:
+            raise click.ClickException(f"Unknown coin(s): {', '.join(unknown)}")
+        selected = [by_name[coin.upper()] for coin in dict.fromkeys(coins)]
+    else:
+        selected = list(by_name.values())
+
+    rows: List[Dict[str, Any]] = []
+    for asset_id, asset in selected:
+        name = asset["name"]
+        setting = current.get(name) or (settings or {}).get(name)
+        row: Dict[str, Any] = {
+            "coin": name,
+            "asset": asset_id,
+            "current": setting,
+            "target": None,
+            "actions": [],
+            "note": "",
+        }
+        if leverage is not None:
+            max_leverage = int(asset.get("maxLeverage") or leverage)
+            value = min(leverage, max_leverage)
+            if is_cross and asset.get("onlyIsolated"):
+                row["note"] = "isolated only"
+            else:
+                row["target"] = {
+                    "type": "cross" if is_cross else "isolated",
+                    "value": value,
+                }
+                if value < leverage:
+                    row["note"] = f"capped at {max_leverage}x"
+                if setting and _describe(setting) == _describe(row["target"]):
+                    row["note"] = "unchanged"
+                else:
+                    row["actions"].append(("leverage", is_cross, value))
+                    if not setting:
+                        row["note"] = ", ".join(
+                            filter(None, [row["note"], "unknown, resubmitted"])
+                        )
+        if margin is not None:
+            target_type = (row["target"] or setting or {}).get("type")
+            if name not in current or target_type != "isolated":
+                row["note"] = row["note"] or "no isolated position"
+            else:
+                row["actions"].append(("margin", int(margin * 10**USD_DECIMALS)))
+        rows.append(row)
+    return rows
+
+
+def run(
+    production: bool,
+    private_key: str | None,
+    account_address: str | None,
+    coins: Sequence[str],
+    all_coins: bool = False,
+    leverage: int | None = None,
+    is_cross: bool = True,
+    margin: str | None = None,
+) -> None:
+    """Set cross/isolated leverage and adjust isolated margin.
+
+    Applies to the given coins, or to every listed coin with `all_coins`.
+    Without `leverage` or `margin` the current settings are only shown.
+    Only the coins that need a change are updated, concurrently within the
+    action rate budget.
+    """
+    if bool(coins) == all_coins:
+        raise click.ClickException("Give one or more coins, or --all")
+    margin_amount = None
+    if margin is not None:
+        try:
+            margin_amount = Decimal(margin)
+        except Exception as e:
+            raise click.ClickException(f"Invalid margin amount: {e}")
+        if margin_amount == 0 or margin_amount != margin_amount.quantize(
+            Decimal(10) ** -USD_DECIMALS
+        ):
+            raise click.ClickException(
+                f"Margin must be a non-zero amount with at most {USD_DECIMALS} decimals"
+            )
+
+    info, exchange, address, _account = setup(production, private_key, account_address)
+    console = Console()
+
+    try:
+        universe = info.meta()["universe"]
+    except Exception as e:
+        raise click.ClickException(f"Failed to fetch perp metadata: {e}")
+    state = load_state(AccountStateService(info), address)
+    positions = _normalize_positions(state.asset_positions)
+
+    rows = plan_updates(universe, positions, coins, leverage, is_cross, margin_amount)
+    unknown = [
+        row["coin"]
+        for row in rows
+        if row["current"] is None and any(a[0] == "leverage" for a in row["actions"])
+    ]
+    if unknown:
+        settings = _leverage_settings(info, address, unknown[:SETTING_LOOKUPS_MAX])
+        rows = plan_updates(
+            universe, positions, coins, leverage, is_cross, margin_amount, settings
+        )
+    pending = [(row, action) for row in rows for action in row["actions"]]
+    if not pending:
+        _render_leverage(console, rows, {})
+        return
+
+    nonces = ActionNonces()
+
+    def submit(item: Any) -> Any:
+        row, action = item
+        if action[0] == "leverage":
+            _, cross, value = action
+            return update_leverage(exchange, nonces.next(), row["asset"], cross, value)
+        return update_isolated_margin(exchange, nonces.next(), row["asset"], action[1])
+
+    # Margin moves only after the leverage (and so margin mode) has landed
+    queue = ActionQueue()
+    changes = [item for item in pending if item[1][0] == "leverage"]
+    margins = [item for item in pending if item[1][0] == "margin"]
+    results = queue.run(submit, changes) + queue.run(submit, margins)
+    errors: Dict[str, List[str]] = {}
+    for (row, _), result in zip(changes + margins, results):
+        error = action_error(result)
+        errors.setdefault(row["coin"], [])
+        if error is not None:
+            errors[row["coin"]].append(error)
+    _render_leverage(console, rows, errors)
+
+    failed = sum(bool(e) for e in errors.values())
+    if failed:
+        raise click.ClickException(f"{failed} of {len(errors)} coins failed to update")
+
+
+def _leverage_settings(
+    info: Any, address: str, coins: Sequence[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Leverage settings of `coins` from `activeAssetData`, read
+    concurrently; coins whose read fails are left out."""
+
+    def read(coin: str) -> Dict[str, Any] | None:
+        try:
+            data = info.post(
+                "/info", {"type": "activeAssetData", "user": address, "coin": coin}
+            )
+        except Exception:
+            return None
+        setting = data.get("leverage") if isinstance(data, dict) else None
+        return setting if isinstance(setting, dict) else None
+
+    with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as pool:
+        found = dict(zip(coins, pool.map(read, coins)))
+    return {coin: setting for coin, setting in found.items() if setting}
+
+
+def _render_leverage(
+    console: Console, rows: List[Dict[str, Any]], errors: Dict[str, List[str]]
+) -> None:
+    """Render current and target settings with the outcome per coin"""
+    table = Table(
+        box=box.ROUNDED,
+        title="Leverage",
+        title_style="bold bright_cyan",
+        title_justify="left",
+    )
+    table.add_column("Coin", style="bold cyan", no_wrap=True)
+    table.add_column("Current")
+    table.add_column("Target")
+    table.add_column("Margin", justify="right")
+    table.add_column("Status")
+    for row in rows:
+        margin = next(
+            (a[1] / 10**USD_DECIMALS for a in row["actions"] if a[0] == "margin"),
+            None,
+        )
+        if row["coin"] in errors and errors[row["coin"]]:
+            status = Text(f"❌ {'; '.join(errors[row['coin']])}", style="red")
+        elif row["coin"] in errors:
+            status = Text("✅ UPDATED", style="bold green")
+            if row["note"]:
+                status.append(f" ({row['note']})", style="dim")
+        else:
+            status = Text(row["note"] or "-", style="dim")
+        table.add_row(
+            row["coin"],
+            _describe(row["current"]),
+            _describe(row["target"]),
+            f"{margin:+.2f}" if margin is not None else "-",
+            status,
+        )
+    console.print(table)
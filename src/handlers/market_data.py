@@ -0,0 +1,261 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+import mmap
+import os
+import time
+import click
+import numpy as np
+from hyperliquid.api import API
+from hyperliquid.websocket_manager import WebsocketManager
+from rich.console import Console
+from rich.text import Text
+from .cache import cache_dir
+from .setup import api_url
+
+MAGIC = b"HLMD"
+VERSION = 2
+
+# Fixed layout: a 64-byte header followed by one 80-byte slot per perp asset,
+# in meta universe order (slot i is asset index i).
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", "<u4"),
+        ("n_slots", "<u4"),
+        ("pid", "<u4"),
+        ("heartbeat_ms", "<i8"),
+        ("_pad", "V40"),
+    ]
+)
+SLOT_DTYPE = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("ts_ms", "<i8"),
+        ("mid", "<f8"),
+        ("mark", "<f8"),
+        ("oracle", "<f8"),
+        ("funding", "<f8"),
+        ("bid", "<f8"),
+        ("ask", "<f8"),
+        ("name", "S16"),
+    ]
+)
+
+# Readers treat the segment as dead when the feeder has been silent this long
+MAX_AGE_MS = 10_000
+
+_PRICE_FIELDS = ("mid", "mark", "oracle", "funding", "bid", "ask")
+
+
+def segment_path(production: bool) -> Path:
+    return cache_dir(production) / "market.mmap"
+
+
+def _segment_size(n_slots: int) -> int:
+    return HEADER_DTYPE.itemsize + n_slots * SLOT_DTYPE.itemsize
+
+
+class MarketDataWriter:
+    """Single writer of the shared market data segment.
+
+    Each slot is guarded by a sequence lock: `seq` is odd while the slot is
+    being written, so readers can detect and retry torn reads without any
+    cross-process locking.
+    """
+
+    def __init__(self, path: Union[str, Path], names: List[str]):
+        self.path = Path(path)
+        self.index = {name: i for i, name in enumerate(names)}
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._fd = fd
+        os.ftruncate(fd, _segment_size(len(names)))
+        self._mmap = mmap.mmap(fd, _segment_size(len(names)))
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=self._mmap)
+        self.slots = np.ndarray(
+            (len(names),), SLOT_DTYPE, buffer=self._mmap, offset=HEADER_DTYPE.itemsize
+        )
+        self.slots[:] = np.zeros(len(names), SLOT_DTYPE)
+        for field in _PRICE_FIELDS:
+            self.slots[field] = np.nan
+        self.slots["name"] = [n.encode()[:16] for n in names]
+        self.header["version"] = VERSION
+        self.header["n_slots"] = len(names)
+        self.header["pid"] = os.getpid()
+        self.header["heartbeat_ms"] = int(time.time() * 1000)
+        # Publish the magic last so readers never see a half-initialised header
+        self.header["magic"] = MAGIC
+        self.updates = 0
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self) -> None:
+        self.header["heartbeat_ms"] = 0
+        self._mmap.flush()
+        self._mmap.close()
+        os.close(self._fd)
+
+    def write(self, coin: str, ts_ms: int, **values: float) -> bool:
+        i = self.index.get(coin)
+        if i is None:
+            return False
+        seq = self.slots["seq"]
+        seq[i] += 1
+        for field, value in values.items():
+            self.slots[field][i] = value
+        self.slots["ts_ms"][i] = ts_ms
+        seq[i] += 1
+        self.header["heartbeat_ms"] = ts_ms
+        self.updates += 1
+        return True
+
+    def on_all_mids(self, msg: Dict[str, Any]) -> None:
+        now = int(time.time() * 1000)
+        for coin, px in ((msg.get("data") or {}).get("mids") or {}).items():
+            self.write(coin, now, mid=float(px))
+
+    def on_asset_ctx(self, msg: Dict[str, Any]) -> None:
+        data = msg.get("data") or {}
+        ctx = data.get("ctx") or {}
+        values = {
+            field: float(ctx[key])
+            for field, key in (
+                ("mark", "markPx"),
+                ("oracle", "oraclePx"),
+                ("funding", "funding"),
+            )
+            if ctx.get(key) is not None
+        }
+        if values:
+            self.write(str(data.get("coin", "")), int(time.time() * 1000), **values)
+
+    def on_bbo(self, msg: Dict[str, Any]) -> None:
+        data = msg.get("data") or {}
+        bid, ask = (data.get("bbo") or [None, None])[:2]
+        values = {
+            field: float(level["px"])
+            for field, level in (("bid", bid), ("ask", ask))
+            if level
+        }
+        if values:
+            self.write(str(data.get("coin", "")), int(time.time() * 1000), **values)
+
+
+class MarketDataReader:
+    """Zero-copy, read-only view of the segment published by `hlexec feed`."""
+
+    def __init__(self, path: Union[str, Path]):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=self._mmap)
+        if bytes(self.header["magic"]) != MAGIC or self.header["version"] != VERSION:
+            raise ValueError(f"{path} is not a market data segment")
+        n_slots = int(self.header["n_slots"])
+        if len(self._mmap) < _segment_size(n_slots):
+            raise ValueError(f"{path} is truncated")
+        self.slots = np.ndarray(
+            (n_slots,), SLOT_DTYPE, buffer=self._mmap, offset=HEADER_DTYPE.itemsize
+        )
+        self.index = {
+            name.decode(): i for i, name in enumerate(self.slots["name"].tolist())
+        }
+
+    @classmethod
+    def open(cls, production: bool) -> Optional["MarketDataReader"]:
+        """Reader for the live segment, or None when no feeder is running."""
+        try:
+            reader = cls(segment_path(production))
+        except (OSError, ValueError):
+            return None
+        return reader if reader.is_live() else None
+
+    def is_live(self, max_age_ms: int = MAX_AGE_MS) -> bool:
+        heartbeat = int(self.header["heartbeat_ms"])
+        return heartbeat > 0 and int(time.time() * 1000) - heartbeat <= max_age_ms
+
+    def quote(self, coin: str, retries: int = 100) -> Optional[Dict[str, float]]:
+        """Consistent copy of a coin's slot, or None if unknown or never written."""
+        i = self.index.get(coin)
+        if i is None:
+            return None
+        seq = self.slots["seq"]
+        for _ in range(retries):
+            before = int(seq[i])
+            if before & 1:
+                continue
+            slot = self.slots[i : i + 1].copy()[0]
+            if int(seq[i]) == before:
+                if before == 0:
+                    return None
+                return {
+                    "ts_ms": int(slot["ts_ms"]),
+                    **{field: float(slot[field]) for field in _PRICE_FIELDS},
+                }
+        return None
+
+    def marks(self, coins: List[str]) -> Dict[str, float]:
+        """Mark price per coin (falling back to the mid) for coins that have one."""
+        result: Dict[str, float] = {}
+        for coin in coins:
+            q = self.quote(coin)
+            if q is None:
+                continue
+            px = q["mark"] if not np.isnan(q["mark"]) else q["mid"]
+            if not np.isnan(px):
+                result[coin] = px
+        return result
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def run(production: bool, coins: List[str]) -> None:
+    """Publish allMids (and activeAssetCtx and bbo for `coins`) into the shared segment."""
+    import fcntl
+
+    base_url = api_url(production)
+    try:
+        meta = API(base_url).post("/info", {"type": "meta"})
+        names = [asset["name"] for asset in meta["universe"]]
+    except Exception as e:
+        raise click.ClickException(f"Failed to fetch meta: {e}")
+
+    unknown = [c for c in coins if c not in names]
+    if unknown:
+        raise click.ClickException(f"Unknown perp coin(s): {', '.join(unknown)}")
+
+    path = segment_path(production)
+    lock = open(path.with_suffix(".lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        raise click.ClickException(f"Another feeder is already publishing to {path}")
+
+    writer = MarketDataWriter(path, names)
+    ws = WebsocketManager(base_url)
+    ws.daemon = True
+    ws.start()
+    ws.subscribe({"type": "allMids"}, writer.on_all_mids)
+    for coin in coins:
+        ws.subscribe({"type": "activeAssetCtx", "coin": coin}, writer.on_asset_ctx)
+        ws.subscribe({"type": "bbo", "coin": coin}, writer.on_bbo)
+
+    console = Console()
+    console.print(
+        Text(
+            f"Publishing {len(names)} assets to {path} "
+            f"(marks and top of book for {', '.join(coins) or 'no coins'}). "
+            "Ctrl-C to stop.",
+            style="dim",
+        )
+    )
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ws.stop()
+        writer.close()
+        lock.close()
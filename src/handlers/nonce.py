@@ -0,0 +1,34 @@
+from __future__ import annotations
+from typing import Any
+import threading
+
+
+class NonceManager:
+    """Hands out consecutive transaction nonces for one signer locally.
+
+    The pending transaction count is read once (or taken from `start`, e.g.
+    from a batched read); later nonces are allocated without a round trip,
+    so several transactions can be sent before the first one is mined.
+    Call `reset` after a failed send so the next nonce is re-read from the
+    chain instead of leaving a gap.
+    """
+
+    def __init__(self, w3: Any, address: str, start: int | None = None):
+        self._w3 = w3
+        self._address = address
+        self._next = start
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = self._w3.eth.get_transaction_count(
+                    self._address, "pending"
+                )
+            nonce = self._next
+            self._next = nonce + 1
+            return nonce
+
+    def reset(self) -> None:
+        with self._lock:
+            self._next = None
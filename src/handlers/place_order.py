@@ -6,7 +6,15 @@ from rich.console import Console
 from rich.table import Table
 from rich.text import Text
 from rich import box
+from hyperliquid.utils.signing import get_timestamp_ms
+from hyperliquid.utils.types import Cloid
+from .actions import signed_order
+from .retry import submit_idempotent
+from .risk import DEFAULT_PRICE_BAND_PCT, pre_trade_check
 from .setup import setup, parse_cloid
+from .store import OrderStore, is_final
+import secrets
+import sqlite3
 
 
 def _parse_order_response(response: dict | None) -> list[dict[str, str]]:
@@ -25,6 +33,57 @@ def _parse_order_response(response: dict | None) -> list[dict[str, str]]:
         return [{"error": f"Failed to parse API response: {e}"}]
 
 
+def _open_store(production: bool) -> OrderStore | None:
+    """Open the local order store; a broken cache must never block trading."""
+    try:
+        return OrderStore.open(production)
+    except (sqlite3.Error, OSError):
+        return None
+
+
+def _query_order(
+    info: Any, store: OrderStore | None, address: str, oid_or_cloid: int | Cloid
+) -> dict:
+    """Look up an order in the local store first, then on the network.
+
+    Only final statuses are served from the store; live orders are always
+    re-queried and the fresh status is written back.
+    """
+    if store is not None:
+        cached = store.get_order(address, oid_or_cloid)
+        if cached is not None and is_final(cached["order"]):
+            return cached
+
+    response = (
+        info.query_order_by_oid(address, oid_or_cloid)
+        if isinstance(oid_or_cloid, int)
+        else info.query_order_by_cloid(address, oid_or_cloid)
+    )
+    if store is not None and response.get("status") == "order":
+        store.put_orders(address, [response["order"]])
+    return response
+
+
+def _order_by_cloid(info: Any, address: str, cloid: Cloid) -> dict | None:
+    """Look up a just-submitted order as an order placement response.
+
+    Returns None only when the exchange reports the CLOID unknown; any
+    other unexpected answer raises, as it proves nothing.
+    """
+    response = info.query_order_by_cloid(address, cloid)
+    if response.get("status") == "unknownOid":
+        return None
+    if response.get("status") != "order":
+        raise ValueError(f"Unexpected order status response: {response}")
+    order = response["order"]
+    status = "resting" if order["status"] == "open" else order["status"]
+    entry = {"oid": order["order"]["oid"], "cloid": cloid.to_raw()}
+    return {
+        "status": "ok",
+        "response": {"type": "order", "data": {"statuses": [{status: entry}]}},
+    }
+
+
 def _display_order_status(console: Console, order_dict: dict) -> None:
     """Display current order status in a formatted table.
 
@@ -174,8 +233,15 @@ def new_order_run(
     client_order_id: str | None,
     post_only: bool,
     reduce_only: bool,
+    risk_check: bool = False,
+    price_band: float = DEFAULT_PRICE_BAND_PCT,
 ) -> None:
-    """Place a new limit order on the perps market."""
+    """Place a new limit order on the perps market.
+
+    With `risk_check`, the order is first checked locally against cached
+    prices and account state (see `handlers.risk`) and rejected before
+    signing if it is clearly bad.
+    """
 
     if price <= 0:
         console = Console()
@@ -187,6 +253,21 @@ def new_order_run(
         return
 
     info, exchange, address, _account = setup(production, private_key, account_address)
+    store = _open_store(production)
+
+    if risk_check:
+        pre_trade_check(
+            info,
+            production,
+            address,
+            coin,
+            is_buy,
+            size,
+            price,
+            post_only or time_in_force == "Alo",
+            reduce_only,
+            price_band,
+        )
 
     order_type: dict[str, Any] = {"limit": {"tif": time_in_force}}
     if post_only:
@@ -197,7 +278,10 @@ def new_order_run(
     try:
         cloid = parse_cloid(client_order_id) if client_order_id else None
         if cloid:
-            order_info = info.query_order_by_cloid(address, cloid)
+            # Any stored order with this CLOID means it is taken, whatever its status
+            order_info = store.get_order(address, cloid) if store else None
+            if order_info is None:
+                order_info = info.query_order_by_cloid(address, cloid)
             if order_info.get("status") != "unknownOid":
                 console = Console()
                 console.log(order_info)
@@ -209,11 +293,30 @@ def new_order_run(
         console = Console()
         console.print(f"[bold red]Error: {e}[/bold red]")
         return
+    # The CLOID is what makes a submission with an unknown outcome safe to
+    # retry, so orders placed without one get a random one
+    order_cloid = cloid or Cloid.from_int(secrets.randbits(128))
     try:
-        response = exchange.order(
-            coin, is_buy, size, price, order_type, reduce_only, cloid
+        # Signed once: a retry re-posts it with the same nonce
+        nonce = get_timestamp_ms()
+        action, signature = signed_order(
+            exchange,
+            nonce,
+            coin,
+            is_buy,
+            size,
+            price,
+            order_type,
+            reduce_only,
+            order_cloid,
+        )
+        response = submit_idempotent(
+            lambda: exchange._post_action(action, signature, nonce),
+            lambda: _order_by_cloid(info, address, order_cloid),
         )
         result_data = _parse_order_response(response)
+    except click.ClickException:
+        raise
     except Exception as e:
         raise click.ClickException(f"Failed to place order: {e}")
 
@@ -234,7 +337,7 @@ def new_order_run(
 
         if order_id:
             try:
-                order_status = info.query_order_by_oid(address, int(order_id))
+                order_status = _query_order(info, store, address, int(order_id))
                 if order_status.get("status") == "order":
                     _display_order_status(console, order_status)
             except Exception:
@@ -262,12 +365,9 @@ def modify_order_run(
         return
 
     info, exchange, address, _account = setup(production, private_key, account_address)
+    store = _open_store(production)
     id = int(oid_or_cloid) if oid_or_cloid.isdigit() else parse_cloid(oid_or_cloid)
-    order_status = (
-        info.query_order_by_oid(address, id)
-        if isinstance(id, int)
-        else info.query_order_by_cloid(address, id)
-    )
+    order_status = _query_order(info, store, address, id)
     if order_status["status"] != "order" or order_status["order"]["status"] != "open":
         raise click.ClickException(
             "Order is not in a modifiable state or cannot be found."
@@ -341,13 +441,18 @@ def cancel_order_run(
     """Cancel an order by OID."""
 
     info, exchange, address, _account = setup(production, private_key, account_address)
+    store = _open_store(production)
 
     try:
-        order = (
-            info.query_order_by_oid(address, int(oid_or_cloid))
-            if oid_or_cloid.isdigit()
-            else info.query_order_by_cloid(address, parse_cloid(oid_or_cloid))
-        )
+        id = int(oid_or_cloid) if oid_or_cloid.isdigit() else parse_cloid(oid_or_cloid)
+        # Coin and OID never change, so any stored copy is enough to cancel
+        order = store.get_order(address, id) if store else None
+        if order is not None and is_final(order["order"]):
+            raise click.ClickException(
+                f"Order is already {order['order']['status']} and cannot be cancelled."
+            )
+        if order is None:
+            order = _query_order(info, store, address, id)
         coin = order["order"]["order"]["coin"]
         order_id = order["order"]["order"]["oid"]
         response = exchange.cancel(coin, order_id)
@@ -356,5 +461,105 @@ def cancel_order_run(
         console = Console()
         _display_cancel_result(console, result_data, order_id)
 
+    except click.ClickException:
+        raise
     except Exception as e:
         raise click.ClickException(f"Failed to cancel order: {e}")
+
+
+def show_order_run(
+    oid_or_cloid: str,
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+) -> None:
+    """Show an order and its fills, served from the local store when possible."""
+
+    info, _exchange, address, _account = setup(production, private_key, account_address)
+    store = _open_store(production)
+
+    try:
+        id = int(oid_or_cloid) if oid_or_cloid.isdigit() else parse_cloid(oid_or_cloid)
+        order_status = _query_order(info, store, address, id)
+    except Exception as e:
+        raise click.ClickException(f"Failed to look up order: {e}")
+
+    if order_status.get("status") != "order":
+        raise click.ClickException(f"Order {oid_or_cloid} cannot be found.")
+
+    console = Console()
+    _display_order_status(console, order_status)
+
+    if store is not None:
+        oid = int(order_status["order"]["order"]["oid"])
+        _display_fills(console, store.fills_for_order(address, oid))
+
+
+def sync_order_run(
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+) -> None:
+    """Incrementally sync historical orders and fills into the local store."""
+
+    info, _exchange, address, _account = setup(production, private_key, account_address)
+    store = _open_store(production)
+    if store is None:
+        raise click.ClickException("Failed to open the local order store")
+
+    try:
+        written = store.sync(info, address)
+    except Exception as e:
+        raise click.ClickException(f"Failed to sync orders: {e}")
+
+    click.echo()
+    table = Table(
+        title="Order Store Sync",
+        title_style="bold bright_cyan",
+        header_style="cyan",
+        border_style="cyan",
+        show_header=False,
+        box=box.ROUNDED,
+        expand=False,
+    )
+    table.add_column("Field", style="bold")
+    table.add_column("Value")
+    table.add_row("Fills Written", str(written["fills"]))
+    table.add_row("Orders Written", str(written["orders"]))
+    table.add_row("Store", store.path)
+    Console().print(table)
+
+
+def _display_fills(console: Console, fills: list[dict]) -> None:
+    """Display the fills of a single order."""
+    if not fills:
+        return
+
+    click.echo()
+    table = Table(
+        title="Fills",
+        title_style="bold bright_green",
+        header_style="green",
+        border_style="green",
+        box=box.ROUNDED,
+        expand=False,
+    )
+    table.add_column("Time")
+    table.add_column("Side")
+    table.add_column("Price")
+    table.add_column("Size")
+    table.add_column("Fee", justify="right")
+    table.add_column("Closed PnL", justify="right")
+
+    for f in fills:
+        ts = datetime.fromtimestamp(int(f.get("time", 0)) / 1000)
+        table.add_row(
+            ts.strftime("%Y-%m-%d %H:%M:%S"),
+            "Buy" if f.get("side") == "B" else "Sell",
+            str(f.get("px", "-")),
+            str(f.get("sz", "-")),
+            str(f.get("fee", "-")),
+            str(f.get("closedPnl", "-")),
+        )
+
+    console.print(table)
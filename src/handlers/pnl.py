@@ -0,0 +1,403 @@
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+import os
+import time
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from rich import box
+from .cache import cache_dir
+from .setup import setup
+from .status import _colorize_number
+from .store import OrderStore
+
+BUCKETS_MS = {
+    "hour": 3_600_000,
+    "day": 86_400_000,
+    "week": 7 * 86_400_000,
+}
+
+# Where bucket boundaries are counted from: the epoch was a Thursday, so
+# weeks start from 1970-01-05, the first Monday after it
+BUCKET_ORIGINS_MS = {"week": 4 * 86_400_000}
+
+
+# Numeric fill columns kept alongside the dictionary-encoded `coin` column
+FILL_COLUMNS = {
+    "time": np.int64,
+    "tid": np.int64,
+    "is_buy": np.bool_,
+    "px": np.float64,
+    "sz": np.float64,
+    "start_position": np.float64,
+    "closed_pnl": np.float64,
+    "fee": np.float64,
+}
+
+
+def _encode(coins: Any, vocab: List[str]) -> np.ndarray:
+    """Dictionary-encode coin names against `vocab`, extending it in place."""
+    index = {c: i for i, c in enumerate(vocab)}
+    for c in dict.fromkeys(coins):
+        if c not in index:
+            index[c] = len(vocab)
+            vocab.append(c)
+    return np.array([index[c] for c in coins], dtype=np.int64)
+
+
+def _sort_fills(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Order fill columns by coin, then time, then tid."""
+    order = np.lexsort((columns["tid"], columns["time"], columns["coin"]))
+    return {name: col[order] for name, col in columns.items()}
+
+
+def fill_columns(rows: List[tuple], vocab: List[str]) -> Dict[str, np.ndarray]:
+    """Columnar view of `OrderStore.fill_rows` tuples, sorted by coin then time."""
+    columns: Dict[str, np.ndarray] = {
+        name: np.zeros(0, dtype=dtype) for name, dtype in FILL_COLUMNS.items()
+    }
+    columns["coin"] = np.zeros(0, dtype=np.int64)
+    if rows:
+        coin, *rest = zip(*rows)
+        columns["coin"] = _encode(coin, vocab)
+        for (name, dtype), values in zip(FILL_COLUMNS.items(), rest):
+            columns[name] = np.array(values, dtype=dtype)
+    return _sort_fills(columns)
+
+
+def load_fills(store: OrderStore, user: str, path: Path) -> Dict[str, Any]:
+    """Full fill history of `user` as columns, cached in an .npz sidecar.
+
+    Fills are immutable and synced forwards from a high-water mark, so only
+    rows at or after the newest cached fill are read back from SQLite; the
+    rest is loaded straight from the sidecar.
+    """
+    vocab: List[str] = []
+    cached: Dict[str, np.ndarray] | None = None
+    if path.exists():
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                cached = {name: npz[name] for name in npz.files}
+            vocab = [str(c) for c in cached.pop("vocab")]
+        except (OSError, ValueError, KeyError):
+            cached, vocab = None, []
+
+    since = int(cached["time"].max()) if cached and cached["time"].size else 0
+    fresh = fill_columns(store.fill_rows(user, since).fetchall(), vocab)
+
+    if cached is None:
+        columns = fresh
+    else:
+        keep = cached["time"] < since
+        columns = _sort_fills(
+            {name: np.concatenate([cached[name][keep], fresh[name]]) for name in fresh}
+        )
+        if not fresh["time"].size:
+            return {"coins": np.array(vocab, dtype=object), **columns}
+
+    tmp = path.with_suffix(".tmp.npz")
+    arrays: Dict[str, Any] = {"vocab": np.array(vocab, dtype=str), **columns}
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+    return {"coins": np.array(vocab, dtype=object), **columns}
+
+
+def fill_window(fills: Dict[str, Any], start: int, end: int) -> Dict[str, np.ndarray]:
+    """Restrict loaded fills to [start, end] and derive the signed side."""
+    mask = (fills["time"] >= start) & (fills["time"] <= end)
+    window = {name: fills[name][mask] for name in (*FILL_COLUMNS, "coin")}
+    window["coins"] = fills["coins"]
+    window["coin_idx"] = window.pop("coin")
+    window["sign"] = np.where(window["is_buy"], 1.0, -1.0)
+    return window
+
+
+def funding_arrays(rows: List[tuple]) -> Dict[str, np.ndarray]:
+    """Columnar view of `OrderStore.funding_rows` tuples."""
+    if not rows:
+        return {
+            "coins": np.zeros(0, dtype=object),
+            "coin_idx": np.zeros(0, dtype=np.int64),
+            "time": np.zeros(0, dtype=np.int64),
+            "usdc": np.zeros(0, dtype=np.float64),
+        }
+    coin, t, usdc = zip(*rows)
+    vocab: List[str] = []
+    coin_idx = _encode(coin, vocab)
+    return {
+        "coins": np.array(vocab, dtype=object),
+        "coin_idx": coin_idx,
+        "time": np.array(t, dtype=np.int64),
+        "usdc": np.array(usdc, dtype=np.float64),
+    }
+
+
+def group_sum(
+    keys: List[np.ndarray], values: Dict[str, np.ndarray]
+) -> tuple[List[np.ndarray], Dict[str, np.ndarray]]:
+    """Sum each value column over the distinct combinations of the key columns.
+
+    The integer key columns are packed into one mixed-radix int64 key so the
+    grouping is a single `np.unique` + `np.bincount` per column. Returns the
+    distinct key columns (sorted lexicographically) and the per-group sums.
+    """
+    offsets = [int(k.min()) for k in keys]
+    radices = [int(k.max()) - off + 1 for k, off in zip(keys, offsets)]
+    packed = np.zeros(keys[0].size, dtype=np.int64)
+    for k, off, radix in zip(keys, offsets, radices):
+        packed = packed * radix + (k - off)
+
+    uniq, inverse = np.unique(packed, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    sums = {
+        name: np.bincount(inverse, weights=col, minlength=uniq.size)
+        for name, col in values.items()
+    }
+
+    columns: List[np.ndarray] = []
+    rest = uniq
+    for off, radix in zip(reversed(offsets), reversed(radices)):
+        columns.append(rest % radix + off)
+        rest = rest // radix
+    return columns[::-1], sums
+
+
+def average_entry(fills: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Reconstruct the open position and its average entry price per coin.
+
+    Expects fills ordered by coin then time, as produced by `fill_window`.
+    Uses each fill's `startPosition`: a fill that opens from flat or flips the
+    side starts a new position segment, and only fills that grow |position|
+    contribute to the entry. Reducing fills leave the average unchanged. The
+    result is `exact` when the current segment's opening fill is loaded;
+    otherwise the position predates the window and the entry is partial.
+    """
+    coin_idx = fills["coin_idx"]
+    before = fills["start_position"]
+    after = before + fills["sign"] * fills["sz"]
+
+    opened = (before == 0) | (np.sign(after) != np.sign(before))
+    coin_start = np.ones(coin_idx.size, dtype=bool)
+    coin_start[1:] = coin_idx[1:] != coin_idx[:-1]
+
+    open_qty = np.where(
+        opened,
+        np.abs(after),
+        np.where(np.abs(after) > np.abs(before), fills["sz"], 0.0),
+    )
+    segment = np.cumsum(opened | coin_start) - 1
+    n_segments = int(segment[-1]) + 1 if segment.size else 0
+    seg_qty = np.bincount(segment, weights=open_qty, minlength=n_segments)
+    seg_cost = np.bincount(
+        segment, weights=open_qty * fills["px"], minlength=n_segments
+    )
+
+    # Rows are ordered by coin then time, so segments and coins are contiguous
+    seg_first = np.flatnonzero(opened | coin_start)
+    last = np.flatnonzero(np.append(coin_idx[1:] != coin_idx[:-1], True))
+
+    last_seg = segment[last]
+    position = after[last]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        entry = np.where(
+            (position != 0) & (seg_qty[last_seg] > 0),
+            seg_cost[last_seg] / seg_qty[last_seg],
+            np.nan,
+        )
+    return {
+        "coin_idx": coin_idx[last],
+        "position": position,
+        "entry": entry,
+        "exact": opened[seg_first[last_seg]],
+    }
+
+
+def pnl_breakdown(
+    fills: Dict[str, np.ndarray],
+    funding: Dict[str, np.ndarray],
+    bucket_ms: int,
+    origin_ms: int = 0,
+) -> Dict[str, Any]:
+    """Realized PnL, fees, funding and volume by coin and by (bucket, coin).
+
+    Buckets are `bucket_ms` wide and aligned to `origin_ms`.
+    """
+    coins = np.union1d(fills["coins"], funding["coins"])
+    # Re-encode both sources against the shared vocabulary
+    f_coin = np.searchsorted(coins, fills["coins"])[fills["coin_idx"]]
+    u_coin = np.searchsorted(coins, funding["coins"])[funding["coin_idx"]]
+
+    n = fills["time"].size
+    m = funding["time"].size
+    zeros_f, zeros_u = np.zeros(n), np.zeros(m)
+    coin_col = np.concatenate([f_coin, u_coin]).astype(np.int64)
+    times = np.concatenate([fills["time"], funding["time"]])
+    bucket_col = (times - origin_ms) // bucket_ms
+    values = {
+        "realized": np.concatenate([fills["closed_pnl"], zeros_u]),
+        "fees": np.concatenate([fills["fee"], zeros_u]),
+        "funding": np.concatenate([zeros_f, funding["usdc"]]),
+        "volume": np.concatenate([fills["sz"] * fills["px"], zeros_u]),
+    }
+
+    if coin_col.size == 0:
+        return {"coins": coins, "by_coin": None, "by_bucket": None}
+
+    (by_coin_idx,), by_coin = group_sum([coin_col], values)
+    (bucket_keys, bucket_coin), by_bucket = group_sum([bucket_col, coin_col], values)
+
+    entries = average_entry(fills) if n else None
+    position = np.zeros(len(coins))
+    entry = np.full(len(coins), np.nan)
+    exact = np.ones(len(coins), dtype=bool)
+    if entries is not None:
+        idx = np.searchsorted(coins, fills["coins"][entries["coin_idx"]])
+        position[idx] = entries["position"]
+        entry[idx] = entries["entry"]
+        exact[idx] = entries["exact"]
+
+    by_coin["net"] = by_coin["realized"] - by_coin["fees"] + by_coin["funding"]
+    by_bucket["net"] = by_bucket["realized"] - by_bucket["fees"] + by_bucket["funding"]
+    by_coin["coin"] = by_coin_idx
+    by_coin["position"] = position[by_coin_idx]
+    by_coin["entry"] = entry[by_coin_idx]
+    by_coin["exact"] = exact[by_coin_idx]
+    by_bucket["coin"] = bucket_coin
+    by_bucket["start"] = bucket_keys * bucket_ms + origin_ms
+    return {"coins": coins, "by_coin": by_coin, "by_bucket": by_bucket}
+
+
+def run(
+    production: bool,
+    private_key: str | None,
+    account_address: str | None,
+    days: int,
+    bucket: str,
+    offline: bool,
+) -> None:
+    """Aggregate realized PnL, fees and funding from the local store."""
+    info, _exchange, address, _account = setup(production, private_key, account_address)
+
+    try:
+        store = OrderStore.open(production)
+    except Exception as e:
+        raise click.ClickException(f"Failed to open the local order store: {e}")
+
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - days * BUCKETS_MS["day"]
+
+    if not offline:
+        try:
+            store.sync(info, address)
+            store.sync_funding(info, address, start_ms)
+        except Exception as e:
+            raise click.ClickException(f"Failed to sync fills and funding: {e}")
+
+    sidecar = cache_dir(production) / f"fills-{address.lower()}.npz"
+    fills = fill_window(load_fills(store, address, sidecar), start_ms, now_ms)
+    funding = funding_arrays(store.funding_rows(address, start_ms, now_ms).fetchall())
+    result = pnl_breakdown(
+        fills, funding, BUCKETS_MS[bucket], BUCKET_ORIGINS_MS.get(bucket, 0)
+    )
+
+    console = Console()
+    console.print("")
+    if result["by_coin"] is None:
+        console.print(Text("No fills or funding in the selected period", style="dim"))
+        return
+    _render_by_coin(console, result["coins"], result["by_coin"])
+    console.print("")
+    _render_by_bucket(console, result["coins"], result["by_bucket"], bucket)
+
+
+def _render_by_coin(
+    console: Console, coins: np.ndarray, by_coin: Dict[str, np.ndarray]
+) -> None:
+    table = Table(
+        title="PnL by Coin",
+        title_style="bold bright_cyan",
+        header_style="cyan",
+        border_style="cyan",
+        box=box.ROUNDED,
+        expand=False,
+    )
+    table.add_column("Coin", style="bold")
+    table.add_column("Volume", justify="right")
+    table.add_column("Realized", justify="right")
+    table.add_column("Fees", justify="right")
+    table.add_column("Funding", justify="right")
+    table.add_column("Net", justify="right")
+    table.add_column("Position", justify="right")
+    table.add_column("Avg Entry", justify="right")
+
+    for i in range(by_coin["coin"].size):
+        entry = by_coin["entry"][i]
+        if np.isnan(entry):
+            entry_str = "-"
+        else:
+            entry_str = f"{'' if by_coin['exact'][i] else '~'}{entry:.6g}"
+        table.add_row(
+            str(coins[by_coin["coin"][i]]),
+            f"{by_coin['volume'][i]:,.2f}",
+            _colorize_number(round(by_coin["realized"][i], 2)),
+            f"{by_coin['fees'][i]:.2f}",
+            _colorize_number(round(by_coin["funding"][i], 2)),
+            _colorize_number(round(by_coin["net"][i], 2)),
+            f"{by_coin['position'][i]:g}",
+            entry_str,
+        )
+
+    table.add_section()
+    table.add_row(
+        "Total",
+        f"{by_coin['volume'].sum():,.2f}",
+        _colorize_number(round(float(by_coin["realized"].sum()), 2)),
+        f"{by_coin['fees'].sum():.2f}",
+        _colorize_number(round(float(by_coin["funding"].sum()), 2)),
+        _colorize_number(round(float(by_coin["net"].sum()), 2)),
+        "",
+        "",
+    )
+    console.print(table)
+
+
+def _render_by_bucket(
+    console: Console,
+    coins: np.ndarray,
+    by_bucket: Dict[str, np.ndarray],
+    bucket: str,
+) -> None:
+    table = Table(
+        title=f"PnL by {bucket.title()}",
+        title_style="bold bright_yellow",
+        header_style="yellow",
+        border_style="yellow",
+        box=box.ROUNDED,
+        expand=False,
+    )
+    table.add_column("Period (UTC)")
+    table.add_column("Coin", style="bold")
+    table.add_column("Realized", justify="right")
+    table.add_column("Fees", justify="right")
+    table.add_column("Funding", justify="right")
+    table.add_column("Net", justify="right")
+
+    fmt = "%Y-%m-%d %H:%M" if bucket == "hour" else "%Y-%m-%d"
+    for i in range(by_bucket["coin"].size):
+        period = datetime.fromtimestamp(
+            int(by_bucket["start"][i]) / 1000, tz=timezone.utc
+        ).strftime(fmt)
+        table.add_row(
+            period,
+            str(coins[by_bucket["coin"][i]]),
+            _colorize_number(round(by_bucket["realized"][i], 2)),
+            f"{by_bucket['fees'][i]:.2f}",
+            _colorize_number(round(by_bucket["funding"][i], 2)),
+            _colorize_number(round(by_bucket["net"][i], 2)),
+        )
+
+    console.print(table)
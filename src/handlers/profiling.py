@@ -0,0 +1,199 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List
+import cProfile
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Rows of each table in the stderr summary
+PROFILE_TOP_N = 15
+
+# Span name prefixes of each category of the time split; a span counts
+# once, under the first category it matches, and its children are not
+# counted again. The SDK clients fetch metadata while being constructed,
+# so setup.info and setup.exchange are network time too.
+SPLIT_PREFIXES = {
+    "network": ("info.", "exchange.", "rpc.", "setup.info", "setup.exchange"),
+    "rate limit wait": ("rate_limit.wait",),
+    "sign": ("sign.",),
+    "render": ("render",),
+}
+
+
+class Profiler:
+    """cProfile of one command, plus the import and time split breakdowns.
+
+    cProfile only sees the main thread; time spent on worker threads
+    (action queues, hedged RPC reads) shows up in the span-based split.
+    """
+
+    def __init__(self, command: str):
+        self.command = command
+        self.started = time.perf_counter()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def finish(self, tree: Dict[str, Any] | None) -> Dict[str, Any]:
+        """Stop profiling; returns the report for the span `tree`."""
+        self.profile.disable()
+        wall = time.perf_counter() - self.started
+        return {
+            "command": self.command,
+            "argv": sys.argv[1:],
+            "wall_s": round(wall, 4),
+            "split_s": split_spans(tree, wall),
+            "imports": import_times(),
+            "functions_by_self": top_functions(self.profile, "inlinetime"),
+            "functions_by_cumulative": top_functions(self.profile, "totaltime"),
+            "trace": tree,
+        }
+
+    def write(self, report: Dict[str, Any], directory: Path) -> Path:
+        """Save `report` as JSON and the raw stats as `.prof` (for pstats
+        or snakeviz); returns the JSON path."""
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = directory / f"hlexec-profile-{self.command}-{stamp}.json"
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        self.profile.dump_stats(str(path.with_suffix(".prof")))
+        return path
+
+
+def split_spans(tree: Dict[str, Any] | None, wall: float) -> Dict[str, float]:
+    """Seconds per SPLIT_PREFIXES category; the rest of `wall` is "other".
+
+    Spans on concurrent threads overlap, so categories can add up to more
+    than the wall time; "other" is then 0.
+    """
+    totals = {category: 0.0 for category in SPLIT_PREFIXES}
+
+    def walk(span: Dict[str, Any]) -> None:
+        for category, prefixes in SPLIT_PREFIXES.items():
+            if span["name"].startswith(prefixes):
+                totals[category] += span["duration_ms"] / 1000
+                return
+        for child in span.get("children", []):
+            walk(child)
+
+    for child in (tree or {}).get("children", []):
+        walk(child)
+    totals["other"] = max(0.0, wall - sum(totals.values()))
+    return {category: round(seconds, 4) for category, seconds in totals.items()}
+
+
+def import_times() -> Dict[str, Any]:
+    """Import time of hlexec, and its split by top-level package.
+
+    Measured in a fresh interpreter with `-X importtime`, since this
+    process has already imported everything.
+    """
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [src, os.getenv("PYTHONPATH")])),
+    )
+    try:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import hl_executor"],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return {"total_ms": None, "packages": []}
+    return parse_importtime(result.stderr)
+
+
+def parse_importtime(output: str) -> Dict[str, Any]:
+    """Sum the self time of every module in `-X importtime` output by
+    top-level package, slowest first.
+
+    `total_ms` is the cumulative time of the outermost imports (those not
+    indented), i.e. of everything hlexec pulled in.
+    """
+    total_us = 0
+    packages: Dict[str, Dict[str, int]] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        # Names follow one space, indented two more per nesting level
+        if not name.startswith("   "):
+            total_us += int(cumulative_us)
+        package = packages.setdefault(
+            name.strip().split(".")[0], {"self_us": 0, "modules": 0}
+        )
+        package["self_us"] += int(self_us)
+        package["modules"] += 1
+    rows = [
+        {
+            "package": name,
+            "self_ms": round(times["self_us"] / 1000, 2),
+            "modules": times["modules"],
+        }
+        for name, times in packages.items()
+    ]
+    rows.sort(key=lambda row: row["self_ms"], reverse=True)
+    return {"total_ms": round(total_us / 1000, 2), "packages": rows}
+
+
+def top_functions(profile: cProfile.Profile, key: str) -> List[Dict[str, Any]]:
+    """The PROFILE_TOP_N functions with the most self ("inlinetime") or
+    cumulative ("totaltime") time."""
+    entries = sorted(
+        profile.getstats(), key=lambda entry: getattr(entry, key), reverse=True
+    )
+    return [
+        {
+            "function": _function_name(entry.code),
+            "calls": entry.callcount,
+            "self_s": round(entry.inlinetime, 4),
+            "cumulative_s": round(entry.totaltime, 4),
+        }
+        for entry in entries[:PROFILE_TOP_N]
+    ]
+
+
+def _function_name(code: Any) -> str:
+    if isinstance(code, str):
+        # Built-ins are described by a string, e.g. "<built-in method ...>"
+        return code
+    return f"{_short_path(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to site-packages or the source tree, when inside one."""
+    for marker in ("site-packages" + os.sep, "src" + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
+
+
+def summary(report: Dict[str, Any], path: Path) -> str:
+    """The stderr summary of `report`, saved at `path`."""
+    split = "  ".join(f"{k} {v:.3f}s" for k, v in report["split_s"].items())
+    lines = [
+        f"Profile of `hlexec {report['command']}`: {report['wall_s']:.3f}s "
+        f"(report: {path})",
+        f"  {split}",
+    ]
+    imports = report["imports"]
+    if imports["total_ms"] is not None:
+        lines.append(
+            f"  Imports by package ({imports['total_ms'] / 1000:.3f}s "
+            "in a fresh interpreter):"
+        )
+        lines += [
+            f"    {row['self_ms']:>9.1f} ms  {row['modules']:>7}   {row['package']}"
+            for row in imports["packages"][:PROFILE_TOP_N]
+        ]
+    lines.append("  Functions by self time (main thread):")
+    lines += [
+        f"    {row['self_s'] * 1000:>9.1f} ms  {row['calls']:>7}x  {row['function']}"
+        for row in report["functions_by_self"]
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,266 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+import json
+import os
+import threading
+import time
+from hyperliquid.utils.error import ClientError
+from .cache import cache_dir
+from .tracing import TRACER
+
+# HyperLiquid's REST budget: 1200 weight per minute per IP, refilled evenly
+REST_WEIGHT_PER_MIN = 1200
+
+# Info request weights; any other info type weighs DEFAULT_INFO_WEIGHT
+INFO_WEIGHTS = {
+    "l2Book": 2,
+    "allMids": 2,
+    "clearinghouseState": 2,
+    "orderStatus": 2,
+    "spotClearinghouseState": 2,
+    "exchangeStatus": 2,
+    "userRole": 60,
+}
+DEFAULT_INFO_WEIGHT = 20
+
+# Info types with large responses weigh 1 more per this many items returned
+ITEMS_PER_EXTRA_WEIGHT = {
+    "userFills": 20,
+    "userFillsByTime": 20,
+    "userFunding": 20,
+    "historicalOrders": 20,
+    "fundingHistory": 20,
+    "recentTrades": 20,
+    "twapHistory": 20,
+    "userTwapSliceFills": 20,
+    "candleSnapshot": 60,
+}
+
+# An exchange action weighs 1, plus 1 per ACTION_BATCH_SIZE orders/cancels
+ACTION_BATCH_SIZE = 40
+
+# Once an address has used its request allowance it may act once per 10s
+THROTTLED_ACTION_INTERVAL_S = 10.0
+
+# The address allowance is re-read from `userRateLimit` after this long
+SEED_TTL_S = 300.0
+
+# A 429 that still gets through (other clients on the same IP) empties the
+# bucket and the request is queued again, at most this many times
+RATE_LIMIT_RETRIES = 3
+
+
+def is_rate_limited(error: Exception) -> bool:
+    if isinstance(error, ClientError):
+        return error.status_code == 429
+    return "rate limit" in str(error).lower()
+
+
+def _address_limited(result: Any) -> bool:
+    """Whether an exchange response is the per-address request limit."""
+    return (
+        isinstance(result, dict)
+        and result.get("status") == "err"
+        and "too many cumulative requests" in str(result.get("response")).lower()
+    )
+
+
+def request_weight(url_path: str, payload: Dict[str, Any] | None) -> int:
+    """REST weight of one request, following HyperLiquid's published table."""
+    payload = payload or {}
+    if url_path == "/exchange":
+        action = payload.get("action") or {}
+        batch = action.get("orders") or action.get("cancels") or action.get("modifies")
+        return 1 + len(batch or []) // ACTION_BATCH_SIZE
+    return INFO_WEIGHTS.get(payload.get("type", ""), DEFAULT_INFO_WEIGHT)
+
+
+def response_weight(url_path: str, payload: Dict[str, Any] | None, result: Any) -> int:
+    """Extra REST weight of a response, charged once it has arrived."""
+    per = ITEMS_PER_EXTRA_WEIGHT.get((payload or {}).get("type", ""))
+    if url_path != "/info" or per is None or not isinstance(result, list):
+        return 0
+    return len(result) // per
+
+
+class RateLimiter:
+    """Token bucket for the REST weight budget plus the per-address action
+    allowance, shared by every `hlexec` process of an environment.
+
+    The state lives in a small JSON file guarded by a file lock: updates
+    hold it exclusively and rewrite the file only if the state changed,
+    reads share it and write nothing. A request that
+    does not fit waits for the bucket to refill instead of failing, so
+    bursts run at the sustainable rate. The address allowance is seeded
+    from `userRateLimit` (`nRequestsCap - nRequestsUsed`) and counted down
+    locally; when it runs out, actions are paced to one per 10s.
+    """
+
+    def __init__(self, path: Path | str, per_minute: int = REST_WEIGHT_PER_MIN):
+        self.path = Path(path)
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, production: bool) -> "RateLimiter":
+        return cls(cache_dir(production) / "rate_limit.json")
+
+    @contextmanager
+    def _locked(self, write: bool = True) -> Iterator[Dict[str, Any]]:
+        """The state, under the file lock; with `write`, the lock is
+        exclusive and changes to the state are saved."""
+        import fcntl
+
+        # One open file per holder: flock is per open file, so threads of
+        # one process would otherwise share the lock
+        with self._lock, open(self.path.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+            try:
+                text = self.path.read_text()
+                state = json.loads(text)
+            except (OSError, ValueError):
+                text, state = "", {}
+            yield state
+            if not write:
+                return
+            new_text = json.dumps(state)
+            if new_text != text:
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_text(new_text)
+                os.replace(tmp, self.path)
+
+    def _refill(self, state: Dict[str, Any], now: float) -> float:
+        tokens = state.get("tokens", self.capacity)
+        elapsed = max(0.0, now - state.get("at", now))
+        return min(self.capacity, tokens + elapsed * self.rate)
+
+    def _try(self, weight: int, address: str | None) -> float:
+        """Take `weight` (and one action for `address`) if both budgets allow
+        it now; otherwise return how long to wait."""
+        weight = min(weight, int(self.capacity))
+        with self._locked() as state:
+            now = time.time()
+            tokens = self._refill(state, now)
+            wait = max(0.0, (weight - tokens) / self.rate)
+
+            entry = None
+            if address is not None:
+                entry = state.setdefault("addresses", {}).get(address.lower())
+            if entry is not None and entry.get("remaining") is not None:
+                if entry["remaining"] <= 0:
+                    wait = max(wait, entry.get("next_at", 0.0) - now)
+
+            if wait <= 0:
+                state["tokens"] = tokens - weight
+                state["at"] = now
+                if entry is not None and entry.get("remaining") is not None:
+                    if entry["remaining"] > 0:
+                        entry["remaining"] -= 1
+                    else:
+                        entry["next_at"] = now + THROTTLED_ACTION_INTERVAL_S
+            return wait
+
+    def acquire(self, weight: int, address: str | None = None) -> None:
+        """Block until `weight` fits the REST budget (and, for an exchange
+        action, `address` may act), then take it."""
+        wait = self._try(weight, address)
+        if wait <= 0:
+            return
+        with TRACER.span("rate_limit.wait", weight=weight):
+            while wait > 0:
+                time.sleep(wait)
+                wait = self._try(weight, address)
+
+    def needs_seed(self, address: str) -> bool:
+        with self._locked(write=False) as state:
+            entry = state.get("addresses", {}).get(address.lower())
+            return entry is None or time.time() - entry["seeded_at"] > SEED_TTL_S
+
+    def seed(self, address: str, limits: Any) -> None:
+        """Record the `userRateLimit` response for `address`; anything else
+        leaves its allowance untracked until the next seed."""
+        remaining = None
+        if isinstance(limits, dict) and "nRequestsCap" in limits:
+            remaining = int(limits["nRequestsCap"]) - int(limits["nRequestsUsed"])
+        with self._locked() as state:
+            state.setdefault("addresses", {})[address.lower()] = {
+                "remaining": remaining,
+                "seeded_at": time.time(),
+                "next_at": 0.0,
+            }
+
+    def exhaust(self, address: str) -> None:
+        """The exchange reported the address allowance used up."""
+        with self._locked() as state:
+            entry = state.setdefault("addresses", {}).setdefault(
+                address.lower(), {"seeded_at": time.time()}
+            )
+            entry["remaining"] = 0
+            entry["next_at"] = time.time() + THROTTLED_ACTION_INTERVAL_S
+
+    def charge(self, weight: int) -> None:
+        """Take `weight` now, even below zero (a response turned out to
+        cost more than its request), so later requests wait it off."""
+        with self._locked() as state:
+            now = time.time()
+            state["tokens"] = self._refill(state, now) - weight
+            state["at"] = now
+
+    def drain(self) -> None:
+        """Empty the bucket after a 429, so requests wait for a refill."""
+        with self._locked() as state:
+            state["tokens"] = 0.0
+            state["at"] = time.time()
+
+    def snapshot(self, address: str | None = None) -> Tuple[float, Any]:
+        """(available weight, remaining address allowance or None)"""
+        with self._locked(write=False) as state:
+            tokens = self._refill(state, time.time())
+            entry = state.get("addresses", {}).get((address or "").lower()) or {}
+            return tokens, entry.get("remaining")
+
+
+def rate_limited(client: Any, limiter: RateLimiter, address: str | None = None) -> Any:
+    """Route `client.post` (an SDK `API`, `Info` or `Exchange`) through
+    `limiter`. Exchange actions also count against `address`'s allowance.
+    Returns the client."""
+    post = client.post
+
+    def limited_post(url_path: str, payload: Any = None) -> Any:
+        weight = request_weight(url_path, payload)
+        acting = address if url_path == "/exchange" else None
+        if acting is not None and limiter.needs_seed(acting):
+            limiter.acquire(DEFAULT_INFO_WEIGHT)
+            try:
+                limits = post("/info", {"type": "userRateLimit", "user": acting})
+            except Exception:
+                limits = None
+            limiter.seed(acting, limits)
+
+        attempt = 0
+        while True:
+            limiter.acquire(weight, acting)
+            try:
+                result = post(url_path, payload)
+            except ClientError as e:
+                if e.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                limiter.drain()
+            else:
+                extra = response_weight(url_path, payload, result)
+                if extra:
+                    limiter.charge(extra)
+                if (
+                    acting is None
+                    or attempt == RATE_LIMIT_RETRIES
+                    or not _address_limited(result)
+                ):
+                    return result
+                limiter.exhaust(acting)
+            attempt += 1
+
+    client.post = limited_post
+    return client
@@ -0,0 +1,303 @@
+from __future__ import annotations
+from collections import deque
+from datetime import timedelta
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Tuple
+import gzip
+import json
+import sys
+import threading
+import time
+import click
+import requests
+import websocket
+from requests.structures import CaseInsensitiveDict
+
+# Bumped when the archive layout changes
+ARCHIVE_VERSION = 1
+
+# Request fields that change from run to run (nonces, signatures, JSON-RPC
+# ids, time windows); they are ignored when matching a replayed request
+VOLATILE_KEYS = frozenset(
+    {"nonce", "signature", "id", "time", "startTime", "endTime", "expiresAfter"}
+)
+
+
+def _body(request: requests.PreparedRequest) -> Any:
+    body = request.body
+    if isinstance(body, bytes):
+        body = body.decode(errors="replace")
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return body
+
+
+def request_kind(url: str, body: Any) -> str:
+    """What a request asks for: the info type, the exchange action type or
+    the JSON-RPC method(s)."""
+    if isinstance(body, list):
+        return "rpc:" + ",".join(str(call.get("method")) for call in body)
+    if isinstance(body, dict):
+        if "jsonrpc" in body:
+            return f"rpc:{body.get('method')}"
+        if url.endswith("/exchange"):
+            return f"exchange:{(body.get('action') or {}).get('type')}"
+        if url.endswith("/info"):
+            return f"info:{body.get('type')}"
+    return url
+
+
+def _stable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _stable(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_stable(v) for v in value]
+    return value
+
+
+def request_key(url: str, body: Any) -> str:
+    """`url` and `body` without VOLATILE_KEYS, for exact matching."""
+    return url + " " + json.dumps(_stable(body), sort_keys=True)
+
+
+class Recorder:
+    """Appends every HTTP exchange to a gzipped JSON Lines archive.
+
+    The first line describes the run; each later line holds one request,
+    its response (or the exception it raised) and how long it took.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.perf_counter()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._write(
+            {
+                "version": ARCHIVE_VERSION,
+                "argv": sys.argv[1:],
+                "recorded_at": int(time.time()),
+            }
+        )
+
+    def _write(self, line: Dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def send(self, send: Any, session: Any, request: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        entry: Dict[str, Any] = {
+            "at": round(start - self.started, 4),
+            "method": request.method,
+            "url": request.url,
+            "body": _body(request),
+        }
+        try:
+            response = send(session, request, **kwargs)
+        except requests.exceptions.RequestException as e:
+            entry["elapsed"] = round(time.perf_counter() - start, 4)
+            entry["error"] = type(e).__name__
+            entry["message"] = str(e)
+            self._write(entry)
+            raise
+        entry["elapsed"] = round(time.perf_counter() - start, 4)
+        entry["status"] = response.status_code
+        entry["reason"] = response.reason
+        content_type = response.headers.get("Content-Type")
+        entry["headers"] = {"Content-Type": content_type} if content_type else {}
+        entry["response"] = response.text
+        self._write(entry)
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class Player:
+    """Answers HTTP requests from an archive written by Recorder.
+
+    A request takes the first unused recorded exchange with the same URL
+    and body (ignoring VOLATILE_KEYS), else the first unused one of the
+    same kind (see `request_kind`), else the last one of that kind again,
+    so polling loops can run longer than they did while recording. A
+    JSON-RPC request that matches nothing as a whole, such as a batch put
+    together differently because a cache was warm, is answered call by
+    call in the same way. Each answer is delayed by the recorded latency
+    times `latency_scale`.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 1.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self.entries, self.header = _load(path)
+        self._lock = threading.Lock()
+        self._requests = _Index(
+            (request_key(e["url"], e["body"]), request_kind(e["url"], e["body"]), e)
+            for e in self.entries
+        )
+        self._calls = _Index(_rpc_calls(self.entries))
+
+    def match(self, url: str, body: Any) -> Dict[str, Any] | None:
+        kind = request_kind(url, body)
+        with self._lock:
+            entry = self._requests.match(request_key(url, body), kind)
+            if entry is not None or not kind.startswith("rpc:"):
+                return entry
+            # Answer the JSON-RPC calls one by one
+            calls = body if isinstance(body, list) else [body]
+            answers = []
+            for call in calls:
+                answer = self._calls.match(
+                    request_key("", call), request_kind("", call)
+                )
+                if answer is None:
+                    return None
+                answers.append(answer)
+        results = [dict(a["response"], id=c.get("id")) for a, c in zip(answers, calls)]
+        return {
+            "body": body,
+            "elapsed": max(answer["elapsed"] for answer in answers),
+            "status": 200,
+            "headers": {"Content-Type": "application/json"},
+            "response": json.dumps(results if isinstance(body, list) else results[0]),
+        }
+
+    def send(self, send: Any, session: Any, request: Any, **kwargs: Any) -> Any:
+        body = _body(request)
+        entry = self.match(request.url, body)
+        if entry is None:
+            raise click.ClickException(
+                f"No {request_kind(request.url, body)} request in {self.path} "
+                f"to replay for {request.url}"
+            )
+        time.sleep(entry["elapsed"] * self.latency_scale)
+        if "error" in entry:
+            error = getattr(requests.exceptions, entry["error"], None)
+            if not isinstance(error, type):
+                error = requests.exceptions.ConnectionError
+            raise error(entry["message"], request=request)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason") or ""
+        response.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=entry["elapsed"])
+        response._content = _with_request_ids(
+            entry["body"], body, entry["response"]
+        ).encode()
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class _Index:
+    """Recorded items, taken by exact key first and by kind second."""
+
+    def __init__(self, items: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        self.items: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, Deque[int]] = {}
+        self._by_kind: Dict[str, Deque[int]] = {}
+        self._last: Dict[str, int] = {}
+        self._used: set[int] = set()
+        for i, (key, kind, item) in enumerate(items):
+            self.items.append(item)
+            self._by_key.setdefault(key, deque()).append(i)
+            self._by_kind.setdefault(kind, deque()).append(i)
+
+    def _take(self, queue: Deque[int] | None) -> int | None:
+        while queue:
+            i = queue.popleft()
+            if i not in self._used:
+                return i
+        return None
+
+    def match(self, key: str, kind: str) -> Dict[str, Any] | None:
+        i = self._take(self._by_key.get(key))
+        if i is None:
+            i = self._take(self._by_kind.get(kind))
+        if i is None:
+            i = self._last.get(kind)
+        if i is None:
+            return None
+        self._used.add(i)
+        self._last[kind] = i
+        return self.items[i]
+
+
+def _rpc_calls(
+    entries: List[Dict[str, Any]],
+) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Each JSON-RPC call of the recorded requests, with its own response."""
+    for entry in entries:
+        body = entry["body"]
+        if "response" not in entry or not request_kind(entry["url"], body).startswith(
+            "rpc:"
+        ):
+            continue
+        try:
+            response = json.loads(entry["response"])
+        except ValueError:
+            continue
+        responses = response if isinstance(response, list) else [response]
+        by_id = {r.get("id"): r for r in responses if isinstance(r, dict)}
+        for call in body if isinstance(body, list) else [body]:
+            if call.get("id") in by_id:
+                yield (
+                    request_key("", call),
+                    request_kind("", call),
+                    {"response": by_id[call["id"]], "elapsed": entry["elapsed"]},
+                )
+
+
+def _load(path: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+    except (OSError, EOFError, ValueError) as e:
+        raise click.ClickException(f"Cannot read recording {path}: {e}")
+    if not lines or lines[0].get("version") != ARCHIVE_VERSION:
+        raise click.ClickException(f"{path} is not an hlexec recording")
+    return lines[1:], lines[0]
+
+
+def _with_request_ids(recorded: Any, current: Any, text: str) -> str:
+    """Rewrite the JSON-RPC ids of a recorded response to those of the
+    current request, matching calls by position in the request."""
+    recorded_calls = recorded if isinstance(recorded, list) else [recorded]
+    current_calls = current if isinstance(current, list) else [current]
+    ids = {
+        old.get("id"): new.get("id")
+        for old, new in zip(recorded_calls, current_calls)
+        if isinstance(old, dict) and isinstance(new, dict) and "jsonrpc" in new
+    }
+    if not ids:
+        return text
+    try:
+        response = json.loads(text)
+    except ValueError:
+        return text
+    for call in response if isinstance(response, list) else [response]:
+        if isinstance(call, dict) and call.get("id") in ids:
+            call["id"] = ids[call["id"]]
+    return json.dumps(response)
+
+
+def install(transport: Recorder | Player) -> None:
+    """Route every `requests` call (the SDK's Info/Exchange and web3's
+    HTTPProvider) through `transport`.
+
+    Websockets are switched off, so commands fall back to polling, whose
+    requests are recorded and replayed.
+    """
+    send = requests.Session.send
+
+    def transport_send(session: Any, request: Any, **kwargs: Any) -> Any:
+        return transport.send(send, session, request, **kwargs)
+
+    setattr(requests.Session, "send", transport_send)
+    setattr(websocket.WebSocketApp, "run_forever", lambda self, *a, **kw: False)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+from typing import Any, Callable
+import random
+import time
+import click
+import requests
+from hyperliquid.utils.error import ServerError
+
+# Submissions of one order before giving up, with full-jitter backoff that
+# starts at RETRY_BASE_S and doubles up to RETRY_MAX_S
+ORDER_ATTEMPTS = 4
+RETRY_BASE_S = 0.5
+RETRY_MAX_S = 8.0
+
+# Timeout of every HyperLiquid API request (the SDK waits forever by
+# default); a submission that times out has an unknown outcome
+REQUEST_TIMEOUT_S = 10.0
+
+# Failed lookups of an order whose submission had an unknown outcome
+LOOKUP_ATTEMPTS = 3
+
+# An order the exchange accepted can take a moment to show up in lookups:
+# each lookup waits at least LOOKUP_MIN_DELAY_S, and the order only counts
+# as absent once ABSENT_CONFIRMATIONS lookups in a row did not find it
+LOOKUP_MIN_DELAY_S = 2.0
+ABSENT_CONFIRMATIONS = 2
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter delay before retry `attempt` (counting from 0)"""
+    return random.uniform(0, min(RETRY_MAX_S, RETRY_BASE_S * 2**attempt))
+
+
+def is_unsent(error: Exception) -> bool:
+    """Whether the request provably was not processed by the exchange.
+
+    429s are not retried here: `rate_limited` clients already wait and
+    retry them.
+    """
+    return isinstance(error, requests.exceptions.ConnectTimeout)
+
+
+def is_ambiguous(error: Exception) -> bool:
+    """Whether the request may or may not have been processed."""
+    return isinstance(
+        error,
+        (
+            requests.exceptions.Timeout,
+            requests.exceptions.ConnectionError,
+            ServerError,
+        ),
+    )
+
+
+def _resolve(lookup: Callable[[], Any], error: Exception) -> Any:
+    """Ask `lookup` whether the ambiguous submission landed.
+
+    Returns its answer, or None once ABSENT_CONFIRMATIONS lookups in a row
+    found nothing; raises if it cannot tell.
+    """
+    failures = 0
+    absent = 0
+    while True:
+        time.sleep(max(LOOKUP_MIN_DELAY_S, backoff(failures)))
+        try:
+            found = lookup()
+        except Exception:
+            failures += 1
+            if failures >= LOOKUP_ATTEMPTS:
+                raise click.ClickException(
+                    f"Order outcome unknown after {error}, "
+                    "and it could not be looked up"
+                )
+            continue
+        if found is not None:
+            return found
+        absent += 1
+        if absent >= ABSENT_CONFIRMATIONS:
+            return None
+
+
+def submit_idempotent(
+    submit: Callable[[], Any],
+    lookup: Callable[[], Any] | None,
+    attempts: int = ORDER_ATTEMPTS,
+) -> Any:
+    """Call `submit` until the exchange answers, without duplicating it.
+
+    `submit` must post the same signed request (same nonce) every time, so
+    the exchange itself rejects a copy of one that did land. Requests that
+    provably never arrived are simply retried. When the outcome is unknown
+    (timeout, dropped connection, 5xx), `lookup` is asked first: a result
+    other than None is returned as if `submit` had succeeded, and only a
+    confirmed None (the order does not exist) leads to a resubmission.
+    Without `lookup`, an unknown outcome is never retried. Other errors
+    propagate unchanged.
+    """
+    attempt = 0
+    while True:
+        try:
+            return submit()
+        except Exception as e:
+            if is_ambiguous(e) and not is_unsent(e):
+                if lookup is None:
+                    raise click.ClickException(
+                        f"Order outcome unknown after {e}; not retrying without a CLOID"
+                    )
+                found = _resolve(lookup, e)
+                if found is not None:
+                    return found
+            elif not is_unsent(e):
+                raise
+            attempt += 1
+            if attempt >= attempts:
+                raise
+        time.sleep(backoff(attempt - 1))
@@ -0,0 +1,200 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import math
+import os
+import time
+import click
+from .cache import cache_dir
+from .market_data import MarketDataReader
+from .status import _normalize_positions
+
+# Default maximum distance of a limit price from the reference price, in %
+DEFAULT_PRICE_BAND_PCT = 5.0
+
+# Account snapshots younger than this are used without touching the network
+SNAPSHOT_MAX_AGE_MS = 10_000
+
+# Perp metadata (max leverage) changes rarely; refresh it daily
+META_MAX_AGE_MS = 86_400_000
+
+# Leverage Hyperliquid applies to an asset the account has not configured
+DEFAULT_LEVERAGE = 20
+
+
+def _snapshot_path(production: bool, address: str) -> Path:
+    return cache_dir(production) / f"risk-{address.lower()}.json"
+
+
+def load_snapshot(
+    info: Any,
+    production: bool,
+    address: str,
+    max_age_ms: int = SNAPSHOT_MAX_AGE_MS,
+) -> Dict[str, Any]:
+    """Cached `user_state`, mids and max leverage, refreshed when stale.
+
+    Returns {"time", "user_state", "mids", "meta_time", "max_leverage"}.
+    """
+    path = _snapshot_path(production, address)
+    now = int(time.time() * 1000)
+    snapshot: Dict[str, Any] = {}
+    try:
+        snapshot = json.loads(path.read_text())
+    except (OSError, ValueError):
+        pass
+
+    changed = False
+    if now - int(snapshot.get("time") or 0) > max_age_ms:
+        snapshot["user_state"] = info.user_state(address)
+        snapshot["mids"] = info.all_mids()
+        snapshot["time"] = now
+        changed = True
+    if now - int(snapshot.get("meta_time") or 0) > META_MAX_AGE_MS:
+        snapshot["max_leverage"] = {
+            a["name"]: int(a.get("maxLeverage") or DEFAULT_LEVERAGE)
+            for a in info.meta().get("universe", [])
+        }
+        snapshot["meta_time"] = now
+        changed = True
+
+    if changed:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot, separators=(",", ":")))
+        os.replace(tmp, path)
+    return snapshot
+
+
+def _position(user_state: Dict[str, Any], coin: str) -> Dict[str, Any] | None:
+    positions = _normalize_positions(user_state.get("assetPositions"))
+    return next((p for p in positions if p.get("coin") == coin), None)
+
+
+def _available_margin(user_state: Dict[str, Any]) -> float:
+    if user_state.get("withdrawable") is not None:
+        return float(user_state["withdrawable"])
+    summary = user_state.get("crossMarginSummary") or user_state.get("marginSummary")
+    summary = summary or {}
+    return float(summary.get("accountValue") or 0) - float(
+        summary.get("totalMarginUsed") or 0
+    )
+
+
+def check_order(
+    coin: str,
+    is_buy: bool,
+    size: float,
+    price: float,
+    add_liquidity_only: bool,
+    reduce_only: bool,
+    snapshot: Dict[str, Any],
+    quote: Optional[Dict[str, float]],
+    price_band_pct: float,
+) -> List[str]:
+    """Return the reasons an order should be rejected (empty when it passes).
+
+    - Price band: the limit price must be within `price_band_pct` of the
+      reference price (live mark or mid from `quote`, else the snapshot mid).
+    - Alo crossing: needs a live best bid/ask in `quote`; skipped otherwise.
+    - Margin: the initial margin for the size that increases the position
+      must fit in the snapshot's available margin.
+    """
+    problems: List[str] = []
+
+    reference = None
+    if quote is not None:
+        for field in ("mark", "mid"):
+            if not math.isnan(quote.get(field, math.nan)):
+                reference = quote[field]
+                break
+    if reference is None and coin in (snapshot.get("mids") or {}):
+        reference = float(snapshot["mids"][coin])
+    if reference is None:
+        problems.append(f"No reference price for {coin}")
+    else:
+        deviation = abs(price - reference) / reference * 100
+        if deviation > price_band_pct:
+            problems.append(
+                f"Price {price:g} is {deviation:.2f}% from the reference "
+                f"{reference:g} (band {price_band_pct:g}%)"
+            )
+
+    if add_liquidity_only and quote is not None:
+        bid, ask = quote.get("bid", math.nan), quote.get("ask", math.nan)
+        if is_buy and not math.isnan(ask) and price >= ask:
+            problems.append(f"Alo buy at {price:g} would cross the best ask {ask:g}")
+        if not is_buy and not math.isnan(bid) and price <= bid:
+            problems.append(f"Alo sell at {price:g} would cross the best bid {bid:g}")
+
+    user_state = snapshot.get("user_state") or {}
+    pos = _position(user_state, coin)
+    current = float(pos.get("szi") or 0) if pos else 0.0
+    after = current + (size if is_buy else -size)
+    # A flip closes the old side first, so the whole new side is an increase
+    flipped = after * current < 0
+    increase = abs(after) if flipped else max(0.0, abs(after) - abs(current))
+    if reduce_only and increase > 0:
+        problems.append(
+            f"Reduce-only order of {size:g} would increase the {coin} position "
+            f"({current:g})"
+        )
+    elif increase > 0:
+        lev = (pos or {}).get("leverage")
+        if isinstance(lev, dict) and lev.get("value"):
+            leverage = float(lev["value"])
+        else:
+            leverage = min(
+                DEFAULT_LEVERAGE,
+                (snapshot.get("max_leverage") or {}).get(coin, DEFAULT_LEVERAGE),
+            )
+        required = increase * price / leverage
+        available = _available_margin(user_state)
+        if required > available:
+            problems.append(
+                f"Order needs {required:,.2f} USDC margin at {leverage:g}x "
+                f"but only {available:,.2f} is available"
+            )
+
+    return problems
+
+
+def pre_trade_check(
+    info: Any,
+    production: bool,
+    address: str,
+    coin: str,
+    is_buy: bool,
+    size: float,
+    price: float,
+    add_liquidity_only: bool,
+    reduce_only: bool,
+    price_band_pct: float = DEFAULT_PRICE_BAND_PCT,
+) -> None:
+    """Raise a ClickException if the order fails any local pre-trade check."""
+    try:
+        snapshot = load_snapshot(info, production, address)
+    except Exception as e:
+        raise click.ClickException(f"Failed to load the risk snapshot: {e}")
+
+    quote = None
+    reader = MarketDataReader.open(production)
+    if reader is not None:
+        quote = reader.quote(coin)
+        reader.close()
+
+    problems = check_order(
+        coin,
+        is_buy,
+        size,
+        price,
+        add_liquidity_only,
+        reduce_only,
+        snapshot,
+        quote,
+        price_band_pct,
+    )
+    if problems:
+        raise click.ClickException(
+            "Pre-trade risk check failed:\n  - " + "\n  - ".join(problems)
+        )
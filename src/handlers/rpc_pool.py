@@ -0,0 +1,446 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+import json
+import os
+import threading
+import time
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from web3 import HTTPProvider, Web3
+from web3.providers import JSONBaseProvider
+from web3.types import RPCEndpoint
+from .cache import cache_dir
+from .constants import (
+    ARB_PROD_RPCS,
+    ARB_TEST_RPCS,
+    HYPEREVM_PROD_RPCS,
+    HYPEREVM_TEST_RPCS,
+)
+from .tracing import timed
+
+# Per-request timeout of a single endpoint, and of the latency probe
+REQUEST_TIMEOUT = 10.0
+PROBE_TIMEOUT = 3.0
+
+# A read still pending after max(HEDGE_FACTOR * latency, HEDGE_MIN_S) is
+# also sent to the next endpoint; the first answer wins
+HEDGE_FACTOR = 2.0
+HEDGE_MIN_S = 0.25
+
+# Failed endpoints are skipped for this long
+COOLDOWN_S = 30.0
+
+# Weight of the newest sample in the latency moving average
+EWMA_ALPHA = 0.3
+
+# Persisted latencies younger than this rank endpoints without a new probe
+STATS_MAX_AGE_S = 600
+
+# Requests with side effects are never hedged and never fail over, except
+# eth_sendRawTransaction (see PoolProvider.send_raw_transaction)
+WRITE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+
+# JSON-RPC error message (lowercased) of a node that already has the raw
+# transaction: the endpoint that failed had broadcast it after all
+ALREADY_KNOWN_ERROR = "already known"
+
+# The transaction's nonce is used, by it or by another transaction; only
+# a node that knows the transaction's hash proves it was ours
+NONCE_USED_ERROR = "nonce too low"
+
+CHAINS = {
+    "arb": ("HLEXEC_ARB_RPC", ARB_PROD_RPCS, ARB_TEST_RPCS),
+    "hyperevm": ("HLEXEC_HYPEREVM_RPC", HYPEREVM_PROD_RPCS, HYPEREVM_TEST_RPCS),
+}
+
+
+def _submit(fn: Callable[..., Any], *args: Any) -> Future:
+    """Run `fn` on a daemon thread: a hedged request that lost, or a node
+    that hangs, must not keep the process alive at exit."""
+    future: Future = Future()
+
+    def target() -> None:
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+class _InvalidResponse(Exception):
+    """A response the endpoint returned but that cannot be used (e.g. a
+    whole-batch rejection); kept so it can be returned if no node does better."""
+
+    def __init__(self, response: Any):
+        super().__init__(str(response))
+        self.response = response
+
+
+class Endpoint:
+    """One RPC node and its running latency/health statistics."""
+
+    def __init__(self, url: str, provider: Any):
+        self.url = url
+        self.provider = provider
+        self.latency: float | None = None
+        self.block: int | None = None
+        self.requests = 0
+        self.errors = 0
+        self.hedges_won = 0
+        self.down_until = 0.0
+        self.last_error: str | None = None
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def record_latency(self, elapsed: float) -> None:
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += EWMA_ALPHA * (elapsed - self.latency)
+
+
+class RpcPool:
+    """A set of RPC endpoints for one chain with latency-ranked routing.
+
+    - Endpoints are ranked by a moving average of their latency; failed
+      endpoints sit out a cooldown and rank last.
+    - Reads are hedged: if the fastest endpoint has not answered within
+      a multiple of its usual latency, the next one is asked as well.
+    - Any error (connection, timeout, HTTP status, rejected batch) fails
+      over to the next endpoint, unless `failover` is off. JSON-RPC errors
+      such as a revert are answers, not failures, and are returned as-is.
+    - Latencies are persisted to `stats_path`, so a later run can rank the
+      endpoints without probing them first.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        timeout: float = REQUEST_TIMEOUT,
+        make_provider: Callable[[str, float], Any] | None = None,
+        stats_path: Path | None = None,
+    ):
+        if not urls:
+            raise ValueError("An RPC pool needs at least one endpoint")
+        make_provider = make_provider or _http_provider
+        self.endpoints = [Endpoint(url, make_provider(url, timeout)) for url in urls]
+        self.stats_path = stats_path
+        self._lock = threading.Lock()
+        self._probed = len(urls) == 1 or self._load_stats()
+
+    def ranked(self) -> List[Endpoint]:
+        """Healthy endpoints by latency (unmeasured ones after measured ones),
+        then endpoints in cooldown by when they come back."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [e for e in self.endpoints if e.healthy(now)]
+            down = [e for e in self.endpoints if not e.healthy(now)]
+        healthy.sort(key=lambda e: (e.latency is None, e.latency or 0.0))
+        down.sort(key=lambda e: e.down_until)
+        return healthy + down
+
+    def probe(self, wait_all: bool = False) -> None:
+        """Time `eth_blockNumber` on every endpoint concurrently.
+
+        Returns once the first endpoint answers (the rest keep updating the
+        statistics in the background), or after all of them with `wait_all`.
+        """
+        futures = {
+            _submit(self._probe_one, endpoint): endpoint for endpoint in self.endpoints
+        }
+        remaining = set(futures)
+        while remaining:
+            done, remaining = wait(
+                remaining, timeout=PROBE_TIMEOUT, return_when=FIRST_COMPLETED
+            )
+            if not done:
+                break
+            if not wait_all and any(f.result() for f in done):
+                break
+        self._probed = True
+        if remaining:
+            threading.Thread(
+                target=lambda: (wait(remaining), self.save_stats()), daemon=True
+            ).start()
+        else:
+            self.save_stats()
+
+    def _probe_one(self, endpoint: Endpoint) -> bool:
+        try:
+            response = self._call(
+                endpoint,
+                lambda p: p.make_request(RPCEndpoint("eth_blockNumber"), []),
+                lambda r: isinstance(r, dict) and "result" in r,
+            )
+        except Exception:
+            return False
+        endpoint.block = int(response["result"], 16)
+        return True
+
+    def _call(
+        self,
+        endpoint: Endpoint,
+        call: Callable[[Any], Any],
+        valid: Callable[[Any], bool] | None,
+    ) -> Any:
+        start = time.monotonic()
+        try:
+            response = call(endpoint.provider)
+            if valid is not None and not valid(response):
+                raise _InvalidResponse(response)
+        except Exception as e:
+            with self._lock:
+                endpoint.errors += 1
+                endpoint.down_until = time.monotonic() + COOLDOWN_S
+                endpoint.last_error = (
+                    "invalid response"
+                    if isinstance(e, _InvalidResponse)
+                    else type(e).__name__
+                )
+            raise
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.record_latency(time.monotonic() - start)
+        return response
+
+    def _hedge_delay(self, endpoint: Endpoint) -> float:
+        if endpoint.latency is None:
+            return 4 * HEDGE_MIN_S
+        return max(HEDGE_MIN_S, HEDGE_FACTOR * endpoint.latency)
+
+    def request(
+        self,
+        call: Callable[[Any], Any],
+        hedge: bool = True,
+        valid: Callable[[Any], bool] | None = None,
+        failover: bool = True,
+    ) -> Any:
+        """Run `call(provider)` on the best endpoint, hedging and failing over.
+
+        Raises the last error if every endpoint failed; if some endpoint
+        answered with an invalid response, that response is returned instead.
+        """
+        if not self._probed:
+            self.probe()
+        order = self.ranked()
+        pending: Dict[Future, Endpoint] = {}
+        hedges = set()
+        next_index = 0
+        last_error: Exception | None = None
+        invalid: List[Any] = []
+
+        def launch() -> Future:
+            nonlocal next_index
+            endpoint = order[next_index]
+            next_index += 1
+            future = _submit(self._call, endpoint, call, valid)
+            pending[future] = endpoint
+            return future
+
+        launch()
+        while pending:
+            timeout = None
+            if hedge and len(pending) == 1 and next_index < len(order):
+                timeout = self._hedge_delay(next(iter(pending.values())))
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedges.add(launch())
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    result = future.result()
+                except _InvalidResponse as e:
+                    invalid.append(e.response)
+                    continue
+                except Exception as e:
+                    last_error = e
+                    continue
+                if future in hedges:
+                    with self._lock:
+                        endpoint.hedges_won += 1
+                return result
+            if failover and not pending and next_index < len(order):
+                launch()
+
+        if invalid:
+            return invalid[-1]
+        assert last_error is not None
+        raise last_error
+
+    def _load_stats(self) -> bool:
+        if self.stats_path is None:
+            return False
+        try:
+            data = json.loads(self.stats_path.read_text())
+        except (OSError, ValueError):
+            return False
+        if time.time() - float(data.get("time") or 0) > STATS_MAX_AGE_S:
+            return False
+        latencies = data.get("latency") or {}
+        for endpoint in self.endpoints:
+            if latencies.get(endpoint.url) is not None:
+                endpoint.latency = float(latencies[endpoint.url])
+        return any(endpoint.latency is not None for endpoint in self.endpoints)
+
+    def save_stats(self) -> None:
+        if self.stats_path is None:
+            return
+        with self._lock:
+            latencies = {e.url: e.latency for e in self.endpoints}
+        tmp = self.stats_path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps({"time": time.time(), "latency": latencies}))
+            os.replace(tmp, self.stats_path)
+        except OSError:
+            pass
+
+
+class PoolProvider(JSONBaseProvider):
+    """web3 provider that sends every request through an RpcPool."""
+
+    def __init__(self, pool: RpcPool):
+        super().__init__()
+        self.pool = pool
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> Any:
+        with timed("rpc", method):
+            if method == "eth_sendRawTransaction":
+                return self.send_raw_transaction(method, params)
+            read = method not in WRITE_METHODS
+            return self.pool.request(
+                lambda provider: provider.make_request(method, params),
+                hedge=read,
+                failover=read,
+            )
+
+    def send_raw_transaction(self, method: RPCEndpoint, params: Any) -> Any:
+        """Send a signed transaction, failing over without hedging.
+
+        The endpoint that failed may have broadcast the transaction anyway,
+        so a later endpoint that reports it as already known counts as
+        success, answered with the transaction's hash. "nonce too low" does
+        too, but only if that endpoint knows the hash; another transaction
+        may have used the nonce, so otherwise the error stands.
+        """
+        raw = params[0]
+        tx_hash = Web3.to_hex(
+            Web3.keccak(hexstr=raw) if isinstance(raw, str) else Web3.keccak(raw)
+        )
+        attempts = []
+
+        def call(provider: Any) -> Any:
+            attempts.append(provider)
+            response = provider.make_request(method, params)
+            if len(attempts) == 1:
+                return response
+            message = _error_message(response)
+            if NONCE_USED_ERROR in message:
+                known = provider.make_request(
+                    RPCEndpoint("eth_getTransactionByHash"), [tx_hash]
+                )
+                if not (isinstance(known, dict) and known.get("result")):
+                    return response
+            elif ALREADY_KNOWN_ERROR not in message:
+                return response
+            return {"jsonrpc": "2.0", "id": response.get("id"), "result": tx_hash}
+
+        return self.pool.request(call, hedge=False)
+
+    def make_batch_request(self, requests: List[Tuple[RPCEndpoint, Any]]) -> Any:
+        read = not any(method in WRITE_METHODS for method, _ in requests)
+        with timed("rpc", "batch", methods=[method for method, _ in requests]):
+            return self.pool.request(
+                lambda provider: provider.make_batch_request(requests),
+                hedge=read,
+                valid=lambda response: isinstance(response, list),
+                failover=read,
+            )
+
+
+def _error_message(response: Any) -> str:
+    """The lowercased JSON-RPC error message of `response`, or ""."""
+    if not isinstance(response, dict) or not isinstance(response.get("error"), dict):
+        return ""
+    return str(response["error"].get("message") or "").lower()
+
+
+def _http_provider(url: str, timeout: float) -> HTTPProvider:
+    # The pool fails over itself, so the provider must not retry internally
+    return HTTPProvider(
+        url,
+        request_kwargs={"timeout": timeout},
+        exception_retry_configuration=None,
+    )
+
+
+def rpc_urls(chain: str, production: bool) -> List[str]:
+    """Endpoints for `chain` ("arb" or "hyperevm").
+
+    Set `HLEXEC_ARB_RPC` / `HLEXEC_HYPEREVM_RPC` to a comma-separated list
+    to replace the defaults, e.g. with a local fork (anvil).
+    """
+    env, prod_urls, test_urls = CHAINS[chain]
+    override = os.getenv(env)
+    if override:
+        return [url.strip() for url in override.split(",") if url.strip()]
+    return list(prod_urls if production else test_urls)
+
+
+def rpc_pool(chain: str, production: bool) -> RpcPool:
+    return RpcPool(
+        rpc_urls(chain, production),
+        stats_path=cache_dir(production) / f"rpc-{chain}.json",
+    )
+
+
+def pool_provider(chain: str, production: bool) -> PoolProvider:
+    return PoolProvider(rpc_pool(chain, production))
+
+
+def run(production: bool, chain: str) -> None:
+    """Probe every endpoint of the chain's RPC pool and show its statistics"""
+    pool = rpc_pool(chain, production)
+    pool.probe(wait_all=True)
+    ranked = pool.ranked()
+    _render_pool(Console(), chain, ranked)
+    if not any(endpoint.block is not None for endpoint in ranked):
+        raise click.ClickException("No RPC endpoint answered")
+
+
+def _render_pool(console: Console, chain: str, endpoints: List[Endpoint]) -> None:
+    now = time.monotonic()
+    best_block = max((e.block for e in endpoints if e.block is not None), default=0)
+    table = Table(
+        box=box.ROUNDED,
+        title=f"RPC Pool ({chain})",
+        title_style="bold bright_cyan",
+        title_justify="left",
+    )
+    table.add_column("#", justify="right")
+    table.add_column("Endpoint", style="bold cyan", no_wrap=True)
+    table.add_column("Latency", justify="right")
+    table.add_column("Block", justify="right")
+    table.add_column("Status")
+    for rank, endpoint in enumerate(endpoints, 1):
+        latency = (
+            f"{endpoint.latency * 1000:.0f} ms" if endpoint.latency is not None else "-"
+        )
+        block = "-"
+        if endpoint.block is not None:
+            lag = best_block - endpoint.block
+            block = f"{endpoint.block:,}" + (f" (-{lag})" if lag else "")
+        if endpoint.healthy(now):
+            status = Text("✅ healthy", style="green")
+        else:
+            status = Text(f"❌ {endpoint.last_error or 'down'}", style="red")
+        table.add_row(str(rank), endpoint.url, latency, block, status)
+    console.print(table)
@@ -15,6 +15,10 @@ import re
 import click
 import os
 
+from .rate_limit import RateLimiter, rate_limited
+from .retry import REQUEST_TIMEOUT_S
+from .tracing import TRACER, traced
+
 
 def _resolve_private_key(cli_private_key: Optional[str]) -> str:
     """Choose private key from CLI if provided, else from env (.env loaded)."""
@@ -42,6 +46,20 @@ def _resolve_account_address(cli_account_address: Optional[str]) -> ChecksumAddr
     return Web3.to_checksum_address(env_address)
 
 
+def api_url(production: bool) -> str:
+    """HyperLiquid API base URL for the environment.
+
+    `HLEXEC_API_URL` points every command at another server instead, such as
+    the local mock used by the benchmarks. The SDK signs for mainnet only
+    when talking to the mainnet URL, so overridden URLs get testnet
+    signatures.
+    """
+    override = os.getenv("HLEXEC_API_URL")
+    if override:
+        return override.rstrip("/")
+    return constants.MAINNET_API_URL if production else constants.TESTNET_API_URL
+
+
 def setup(
     production: bool, private_key: Optional[str], account_address: Optional[str]
 ) -> Tuple[Info, Exchange, str, LocalAccount]:
@@ -50,13 +68,33 @@ def setup(
     - If `private_key` is provided, use it; otherwise load from .env (PRIVATE_KEY).
     - `production=True` selects mainnet; `False` uses testnet.
     """
-    pk = _resolve_private_key(private_key)
-    address = _resolve_account_address(account_address)
-    account = eth_account.Account.from_key(pk)  # type: ignore[attr-defined]
-    base_url = constants.MAINNET_API_URL if production else constants.TESTNET_API_URL
-
-    info = Info(base_url, skip_ws=True)
-    exchange = Exchange(wallet=account, base_url=base_url, account_address=address)
+    with TRACER.span("setup"):
+        pk = _resolve_private_key(private_key)
+        address = _resolve_account_address(account_address)
+        with TRACER.span("setup.account"):
+            account = eth_account.Account.from_key(pk)  # type: ignore[attr-defined]
+        base_url = api_url(production)
+
+        # Both constructors download the perp and spot metadata
+        with TRACER.span("setup.info"):
+            info = Info(base_url, skip_ws=True, timeout=REQUEST_TIMEOUT_S)
+        with TRACER.span("setup.exchange"):
+            exchange = Exchange(
+                wallet=account,
+                base_url=base_url,
+                account_address=address,
+                timeout=REQUEST_TIMEOUT_S,
+            )
+
+    # Every request from here on is timed, and queues on the budget shared
+    # by all hlexec processes; actions also count against the acting
+    # address's allowance
+    limiter = RateLimiter.shared(production)
+    rate_limited(traced(info, "info"), limiter)
+    rate_limited(traced(exchange.info, "info"), limiter)
+    rate_limited(
+        traced(exchange, "exchange"), limiter, exchange.vault_address or address
+    )
 
     env_label = "production" if production else "testnet"
     console = Console()
@@ -7,6 +7,8 @@ from rich.console import Console
 from rich.table import Table
 from rich.text import Text
 from rich import box
+from .account_state import AccountStateService, load_state
+from .market_data import MarketDataReader
 from .setup import setup
 
 
@@ -55,7 +57,12 @@ def _normalize_positions(
     return normalized
 
 
-def _render_positions(console: Console, positions: List[Dict[str, Any]]) -> None:
+def _render_positions(
+    console: Console,
+    positions: List[Dict[str, Any]],
+    marks: Dict[str, float] | None = None,
+) -> None:
+    """Render positions; with `marks`, show them and derive uPnL from them."""
     if not positions:
         console.print(Text("No open positions", style="dim"))
         return
@@ -72,6 +79,8 @@ def _render_positions(console: Console, positions: List[Dict[str, Any]]) -> None
     table.add_column("Size")
     table.add_column("Lev")
     table.add_column("Entry Px")
+    if marks is not None:
+        table.add_column("Mark Px")
     table.add_column("Value")
     table.add_column("Unreal PnL", justify="right")
     table.add_column("ROE", justify="right")
@@ -100,6 +109,12 @@ def _render_positions(console: Console, positions: List[Dict[str, Any]]) -> None
         value = p.get("positionValue") or p.get("value")
         upnl = p.get("unrealizedPnl")
         margin_used = p.get("marginUsed")
+        mark = marks.get(coin) if marks is not None else None
+        if mark is not None and entry_px is not None:
+            try:
+                upnl = float(p["szi"]) * (mark - float(entry_px))
+            except (KeyError, ValueError, TypeError):
+                pass
 
         try:
             if margin_used and upnl:
@@ -114,11 +129,11 @@ def _render_positions(console: Console, positions: List[Dict[str, Any]]) -> None
         roe_text = _colorize_number(roe, "%", is_already_percentage=True)
         upnl_text = _colorize_number(upnl)
 
+        cells = [coin, size, str(lev_str), str(entry_px or "-")]
+        if marks is not None:
+            cells.append(f"{mark:g}" if mark is not None else "-")
         table.add_row(
-            coin,
-            size,
-            str(lev_str),
-            str(entry_px or "-"),
+            *cells,
             str(value or "-"),
             upnl_text,
             roe_text,
@@ -182,15 +197,8 @@ def run(production: bool, private_key: str | None, account_address: str | None)
     """Get positions and open orders and render with Rich tables."""
     info, _exchange, address, _account = setup(production, private_key, account_address)
 
-    try:
-        state: Dict[str, Any] = info.user_state(address)
-    except Exception as e:
-        raise click.ClickException(f"Failed to fetch user_state: {e}")
-
-    positions_raw: List[Dict[str, Any]] = (
-        state.get("assetPositions") or state.get("positions") or []
-    )
-    positions = _normalize_positions(positions_raw)
+    state = load_state(AccountStateService(info), address)
+    positions = _normalize_positions(state.asset_positions)
 
     try:
         open_orders: List[Dict[str, Any]] = info.open_orders(address)
@@ -198,8 +206,15 @@ def run(production: bool, private_key: str | None, account_address: str | None)
         click.echo(f"Warning: failed to fetch open_orders: {e}", err=True)
         open_orders = []
 
+    # Live marks from a running `hlexec feed`, read without network I/O
+    marks = None
+    reader = MarketDataReader.open(production)
+    if reader is not None:
+        marks = reader.marks([str(p.get("coin")) for p in positions])
+        reader.close()
+
     console = Console()
     _space(console, 1)
-    _render_positions(console, positions)
+    _render_positions(console, positions, marks)
     _space(console, 1)
     _render_open_orders(console, open_orders)
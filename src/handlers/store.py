@@ -0,0 +1,397 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+import json
+import sqlite3
+import time
+
+from hyperliquid.utils.types import Cloid
+
+from .cache import cache_dir
+
+# userFillsByTime returns at most this many fills per response
+FILLS_PAGE_SIZE = 2000
+
+# userFunding returns at most this many payments per response
+FUNDING_PAGE_SIZE = 500
+
+# Funding history is fetched in windows of this length, concurrently
+FUNDING_WINDOW_MS = 2 * 86_400_000
+FUNDING_WORKERS = 8
+
+# Funding is paid hourly; the newest hour is re-read on the next sync
+FUNDING_LAG_MS = 3_600_000
+
+# Order statuses that can still change; everything else is final
+LIVE_ORDER_STATUSES = frozenset({"open", "triggered"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    user TEXT NOT NULL,
+    oid INTEGER NOT NULL,
+    cloid TEXT,
+    coin TEXT NOT NULL,
+    status TEXT NOT NULL,
+    status_timestamp INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (user, oid)
+);
+CREATE INDEX IF NOT EXISTS orders_by_cloid ON orders (user, cloid);
+CREATE INDEX IF NOT EXISTS orders_by_coin ON orders (user, coin, timestamp);
+CREATE INDEX IF NOT EXISTS orders_by_time ON orders (user, timestamp);
+
+CREATE TABLE IF NOT EXISTS fills (
+    user TEXT NOT NULL,
+    tid INTEGER NOT NULL,
+    oid INTEGER NOT NULL,
+    coin TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    side TEXT NOT NULL,
+    px REAL NOT NULL,
+    sz REAL NOT NULL,
+    start_position REAL NOT NULL,
+    closed_pnl REAL NOT NULL,
+    fee REAL NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (user, tid)
+);
+CREATE INDEX IF NOT EXISTS fills_by_oid ON fills (user, oid);
+CREATE INDEX IF NOT EXISTS fills_by_coin ON fills (user, coin, time);
+CREATE INDEX IF NOT EXISTS fills_by_time ON fills (user, time);
+
+CREATE TABLE IF NOT EXISTS funding (
+    user TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    coin TEXT NOT NULL,
+    usdc REAL NOT NULL,
+    szi REAL NOT NULL,
+    funding_rate REAL NOT NULL,
+    PRIMARY KEY (user, coin, time)
+);
+CREATE INDEX IF NOT EXISTS funding_by_time ON funding (user, time);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    user TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    high_water INTEGER NOT NULL DEFAULT 0,
+    low_water INTEGER,
+    PRIMARY KEY (user, kind)
+);
+"""
+
+
+def _funding_window(info: Any, user: str, start: int, end: int) -> List[Dict[str, Any]]:
+    """All funding payments in [start, end], paging forwards on full pages."""
+    payments: List[Dict[str, Any]] = []
+    while True:
+        page = info.user_funding_history(user, start, end) or []
+        payments.extend(page)
+        if len(page) < FUNDING_PAGE_SIZE:
+            return payments
+        latest = max(int(p.get("time") or 0) for p in page)
+        if latest <= start:
+            return payments
+        # Inclusive restart: payments sharing `latest` are upserted, not missed
+        start = latest
+
+
+def is_final(order_entry: Dict[str, Any]) -> bool:
+    """True when an order entry ({"order", "status", "statusTimestamp"}) can no longer change."""
+    return order_entry.get("status") not in LIVE_ORDER_STATUSES
+
+
+class OrderStore:
+    """Embedded SQLite store of a user's orders, fills and funding payments.
+
+    Orders are kept in the shape of the `orderStatus` info response's `order`
+    field so cached rows can stand in for a network lookup. Fills and orders
+    are synced incrementally from a per-user high-water mark; funding also
+    keeps a low-water mark, the earliest time synced.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(_SCHEMA)
+
+    @classmethod
+    def open(cls, production: bool) -> "OrderStore":
+        return cls(cache_dir(production) / "orders.sqlite3")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -- high-water marks -- #
+
+    def high_water(self, user: str, kind: str) -> int:
+        row = self.conn.execute(
+            "SELECT high_water FROM sync_state WHERE user = ? AND kind = ?",
+            (user.lower(), kind),
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def _set_high_water(self, user: str, kind: str, value: int) -> None:
+        self.conn.execute(
+            "INSERT INTO sync_state (user, kind, high_water) VALUES (?, ?, ?) "
+            "ON CONFLICT (user, kind) DO UPDATE SET high_water = "
+            "MAX(high_water, excluded.high_water)",
+            (user.lower(), kind, value),
+        )
+
+    def low_water(self, user: str, kind: str) -> Optional[int]:
+        """Earliest time synced for `kind`, or None before the first sync."""
+        row = self.conn.execute(
+            "SELECT low_water FROM sync_state WHERE user = ? AND kind = ?",
+            (user.lower(), kind),
+        ).fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+    def _set_low_water(self, user: str, kind: str, value: int) -> None:
+        self.conn.execute(
+            "INSERT INTO sync_state (user, kind, low_water) VALUES (?, ?, ?) "
+            "ON CONFLICT (user, kind) DO UPDATE SET low_water = "
+            "MIN(COALESCE(low_water, excluded.low_water), excluded.low_water)",
+            (user.lower(), kind, value),
+        )
+
+    # -- orders -- #
+
+    def put_orders(self, user: str, entries: List[Dict[str, Any]]) -> int:
+        """Upsert order entries, ignoring any older than the stored status."""
+        rows = []
+        for entry in entries:
+            order = entry.get("order")
+            if not isinstance(order, dict) or "oid" not in order:
+                continue
+            rows.append(
+                (
+                    user.lower(),
+                    int(order["oid"]),
+                    str(order["cloid"]).lower() if order.get("cloid") else None,
+                    str(order.get("coin", "")),
+                    str(entry.get("status", "unknown")),
+                    int(entry.get("statusTimestamp") or 0),
+                    int(order.get("timestamp") or 0),
+                    json.dumps(entry, separators=(",", ":")),
+                )
+            )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO orders (user, oid, cloid, coin, status, status_timestamp, "
+                "timestamp, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user, oid) DO UPDATE SET cloid = excluded.cloid, "
+                "coin = excluded.coin, status = excluded.status, "
+                "status_timestamp = excluded.status_timestamp, "
+                "timestamp = excluded.timestamp, body = excluded.body "
+                "WHERE excluded.status_timestamp >= orders.status_timestamp",
+                rows,
+            )
+        return len(rows)
+
+    def get_order(
+        self, user: str, oid_or_cloid: Union[int, Cloid, str]
+    ) -> Optional[Dict[str, Any]]:
+        """Return a cached order as an `orderStatus` response, or None on a miss."""
+        if isinstance(oid_or_cloid, int):
+            row = self.conn.execute(
+                "SELECT body FROM orders WHERE user = ? AND oid = ?",
+                (user.lower(), oid_or_cloid),
+            ).fetchone()
+        else:
+            cloid = (
+                oid_or_cloid.to_raw()
+                if isinstance(oid_or_cloid, Cloid)
+                else str(oid_or_cloid)
+            )
+            row = self.conn.execute(
+                "SELECT body FROM orders WHERE user = ? AND cloid = ? "
+                "ORDER BY timestamp DESC LIMIT 1",
+                (user.lower(), cloid.lower()),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": "order", "order": json.loads(row[0])}
+
+    # -- fills -- #
+
+    def put_fills(self, user: str, fills: List[Dict[str, Any]]) -> int:
+        rows = []
+        for f in fills:
+            if "tid" not in f:
+                continue
+            rows.append(
+                (
+                    user.lower(),
+                    int(f["tid"]),
+                    int(f.get("oid") or 0),
+                    str(f.get("coin", "")),
+                    int(f.get("time") or 0),
+                    str(f.get("side", "")),
+                    float(f.get("px") or 0),
+                    float(f.get("sz") or 0),
+                    float(f.get("startPosition") or 0),
+                    float(f.get("closedPnl") or 0),
+                    float(f.get("fee") or 0),
+                    json.dumps(f, separators=(",", ":")),
+                )
+            )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO fills (user, tid, oid, coin, time, side, px, sz, "
+                "start_position, closed_pnl, fee, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def fills_for_order(self, user: str, oid: int) -> List[Dict[str, Any]]:
+        cur = self.conn.execute(
+            "SELECT body FROM fills WHERE user = ? AND oid = ? ORDER BY time",
+            (user.lower(), oid),
+        )
+        return [json.loads(body) for (body,) in cur]
+
+    def fill_rows(self, user: str, since: int = 0) -> sqlite3.Cursor:
+        """Fills at or after `since` as (coin, time, tid, is_buy, px, sz,
+        start_position, closed_pnl, fee) tuples, for bulk array conversion."""
+        return self.conn.execute(
+            "SELECT coin, time, tid, side = 'B', px, sz, start_position, closed_pnl, fee "
+            "FROM fills WHERE user = ? AND time >= ?",
+            (user.lower(), since),
+        )
+
+    # -- funding -- #
+
+    def put_funding(self, user: str, payments: List[Dict[str, Any]]) -> int:
+        rows = []
+        for p in payments:
+            delta = p.get("delta") or {}
+            if delta.get("type") != "funding":
+                continue
+            rows.append(
+                (
+                    user.lower(),
+                    int(p.get("time") or 0),
+                    str(delta.get("coin", "")),
+                    float(delta.get("usdc") or 0),
+                    float(delta.get("szi") or 0),
+                    float(delta.get("fundingRate") or 0),
+                )
+            )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO funding (user, time, coin, usdc, szi, funding_rate) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def funding_rows(
+        self, user: str, start: int = 0, end: Optional[int] = None
+    ) -> sqlite3.Cursor:
+        """Funding payments as (coin, time, usdc) tuples."""
+        return self.conn.execute(
+            "SELECT coin, time, usdc FROM funding "
+            "WHERE user = ? AND time >= ? AND time <= ?",
+            (user.lower(), start, end if end is not None else 2**62),
+        )
+
+    # -- sync -- #
+
+    def sync(self, info: Any, user: str) -> Dict[str, int]:
+        """Pull new fills and order updates since the last sync.
+
+        Returns the number of fills and orders written.
+        """
+        fills_written = self._sync_fills(info, user)
+        orders_written = self._sync_orders(info, user)
+        return {"fills": fills_written, "orders": orders_written}
+
+    def _sync_fills(self, info: Any, user: str) -> int:
+        start = self.high_water(user, "fills")
+        written = 0
+        while True:
+            # Start inclusively at the mark: fills sharing that millisecond
+            # are upserted by tid rather than missed.
+            page = info.user_fills_by_time(user, start) or []
+            if not page:
+                break
+            written += self.put_fills(user, page)
+            latest = max(int(f.get("time") or 0) for f in page)
+            with self.conn:
+                self._set_high_water(user, "fills", latest)
+            if len(page) < FILLS_PAGE_SIZE or latest <= start:
+                break
+            start = latest
+        return written
+
+    def sync_funding(
+        self,
+        info: Any,
+        user: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        max_workers: int = FUNDING_WORKERS,
+    ) -> int:
+        """Pull funding payments in [start, end] that are not cached yet.
+
+        Only ranges outside the synced span are fetched: payments since the
+        high-water mark, plus history before the low-water mark when `start`
+        reaches further back than any previous sync. Ranges longer
+        than FUNDING_WINDOW_MS are split into windows fetched concurrently.
+        """
+        end = int(time.time() * 1000) if end is None else end
+        high = self.high_water(user, "funding")
+        low = self.low_water(user, "funding")
+
+        # The synced span stays contiguous: the gap since the last sync is
+        # always filled, even when `start` is later than the high-water mark.
+        if not high or low is None:
+            ranges = [(start, end)]
+        else:
+            ranges = [(high, end)]
+            if start < low:
+                ranges.append((start, low))
+
+        windows = []
+        for lo, hi in ranges:
+            while True:
+                windows.append((lo, min(lo + FUNDING_WINDOW_MS, hi)))
+                lo += FUNDING_WINDOW_MS
+                if lo >= hi:
+                    break
+        if len(windows) == 1:
+            pages = [_funding_window(info, user, *windows[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                pages = list(
+                    pool.map(lambda w: _funding_window(info, user, *w), windows)
+                )
+
+        written = sum(self.put_funding(user, page) for page in pages)
+        with self.conn:
+            self._set_low_water(user, "funding", start)
+            # Re-read the trailing hour next time in case its payment had
+            # not been booked yet when this sync ran.
+            self._set_high_water(user, "funding", end - FUNDING_LAG_MS)
+        return written
+
+    def _sync_orders(self, info: Any, user: str) -> int:
+        mark = self.high_water(user, "orders")
+        entries = [
+            e
+            for e in (info.historical_orders(user) or [])
+            if int(e.get("statusTimestamp") or 0) >= mark
+        ]
+        if not entries:
+            return 0
+        written = self.put_orders(user, entries)
+        with self.conn:
+            self._set_high_water(
+                user,
+                "orders",
+                max(int(e.get("statusTimestamp") or 0) for e in entries),
+            )
+        return written
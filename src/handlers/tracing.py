@@ -0,0 +1,246 @@
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+import functools
+import threading
+import time
+from rich.console import Console
+
+# Latency histogram bucket bounds, in seconds
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Span:
+    """One timed operation; `children` are the spans opened inside it."""
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.children: List[Span] = []
+        self.error: str | None = None
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.thread = threading.current_thread().name
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.perf_counter()
+        span: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((end - self.start) * 1000, 3),
+        }
+        if self.thread != "MainThread":
+            span["thread"] = self.thread
+        if self.attrs:
+            span["attrs"] = self.attrs
+        if self.error is not None:
+            span["error"] = self.error
+        if self.children:
+            span["children"] = [child.to_dict(origin) for child in self.children]
+        return span
+
+
+class Tracer:
+    """Collects a tree of spans for one command while enabled.
+
+    Each thread nests its spans on its own stack; spans opened on worker
+    threads (action queues, hedged RPC calls) hang off the root span.
+    While disabled, `span` costs one attribute check.
+    """
+
+    def __init__(self) -> None:
+        self.root: Span | None = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self, name: str, **attrs: Any) -> None:
+        self.root = Span(name, attrs)
+        self._local = threading.local()
+
+    def finish(self) -> Dict[str, Any] | None:
+        """Stop tracing; returns the span tree, or None if it was not on."""
+        root, self.root = self.root, None
+        if root is None:
+            return None
+        root.end = time.perf_counter()
+        return root.to_dict(root.start)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span | None]:
+        root = self.root
+        if root is None:
+            yield None
+            return
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        span = Span(name, attrs)
+        with self._lock:
+            (stack[-1] if stack else root).children.append(span)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+
+
+class Metrics:
+    """Request counts, error counts and latency histograms per (kind, name),
+    rendered in the Prometheus text exposition format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_S):
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _empty(self) -> Dict[str, Any]:
+        return {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "errors": 0}
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool) -> None:
+        with self._lock:
+            series = self._series.get((kind, name))
+            if series is None:
+                series = self._series[(kind, name)] = self._empty()
+            series["counts"][bisect_left(self.buckets, seconds)] += 1
+            series["sum"] += seconds
+            series["errors"] += error
+
+    def render(self) -> str:
+        with self._lock:
+            series = sorted(
+                (key, dict(s, counts=list(s["counts"])))
+                for key, s in self._series.items()
+            )
+        lines = [
+            "# HELP hlexec_requests_total Requests sent, by API and method",
+            "# TYPE hlexec_requests_total counter",
+        ]
+        for (kind, name), s in series:
+            lines.append(
+                f"hlexec_requests_total{_labels(kind, name)} {sum(s['counts'])}"
+            )
+        lines += [
+            "# HELP hlexec_request_errors_total Requests that raised, by API and method",
+            "# TYPE hlexec_request_errors_total counter",
+        ]
+        for (kind, name), s in series:
+            lines.append(
+                f"hlexec_request_errors_total{_labels(kind, name)} {s['errors']}"
+            )
+        lines += [
+            "# HELP hlexec_request_duration_seconds Request latency, by API and method",
+            "# TYPE hlexec_request_duration_seconds histogram",
+        ]
+        for (kind, name), s in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), s["counts"]):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(
+                    "hlexec_request_duration_seconds_bucket"
+                    f"{_labels(kind, name, le=le)} {cumulative}"
+                )
+            labels = _labels(kind, name)
+            lines.append(f"hlexec_request_duration_seconds_sum{labels} {s['sum']:.6f}")
+            lines.append(f"hlexec_request_duration_seconds_count{labels} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(kind: str, name: str, **extra: Any) -> str:
+    labels = {"api": kind, "method": name, **extra}
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+TRACER = Tracer()
+METRICS = Metrics()
+
+
+@contextmanager
+def timed(kind: str, name: str, **attrs: Any) -> Iterator[None]:
+    """Time one request: a `kind.name` span when tracing, plus metrics."""
+    start = time.perf_counter()
+    error = False
+    try:
+        with TRACER.span(f"{kind}.{name}", **attrs):
+            yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        METRICS.observe(kind, name, time.perf_counter() - start, error)
+
+
+def _request_name(url_path: str, payload: Any) -> str:
+    payload = payload or {}
+    if url_path == "/exchange":
+        return (payload.get("action") or {}).get("type", "unknown")
+    return payload.get("type", "unknown")
+
+
+def traced(client: Any, kind: str) -> Any:
+    """Time every `client.post` (an SDK `API`, `Info` or `Exchange`) as a
+    `kind` request named after the info or action type. Returns the client."""
+    post = client.post
+
+    def traced_post(url_path: str, payload: Any = None) -> Any:
+        with timed(kind, _request_name(url_path, payload)):
+            return post(url_path, payload)
+
+    client.post = traced_post
+    return client
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve METRICS on http://host:port/metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = METRICS.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _spanned(owner: Any, attr: str, name: str) -> None:
+    """Replace `owner.attr` with a version that runs inside a `name` span."""
+    fn: Callable[..., Any] = getattr(owner, attr)
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with TRACER.span(name):
+            return fn(*args, **kwargs)
+
+    setattr(owner, attr, wrapper)
+
+
+def start_trace(command: str, sign_modules: Sequence[Any]) -> None:
+    """Trace `command`, with a span around every `sign_*` function of
+    `sign_modules` and every Rich console print."""
+    TRACER.start(command)
+    for module in sign_modules:
+        for attr in dir(module):
+            if attr.startswith("sign_") and callable(getattr(module, attr)):
+                _spanned(module, attr, f"sign.{attr[len('sign_') :]}")
+    _spanned(Console, "print", "render")
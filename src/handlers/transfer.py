@@ -1 +1,266 @@
+from __future__ import annotations
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Sequence
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from web3 import Web3
+from .actions import (
+    ActionNonces,
+    ActionQueue,
+    action_error,
+    spot_send,
+    usd_class_transfer,
+    usd_send,
+    vault_transfer,
+)
+from .setup import setup
 
+# Row formats, as given on the command line or per line of a transfer file
+TRANSFER_FORMATS = {
+    "usd": "usd,<destination>,<amount>",
+    "spot": "spot,<destination>,<token>,<amount>",
+    "to-perp": "to-perp,<amount>",
+    "to-spot": "to-spot,<amount>",
+    "vault-deposit": "vault-deposit,<vault>,<amount>",
+    "vault-withdraw": "vault-withdraw,<vault>,<amount>",
+}
+
+# Vault transfers are denominated in micro-USDC
+USD_DECIMALS = 6
+
+# Sends only spend from a balance, so consecutive sends are submitted
+# together; class and vault transfers refill balances that later rows may
+# spend, so each one runs alone, after the rows above it
+CONCURRENT_KINDS = {"usd", "spot"}
+
+
+class Transfer:
+    """One transfer row: `kind` is a TRANSFER_FORMATS key, `destination` is
+    the receiving account or vault (empty for class transfers)."""
+
+    def __init__(
+        self,
+        kind: str,
+        amount: Decimal,
+        destination: str = "",
+        token: str = "",
+    ):
+        self.kind = kind
+        self.amount = amount
+        self.destination = destination
+        self.token = token
+
+    def describe(self) -> str:
+        if self.kind == "usd":
+            return f"${self.amount} → {self.destination}"
+        if self.kind == "spot":
+            return f"{self.amount} {self.token} → {self.destination}"
+        if self.kind in ("to-perp", "to-spot"):
+            side = "spot → perp" if self.kind == "to-perp" else "perp → spot"
+            return f"${self.amount} {side}"
+        verb = "into" if self.kind == "vault-deposit" else "out of"
+        return f"${self.amount} {verb} vault {self.destination}"
+
+
+def parse_transfer(fields: Sequence[str], where: str) -> Transfer:
+    """Build a Transfer from one row's fields; `where` prefixes errors."""
+    fields = [field.strip() for field in fields]
+    kind = fields[0].lower() if fields else ""
+    if kind not in TRANSFER_FORMATS:
+        raise click.ClickException(
+            f"{where}: unknown transfer kind '{kind}' "
+            f"(one of {', '.join(TRANSFER_FORMATS)})"
+        )
+    expected = TRANSFER_FORMATS[kind].count(",") + 1
+    if len(fields) != expected:
+        raise click.ClickException(f"{where}: expected '{TRANSFER_FORMATS[kind]}'")
+
+    try:
+        amount = Decimal(fields[-1])
+    except InvalidOperation:
+        raise click.ClickException(f"{where}: invalid amount {fields[-1]}")
+    if not amount.is_finite() or amount <= 0:
+        raise click.ClickException(f"{where}: amount must be positive")
+
+    if kind in ("to-perp", "to-spot"):
+        return Transfer(kind, amount)
+
+    destination = fields[1]
+    if not Web3.is_address(destination):
+        raise click.ClickException(f"{where}: invalid address {destination}")
+    destination = Web3.to_checksum_address(destination)
+    if kind.startswith("vault-"):
+        if amount != amount.quantize(Decimal(10) ** -USD_DECIMALS):
+            raise click.ClickException(
+                f"{where}: vault transfers have at most {USD_DECIMALS} decimals"
+            )
+        return Transfer(kind, amount, destination)
+    token = fields[2] if kind == "spot" else ""
+    return Transfer(kind, amount, destination, token)
+
+
+def load_transfers(path: str) -> List[Transfer]:
+    """Parse a transfer file with one row per line (see TRANSFER_FORMATS).
+
+    Blank lines and lines starting with `#` are skipped.
+    """
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        raise click.ClickException(f"Cannot read transfer file: {e}")
+
+    transfers = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        transfers.append(parse_transfer(line.split(","), f"{path}:{lineno}"))
+    if not transfers:
+        raise click.ClickException(f"No transfers in {path}")
+    return transfers
+
+
+def transfer_stages(transfers: Sequence[Transfer]) -> List[List[int]]:
+    """Indices of `transfers` in the groups they are submitted in, one
+    group after the other: each run of consecutive sends is one group, and
+    every other transfer is a group of its own."""
+    stages: List[List[int]] = []
+    for i, t in enumerate(transfers):
+        if (
+            t.kind in CONCURRENT_KINDS
+            and stages
+            and transfers[stages[-1][-1]].kind in CONCURRENT_KINDS
+        ):
+            stages[-1].append(i)
+        else:
+            stages.append([i])
+    return stages
+
+
+def _spot_tokens(info: Any) -> Dict[str, str]:
+    """Spot token name -> the `NAME:tokenId` form spot sends are signed with."""
+    return {
+        token["name"].upper(): f"{token['name']}:{token['tokenId']}"
+        for token in info.spot_meta().get("tokens", [])
+    }
+
+
+def run(
+    production: bool,
+    private_key: str | None,
+    account_address: str | None,
+    row: Sequence[str],
+    path: str | None = None,
+    no_confirm: bool = False,
+) -> None:
+    """Internal transfers: USD and spot sends, perp <-> spot class transfers
+    and vault deposits/withdrawals.
+
+    One transfer comes from the command line (`row`), many from a file.
+    Transfers share one session and each is signed with its own nonce.
+    Rows run in file order, except that a run of consecutive USD/spot
+    sends goes through a rate-paced concurrent queue together (see
+    `transfer_stages`): a send below a class or vault transfer can spend
+    what it freed. Results are reported per row.
+    """
+    if path is not None:
+        if row:
+            raise click.ClickException("Give either a transfer or --file, not both")
+        transfers = load_transfers(path)
+    elif row:
+        transfers = [parse_transfer(list(row), "transfer")]
+    else:
+        raise click.ClickException(
+            "Missing transfer, e.g. `hlexec transfer usd <destination> <amount>`"
+        )
+
+    info, exchange, _address, _account = setup(production, private_key, account_address)
+    console = Console()
+
+    # Spot sends name the token with its id; resolve bare names once
+    unresolved = [t for t in transfers if t.kind == "spot" and ":" not in t.token]
+    if unresolved:
+        try:
+            tokens = _spot_tokens(info)
+        except Exception as e:
+            raise click.ClickException(f"Failed to fetch spot metadata: {e}")
+        for t in unresolved:
+            if t.token.upper() not in tokens:
+                raise click.ClickException(f"Unknown spot token {t.token}")
+            t.token = tokens[t.token.upper()]
+
+    _render_transfers(console, transfers)
+    if not no_confirm and not click.confirm(
+        f"Proceed with {len(transfers)} transfer(s)?"
+    ):
+        raise click.ClickException("Transfer cancelled")
+
+    nonces = ActionNonces()
+
+    def submit(t: Transfer) -> Any:
+        nonce = nonces.next()
+        if t.kind == "usd":
+            return usd_send(exchange, nonce, t.amount, t.destination)
+        if t.kind == "spot":
+            return spot_send(exchange, nonce, t.amount, t.destination, t.token)
+        if t.kind in ("to-perp", "to-spot"):
+            return usd_class_transfer(exchange, nonce, t.amount, t.kind == "to-perp")
+        usd = int(t.amount * 10**USD_DECIMALS)
+        return vault_transfer(
+            exchange, nonce, t.destination, t.kind == "vault-deposit", usd
+        )
+
+    queue = ActionQueue()
+    results: List[Any] = [None] * len(transfers)
+    for stage in transfer_stages(transfers):
+        for i, result in zip(stage, queue.run(submit, [transfers[i] for i in stage])):
+            results[i] = result
+    errors = [action_error(result) for result in results]
+    _render_results(console, transfers, errors)
+
+    failed = sum(error is not None for error in errors)
+    if failed:
+        raise click.ClickException(f"{failed} of {len(transfers)} transfers failed")
+
+
+def _render_transfers(console: Console, transfers: List[Transfer]) -> None:
+    """Render the transfers about to be submitted"""
+    table = Table(
+        box=box.ROUNDED,
+        title="Transfers",
+        title_style="bold bright_cyan",
+        title_justify="left",
+    )
+    table.add_column("#", justify="right")
+    table.add_column("Kind", style="bold cyan", no_wrap=True)
+    table.add_column("Transfer", overflow="fold")
+    for i, t in enumerate(transfers, 1):
+        table.add_row(str(i), t.kind, t.describe())
+    console.print(table)
+
+
+def _render_results(
+    console: Console, transfers: List[Transfer], errors: List[str | None]
+) -> None:
+    """Render the outcome of each transfer"""
+    table = Table(
+        box=box.ROUNDED,
+        title="Transfer Results",
+        title_style="bold bright_green",
+        title_justify="left",
+    )
+    table.add_column("#", justify="right")
+    table.add_column("Transfer", overflow="fold")
+    table.add_column("Status")
+    for i, (t, error) in enumerate(zip(transfers, errors), 1):
+        if error is None:
+            status = Text("✅ OK", style="bold green")
+        else:
+            status = Text(f"❌ {error}", style="red")
+        table.add_row(str(i), t.describe(), status)
+    console.print("\n")
+    console.print(table)
@@ -1,9 +1,16 @@
 from __future__ import annotations
 from .setup import setup
+from .account_state import (
+    AccountStateService,
+    load_state,
+    load_state_after_action,
+)
+from .rate_limit import is_rate_limited
+from .rpc_pool import pool_provider
+from .withdrawals import FINALIZE_TIMEOUT, record_withdrawal, track
 import click
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from typing import Any
 from rich.table import Table
 from rich.text import Text
 from rich import box
@@ -11,6 +18,15 @@ from decimal import Decimal
 from web3 import Web3
 import time
 
+# The bridge charges this fee on every withdrawal, and the amount must
+# cover at least one dollar on top of it
+WITHDRAW_FEE_USDC = Decimal(1)
+MIN_WITHDRAW_USDC = Decimal(2)
+
+# The HL balance normally reflects the withdrawal within a few seconds
+BALANCE_TIMEOUT = 10.0
+BALANCE_POLL_INTERVAL = 1.0
+
 
 def run(
     production: bool,
@@ -19,14 +35,21 @@ def run(
     amount: str,
     no_confirm: bool = False,
     destination_address: str | None = None,
+    wait: bool = False,
 ) -> None:
-    """Withdraw USDC from HyperLiquid Core to EVM (Arbitrum)"""
+    """Withdraw USDC from HyperLiquid Core to EVM (Arbitrum)
+
+    The withdrawal is recorded so `hlexec withdraw track` can follow it to
+    Arbitrum; with `wait` it is tracked until the bridge pays it out.
+    """
 
     info, exchange, address, account = setup(production, private_key, account_address)
 
     console = Console()
-    initial_hl_balance = _get_hl_usd_balance(info, address)
-    withdrawable_balance = _get_withdrawable_balance(info, address)
+    states = AccountStateService(info)
+    initial_state = load_state(states, address)
+    initial_hl_balance = initial_state.account_value
+    withdrawable_balance = initial_state.withdrawable
 
     if destination_address:
         destination = Web3.to_checksum_address(destination_address)
@@ -38,7 +61,7 @@ def run(
     except Exception as e:
         raise click.ClickException(f"Invalid amount format: {e}")
 
-    if withdraw_amount < 2:
+    if withdraw_amount < MIN_WITHDRAW_USDC:
         raise click.ClickException(
             f"Minimum withdrawal amount is $2 (includes $1 fee). Requested: ${withdraw_amount:.2f}"
         )
@@ -50,7 +73,7 @@ def run(
 
     _render_initial_balance(console, initial_hl_balance, withdrawable_balance, address)
 
-    net_amount = float(withdraw_amount) - 1.0  # Subtract $1 fee
+    net_amount = float(withdraw_amount - WITHDRAW_FEE_USDC)
     console.print(f"\n💸 Withdrawal Amount: ${withdraw_amount:.2f}")
     console.print(f"💰 Amount after fee: ${net_amount:.2f} (fee: $1.00)")
     console.print(f"📍 Destination: {destination}\n")
@@ -82,51 +105,59 @@ def run(
         except Exception as e:
             if "Insufficient" in str(e):
                 raise click.ClickException(f"Insufficient balance for withdrawal: {e}")
-            elif "rate limit" in str(e).lower():
+            elif is_rate_limited(e):
                 raise click.ClickException("Rate limited. Please try again later.")
             else:
                 raise click.ClickException(f"Withdrawal failed: {e}")
 
-        progress.update(task, description="Waiting for balance update...")
+        pending = record_withdrawal(
+            production,
+            destination,
+            withdraw_amount - WITHDRAW_FEE_USDC,
+            None if tx_hash == "N/A" else tx_hash,
+            # Arbitrum is not needed to withdraw: the first scan places the
+            # search from the submission time
+            None,
+        )
 
-        time.sleep(3)
+        progress.update(task, description="Waiting for balance update...")
 
-    final_hl_balance = _get_hl_usd_balance(info, address)
-    balance_change = initial_hl_balance - final_hl_balance
+        deadline = time.monotonic() + BALANCE_TIMEOUT
+        final_hl_balance: float | None = None
+        while True:
+            final_state = load_state_after_action(console, states, address, max_age=0)
+            if final_state is None:
+                break
+            final_hl_balance = final_state.account_value
+            done = (
+                initial_hl_balance - final_hl_balance >= float(withdraw_amount) - 0.01
+            )
+            if done or time.monotonic() >= deadline:
+                break
+            time.sleep(BALANCE_POLL_INTERVAL)
 
     _render_summary(
         console,
         float(withdraw_amount),
         net_amount,
-        balance_change,
         initial_hl_balance,
         final_hl_balance,
     )
 
-    console.print(
-        "\n⏳ Note: Withdrawal to Arbitrum typically takes ~5 minutes to finalize."
-    )
-
-
-def _get_hl_usd_balance(info: Any, address: str) -> float:
-    """Get the USD balance from HyperLiquid Core (perps)"""
-    try:
-        state = info.user_state(address)
-        balances = state.get("marginSummary", {})
-        account_value = float(balances.get("accountValue", 0))
-        return account_value
-    except Exception:
-        return 0.0
-
+    if not wait:
+        console.print(
+            "\n⏳ Note: Withdrawal to Arbitrum typically takes ~5 minutes to finalize. "
+            "Run `hlexec withdraw track` to follow it."
+        )
+        return
 
-def _get_withdrawable_balance(info: Any, address: str) -> float:
-    """Get the withdrawable USD balance from HyperLiquid Core"""
-    try:
-        state = info.user_state(address)
-        withdrawable = float(state.get("withdrawable", 0))
-        return withdrawable
-    except Exception:
-        return 0.0
+    console.print("\n⏳ Waiting for the bridge to pay out on Arbitrum...")
+    w3 = Web3(pool_provider("arb", production))
+    if track(console, w3, production, [pending]):
+        raise click.ClickException(
+            f"Withdrawal not finalized after {FINALIZE_TIMEOUT:.0f}s; "
+            "run `hlexec withdraw track` to keep waiting"
+        )
 
 
 def _render_initial_balance(
@@ -153,11 +184,11 @@ def _render_summary(
     console: Console,
     requested: float,
     net_amount: float,
-    balance_change: float,
     initial_balance: float,
-    final_balance: float,
+    final_balance: float | None,
 ) -> None:
-    """Render the withdrawal summary"""
+    """Render the withdrawal summary; `final_balance` is None if it could
+    not be fetched"""
     table = Table(
         show_header=False,
         box=box.DOUBLE,
@@ -173,16 +204,20 @@ def _render_summary(
     table.add_row("Fee", "$1.00")
     table.add_row("", "")
     table.add_row("Initial Balance", f"${initial_balance:.2f}")
-    table.add_row("Final Balance", f"${final_balance:.2f}")
-    table.add_row("Balance Change", f"-${balance_change:.2f}")
-
-    expected_change = requested
-    if abs(balance_change - expected_change) < 0.01:
-        status = Text("✅ SUCCESS", style="bold green")
-    elif balance_change > 0:
+    if final_balance is None:
+        # The withdrawal went through; only the balance read failed
         status = Text("⏳ PROCESSING", style="bold yellow")
     else:
-        status = Text("❌ ERROR", style="bold red")
+        balance_change = initial_balance - final_balance
+        table.add_row("Final Balance", f"${final_balance:.2f}")
+        table.add_row("Balance Change", f"-${balance_change:.2f}")
+
+        if abs(balance_change - requested) < 0.01:
+            status = Text("✅ SUCCESS", style="bold green")
+        elif balance_change > 0:
+            status = Text("⏳ PROCESSING", style="bold yellow")
+        else:
+            status = Text("❌ ERROR", style="bold red")
 
     table.add_row("Status", status)
 
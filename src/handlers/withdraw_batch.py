@@ -0,0 +1,188 @@
+from __future__ import annotations
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Tuple
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from web3 import Web3
+from .account_state import AccountStateService, load_state
+from .actions import ActionNonces, ActionQueue, action_error, withdraw
+from .rpc_pool import pool_provider
+from .setup import setup
+from .withdraw import MIN_WITHDRAW_USDC, WITHDRAW_FEE_USDC
+from .withdrawals import FINALIZE_TIMEOUT, WithdrawalScanner, record_withdrawal, track
+
+
+def run(
+    production: bool,
+    private_key: str | None,
+    account_address: str | None,
+    path: str,
+    no_confirm: bool = False,
+    wait: bool = False,
+) -> None:
+    """Withdraw to several Arbitrum destinations from one session.
+
+    Every row is checked against a single withdrawable-balance snapshot
+    and confirmed once. The withdrawals are then submitted concurrently
+    within the action rate budget, each with its own nonce, and recorded
+    for `hlexec withdraw track`; with `wait` they are tracked together.
+    """
+    rows = load_batch(path)
+    info, exchange, address, _account = setup(production, private_key, account_address)
+    console = Console()
+
+    state = load_state(AccountStateService(info), address)
+    total = sum((amount for _, amount in rows), Decimal(0))
+    _render_batch(console, rows, state.withdrawable)
+    if Decimal(str(state.withdrawable)) < total:
+        raise click.ClickException(
+            f"Insufficient withdrawable balance. Available: ${state.withdrawable:.2f}, "
+            f"Requested: ${total:.2f}"
+        )
+    if not no_confirm and not click.confirm(
+        f"Proceed with {len(rows)} withdrawals totalling ${total:.2f}?"
+    ):
+        raise click.ClickException("Withdrawal cancelled")
+
+    w3 = Web3(pool_provider("arb", production))
+    try:
+        from_block: int | None = WithdrawalScanner(w3, production).head()
+    except Exception:
+        from_block = None
+
+    nonces = ActionNonces()
+
+    def submit(row: Tuple[str, Decimal]) -> Any:
+        destination, amount = row
+        return withdraw(exchange, nonces.next(), amount, destination)
+
+    console.print(f"\n📤 Submitting {len(rows)} withdrawals...")
+    results = ActionQueue().run(submit, rows)
+
+    errors: List[str | None] = []
+    pending: List[Dict[str, Any]] = []
+    for (destination, amount), result in zip(rows, results):
+        error = action_error(result)
+        errors.append(error)
+        if error is None:
+            tx_hash = result.get("response", {}).get("txHash")
+            pending.append(
+                record_withdrawal(
+                    production,
+                    destination,
+                    amount - WITHDRAW_FEE_USDC,
+                    tx_hash,
+                    from_block,
+                )
+            )
+    _render_results(console, rows, errors)
+
+    if pending and wait:
+        console.print("\n⏳ Waiting for the bridge to pay out on Arbitrum...")
+        remaining = track(console, w3, production, pending)
+        if remaining:
+            raise click.ClickException(
+                f"{len(remaining)} withdrawal(s) not finalized after "
+                f"{FINALIZE_TIMEOUT:.0f}s; run `hlexec withdraw track` to keep waiting"
+            )
+    elif pending:
+        console.print("\nRun `hlexec withdraw track` to follow them to Arbitrum.")
+
+    failed = sum(error is not None for error in errors)
+    if failed:
+        raise click.ClickException(f"{failed} of {len(rows)} withdrawals failed")
+
+
+def load_batch(path: str) -> List[Tuple[str, Decimal]]:
+    """Parse a batch file with one `<destination>,<amount>` per line.
+
+    Blank lines and lines starting with `#` are skipped. Amounts include
+    the bridge fee, as with `hlexec withdraw`.
+    """
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        raise click.ClickException(f"Cannot read batch file: {e}")
+
+    rows: List[Tuple[str, Decimal]] = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) != 2:
+            raise click.ClickException(
+                f"{path}:{lineno}: expected '<destination>,<amount>'"
+            )
+        destination, amount_str = fields
+        if not Web3.is_address(destination):
+            raise click.ClickException(
+                f"{path}:{lineno}: invalid address {destination}"
+            )
+        try:
+            amount = Decimal(amount_str)
+        except InvalidOperation:
+            raise click.ClickException(f"{path}:{lineno}: invalid amount {amount_str}")
+        if amount < MIN_WITHDRAW_USDC:
+            raise click.ClickException(
+                f"{path}:{lineno}: minimum withdrawal amount is ${MIN_WITHDRAW_USDC} "
+                f"(includes ${WITHDRAW_FEE_USDC} fee)"
+            )
+        rows.append((Web3.to_checksum_address(destination), amount))
+
+    if not rows:
+        raise click.ClickException(f"No withdrawals in {path}")
+    return rows
+
+
+def _render_batch(
+    console: Console, rows: List[Tuple[str, Decimal]], withdrawable: float
+) -> None:
+    """Render the withdrawals about to be submitted"""
+    table = Table(
+        box=box.ROUNDED,
+        title="Batched Withdrawals",
+        title_style="bold bright_cyan",
+        title_justify="left",
+    )
+    table.add_column("Destination", style="bold cyan", no_wrap=True)
+    table.add_column("Amount", justify="right")
+    table.add_column("After Fee", justify="right")
+    for destination, amount in rows:
+        table.add_row(
+            destination, f"${amount:.2f}", f"${amount - WITHDRAW_FEE_USDC:.2f}"
+        )
+    table.add_section()
+    total = sum((amount for _, amount in rows), Decimal(0))
+    table.add_row(
+        "Total", f"${total:.2f}", f"${total - len(rows) * WITHDRAW_FEE_USDC:.2f}"
+    )
+    table.add_row("Withdrawable", f"${withdrawable:.2f}", "")
+    console.print(table)
+
+
+def _render_results(
+    console: Console, rows: List[Tuple[str, Decimal]], errors: List[str | None]
+) -> None:
+    """Render the outcome of each submitted withdrawal"""
+    table = Table(
+        box=box.ROUNDED,
+        title="Withdrawal Results",
+        title_style="bold bright_green",
+        title_justify="left",
+    )
+    table.add_column("Destination", style="bold cyan", no_wrap=True)
+    table.add_column("Amount", justify="right")
+    table.add_column("Status")
+    for (destination, amount), error in zip(rows, errors):
+        if error is None:
+            status = Text("✅ SUBMITTED", style="bold green")
+        else:
+            status = Text(f"❌ {error}", style="red")
+        table.add_row(destination, f"${amount:.2f}", status)
+    console.print("\n")
+    console.print(table)
@@ -0,0 +1,373 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+import json
+import os
+import threading
+import time
+import click
+from rich import box
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+from web3 import Web3
+from .cache import cache_dir
+from .constants import (
+    BRIDGE2_PROD_ADDR,
+    BRIDGE2_TEST_ADDR,
+    ERC20_ABI,
+    USDC_ARB_PROD_ADDR,
+    USDC_ARB_TEST_ADDR,
+)
+from .evm import RpcError, cached_token, call_args, rpc_batch, store_token, to_int
+from .rpc_pool import pool_provider
+
+# Blocks per eth_getLogs request (public Arbitrum RPCs cap the range) and
+# how many of those ranges go in one JSON-RPC batch
+LOG_CHUNK_BLOCKS = 10_000
+CHUNKS_PER_BATCH = 5
+
+# Withdrawals finalize after the bridge's ~200s dispute period
+FINALIZE_TIMEOUT = 900.0
+SCAN_INTERVAL = 10.0
+
+# Used to place a withdrawal whose starting block was not recorded
+ARB_BLOCK_TIME_S = 0.25
+
+# Finalized withdrawals stay listed by `withdraw track` this long
+KEEP_FINALIZED_MS = 7 * 86_400_000
+
+# Payouts land minutes after a withdrawal; one still pending after this
+# long was missed for good (e.g. rejected), and is dropped from the store
+EXPIRE_PENDING_MS = 86_400_000
+
+# Serializes updates of the store between threads; a lock file does so
+# between processes (`withdraw` and `withdraw track` run side by side)
+_STORE_LOCK = threading.Lock()
+
+
+def _store_path(production: bool) -> Path:
+    return cache_dir(production) / "withdrawals.json"
+
+
+def load_withdrawals(production: bool) -> List[Dict[str, Any]]:
+    try:
+        return json.loads(_store_path(production).read_text())["withdrawals"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def save_withdrawals(production: bool, withdrawals: List[Dict[str, Any]]) -> None:
+    now = int(time.time() * 1000)
+    kept = [
+        w
+        for w in withdrawals
+        if now - w["time_ms"]
+        < (EXPIRE_PENDING_MS if w.get("block") is None else KEEP_FINALIZED_MS)
+    ]
+    path = _store_path(production)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"withdrawals": kept}, indent=2))
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _locked_withdrawals(production: bool) -> Iterator[List[Dict[str, Any]]]:
+    """The stored withdrawals, reloaded under the store's lock and saved
+    (atomically) when the block exits."""
+    import fcntl
+
+    # One open file per holder: flock is per open file
+    path = _store_path(production)
+    with _STORE_LOCK, open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        withdrawals = load_withdrawals(production)
+        yield withdrawals
+        save_withdrawals(production, withdrawals)
+
+
+def record_withdrawal(
+    production: bool,
+    destination: str,
+    amount: Decimal,
+    hl_hash: str | None,
+    from_block: int | None,
+) -> Dict[str, Any]:
+    """Remember a submitted withdrawal of `amount` USDC (after the fee)
+    so its Arbitrum payout can be tracked, now or by a later `track`."""
+    entry = {
+        "destination": Web3.to_checksum_address(destination),
+        "amount": str(amount),
+        "time_ms": int(time.time() * 1000),
+        "hl_hash": hl_hash,
+        "from_block": from_block,
+        "scanned": None if from_block is None else from_block - 1,
+        "tx_hash": None,
+        "block": None,
+    }
+    with _locked_withdrawals(production) as withdrawals:
+        withdrawals.append(entry)
+    return entry
+
+
+def _contracts(w3: Web3, production: bool) -> Tuple[Any, str]:
+    usdc = w3.eth.contract(
+        address=Web3.to_checksum_address(
+            USDC_ARB_PROD_ADDR if production else USDC_ARB_TEST_ADDR
+        ),
+        abi=ERC20_ABI,
+    )
+    bridge = Web3.to_checksum_address(
+        BRIDGE2_PROD_ADDR if production else BRIDGE2_TEST_ADDR
+    )
+    return usdc, bridge
+
+
+def _topic(address: str) -> str:
+    return "0x" + address.lower().removeprefix("0x").rjust(64, "0")
+
+
+class WithdrawalScanner:
+    """Finds the bridge's USDC payouts for pending withdrawals.
+
+    The bridge pays a finalized withdrawal with a USDC `Transfer` to its
+    destination. One scan looks for the transfers to every pending
+    destination together, over range-chunked `eth_getLogs` requests that
+    are batched. Each withdrawal remembers the last block searched for it,
+    so the next scan resumes there. A transfer of the exact amount (after
+    the fee) is matched to the oldest withdrawal waiting for it.
+    """
+
+    def __init__(self, w3: Web3, production: bool, chunk: int = LOG_CHUNK_BLOCKS):
+        self.w3 = w3
+        self.production = production
+        self.chunk = chunk
+        self.usdc, self.bridge = _contracts(w3, production)
+        self.requests = 0
+        self._decimals: int | None = None
+
+    def head(self) -> int:
+        """The latest block, and the token decimals on the first call."""
+        token = cached_token(self.production, self.usdc.address)
+        calls: List[Tuple[str, List[Any]]] = [("eth_blockNumber", [])]
+        if token is None:
+            calls += [
+                ("eth_chainId", []),
+                ("eth_call", [call_args(self.usdc, "decimals"), "latest"]),
+            ]
+        results = rpc_batch(self.w3, calls)
+        if token is None:
+            token = {"chain_id": to_int(results[1]), "decimals": to_int(results[2])}
+            store_token(self.production, self.usdc.address, **token)
+        self._decimals = token["decimals"]
+        return to_int(results[0])
+
+    def scan(
+        self, withdrawals: List[Dict[str, Any]], to_block: int
+    ) -> List[Dict[str, Any]]:
+        """Search up to `to_block` and return the withdrawals found finalized.
+
+        Entries are updated in place. A failed chunk stops the scan there,
+        and the next scan retries it.
+        """
+        if self._decimals is None:
+            self.head()
+        pending = [w for w in withdrawals if w.get("block") is None]
+        for w in pending:
+            if w.get("scanned") is None:
+                # No block was recorded; start from around the request time
+                age_s = (time.time() * 1000 - w["time_ms"]) / 1000
+                start = to_block - int(age_s / ARB_BLOCK_TIME_S) - self.chunk
+                w["scanned"] = max(start, 0) - 1
+        pending = [w for w in pending if w["scanned"] < to_block]
+        if not pending:
+            return []
+
+        start = min(w["scanned"] for w in pending) + 1
+        ranges = [
+            (lo, min(lo + self.chunk - 1, to_block))
+            for lo in range(start, to_block + 1, self.chunk)
+        ]
+        topics = [
+            self.usdc.events.Transfer.topic,
+            _topic(self.bridge),
+            sorted({_topic(w["destination"]) for w in pending}),
+        ]
+        found: List[Dict[str, Any]] = []
+        scanned_to = start - 1
+        for i in range(0, len(ranges), CHUNKS_PER_BATCH):
+            group = ranges[i : i + CHUNKS_PER_BATCH]
+            self.requests += 1
+            try:
+                results = rpc_batch(
+                    self.w3,
+                    [
+                        (
+                            "eth_getLogs",
+                            [
+                                {
+                                    "address": self.usdc.address,
+                                    "fromBlock": hex(lo),
+                                    "toBlock": hex(hi),
+                                    "topics": topics,
+                                }
+                            ],
+                        )
+                        for lo, hi in group
+                    ],
+                )
+            except RpcError:
+                break
+            failed = False
+            for (_, hi), logs in zip(group, results):
+                if isinstance(logs, RpcError):
+                    failed = True
+                    break
+                found += self._match(pending, logs)
+                scanned_to = hi
+            if failed:
+                break
+
+        for w in pending:
+            w["scanned"] = max(w["scanned"], scanned_to)
+        return found
+
+    def _match(
+        self, pending: List[Dict[str, Any]], logs: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        scale = Decimal(10 ** (self._decimals or 0))
+        found = []
+        logs = sorted(
+            logs, key=lambda log: (to_int(log["blockNumber"]), to_int(log["logIndex"]))
+        )
+        for log in logs:
+            if log.get("removed"):
+                continue
+            event = self.usdc.events.Transfer().process_log(log)
+            block = to_int(log["blockNumber"])
+            for w in sorted(pending, key=lambda w: w["time_ms"]):
+                if (
+                    w.get("block") is None
+                    and w["destination"].lower() == event["args"]["to"].lower()
+                    and int(Decimal(w["amount"]) * scale) == event["args"]["value"]
+                    # Blocks already searched for it may hold a payout
+                    # matched to an earlier withdrawal
+                    and block > w["scanned"]
+                ):
+                    w["block"] = block
+                    w["tx_hash"] = log["transactionHash"]
+                    found.append(w)
+                    break
+        return found
+
+
+def track(
+    console: Console,
+    w3: Web3,
+    production: bool,
+    withdrawals: List[Dict[str, Any]],
+    timeout: float = FINALIZE_TIMEOUT,
+) -> List[Dict[str, Any]]:
+    """Scan until every withdrawal is finalized or `timeout` passes.
+
+    Progress is saved after each scan, so an interrupted wait resumes.
+    Returns the withdrawals still pending.
+    """
+    scanner = WithdrawalScanner(w3, production)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            head = scanner.head()
+            finalized = scanner.scan(withdrawals, head)
+        except Exception as e:
+            console.print(Text(f"⚠️  Arbitrum scan failed: {e}", style="yellow"))
+            finalized = []
+        for w in finalized:
+            console.print(
+                f"✅ {w['amount']} USDC to {w['destination']} finalized "
+                f"in block {w['block']} ({w['tx_hash']})"
+            )
+        with _locked_withdrawals(production) as stored:
+            _merge(stored, withdrawals)
+
+        pending = [w for w in withdrawals if w.get("block") is None]
+        if not pending or time.monotonic() >= deadline:
+            return pending
+        time.sleep(min(SCAN_INTERVAL, max(deadline - time.monotonic(), 0)))
+
+
+def _merge(stored: List[Dict[str, Any]], updated: List[Dict[str, Any]]) -> None:
+    """Fold `updated` into `stored` in place. Another process may have
+    saved progress on the same withdrawals meanwhile: a payout found by
+    either side is kept (and copied into `updated`), as is the furthest
+    block scanned."""
+
+    def key(w: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (w["destination"], w["amount"], w["time_ms"])
+
+    index = {key(w): i for i, w in enumerate(stored)}
+    for w in updated:
+        if key(w) not in index:
+            stored.append(w)
+            continue
+        current = stored[index[key(w)]]
+        if current.get("block") is not None and w.get("block") is None:
+            w.update(current)
+        if current.get("scanned") is not None and w.get("scanned") is not None:
+            w["scanned"] = max(w["scanned"], current["scanned"])
+        stored[index[key(w)]] = w
+
+
+def run(production: bool, timeout: float = FINALIZE_TIMEOUT) -> None:
+    """Wait for every recorded withdrawal that has not reached Arbitrum yet."""
+    console = Console()
+    withdrawals = load_withdrawals(production)
+    pending = [w for w in withdrawals if w.get("block") is None]
+    if not pending:
+        _render_withdrawals(console, withdrawals)
+        console.print(Text("No pending withdrawals", style="dim"))
+        return
+
+    w3 = Web3(pool_provider("arb", production))
+    console.print(f"⏳ Tracking {len(pending)} pending withdrawal(s)...")
+    remaining = track(console, w3, production, pending, timeout)
+    _render_withdrawals(console, load_withdrawals(production))
+    if remaining:
+        raise click.ClickException(
+            f"{len(remaining)} withdrawal(s) not finalized after {timeout:.0f}s"
+        )
+
+
+def _render_withdrawals(console: Console, withdrawals: List[Dict[str, Any]]) -> None:
+    if not withdrawals:
+        return
+    table = Table(
+        title="Withdrawals",
+        title_style="bold bright_cyan",
+        header_style="cyan",
+        border_style="cyan",
+        box=box.ROUNDED,
+        expand=False,
+    )
+    table.add_column("Requested")
+    table.add_column("Destination", overflow="fold")
+    table.add_column("Amount", justify="right")
+    table.add_column("Status")
+    table.add_column("Arbitrum Tx", overflow="fold")
+    for w in withdrawals:
+        requested = datetime.fromtimestamp(w["time_ms"] / 1000)
+        if w.get("block") is None:
+            status = Text("⏳ Pending", style="yellow")
+        else:
+            status = Text(f"✅ Block {w['block']}", style="green")
+        table.add_row(
+            requested.strftime("%Y-%m-%d %H:%M:%S"),
+            w["destination"],
+            f"${Decimal(w['amount']):.2f}",
+            status,
+            w.get("tx_hash") or "-",
+        )
+    console.print(table)
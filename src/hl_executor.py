@@ -1,16 +1,145 @@
 import click
+import json
 from pathlib import Path
 from dotenv import load_dotenv
+import hyperliquid.exchange
+from handlers import actions
 from handlers.status import run as status_run
 from handlers.deposit import run as deposit_run
-from handlers.place_order import cancel_order_run, new_order_run, modify_order_run
+from handlers.deposit_batch import run as deposit_batch_run
+from handlers.confirmations import DEFAULT_CONFIRMATIONS
+from handlers.place_order import (
+    cancel_order_run,
+    new_order_run,
+    modify_order_run,
+    show_order_run,
+    sync_order_run,
+)
+from handlers.transfer import run as transfer_run
 from handlers.withdraw import run as withdraw_run
+from handlers.withdraw_batch import run as withdraw_batch_run
+from handlers.withdrawals import FINALIZE_TIMEOUT, run as withdraw_track_run
+from handlers.pnl import run as pnl_run
+from handlers.funding import run as funding_run
+from handlers.leverage import run as leverage_run
+from handlers.candles import INTERVALS_MS, parse_time, run as candles_run
+from handlers.book import MAX_LEVELS, run as book_run
+from handlers.market_data import run as feed_run
+from handlers.risk import DEFAULT_PRICE_BAND_PCT
+from handlers.rpc_pool import CHAINS, run as rpc_run
+from handlers.recording import Player, Recorder, install as install_transport
+from handlers.profiling import Profiler, summary as profile_summary
+from handlers.tracing import TRACER, serve_metrics, start_trace
+
+
+class DefaultGroup(click.Group):
+    """A group that runs `default_command` when the first argument is not one
+    of its subcommands, so `hlexec deposit 5` keeps working."""
+
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if (
+            args
+            and args[0] not in self.commands
+            and args[0] not in self.get_help_option_names(ctx)
+        ):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
 
 
 @click.group()
-def cli():
+@click.option(
+    "--trace",
+    "trace",
+    is_flag=True,
+    help="Print a JSON tree of timed spans to stderr when the command ends",
+)
+@click.option(
+    "--profile",
+    "profile",
+    is_flag=True,
+    help="Profile the command; writes a report to the current directory and "
+    "a summary to stderr",
+)
+@click.option(
+    "--record",
+    "record",
+    type=click.Path(dir_okay=False, writable=True),
+    required=False,
+    help="Record every HTTP request and response to this gzipped archive",
+)
+@click.option(
+    "--replay",
+    "replay",
+    type=click.Path(exists=True, dir_okay=False),
+    required=False,
+    help="Answer HTTP requests from an archive written by --record",
+)
+@click.option(
+    "--replay-latency",
+    "replay_latency",
+    type=click.FloatRange(min=0),
+    default=1.0,
+    show_default=True,
+    help="Multiply recorded latencies by this factor (0 replays instantly)",
+)
+@click.option(
+    "--metrics-port",
+    "metrics_port",
+    type=click.IntRange(min=1, max=65535),
+    required=False,
+    help="Serve Prometheus metrics on this local port while the command runs",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    trace: bool,
+    profile: bool,
+    record: str | None,
+    replay: str | None,
+    replay_latency: float,
+    metrics_port: int | None,
+):
     """HyperLiquid Executor - Python CLI"""
-    load_dotenv(Path.cwd() / ".env", override=False)
+    if record and replay:
+        raise click.ClickException("Give either --record or --replay, not both")
+    transport: Recorder | Player | None = None
+    if record:
+        transport = Recorder(record)
+    elif replay:
+        transport = Player(replay, replay_latency)
+    if transport is not None:
+        install_transport(transport)
+        ctx.call_on_close(transport.close)
+    command = ctx.invoked_subcommand or "hlexec"
+    if trace or profile:
+        start_trace(command, [hyperliquid.exchange, actions])
+        profiler = Profiler(command) if profile else None
+
+        def report() -> None:
+            tree = TRACER.finish()
+            if trace:
+                click.echo(json.dumps(tree, indent=2), err=True)
+            if profiler is not None:
+                result = profiler.finish(tree)
+                try:
+                    path = profiler.write(result, Path.cwd())
+                except OSError as e:
+                    click.echo(f"Cannot write profile report: {e}", err=True)
+                    return
+                click.echo(profile_summary(result, path), err=True)
+
+        ctx.call_on_close(report)
+    if metrics_port is not None:
+        try:
+            serve_metrics(metrics_port)
+        except OSError as e:
+            raise click.ClickException(f"Cannot serve metrics: {e}")
+    with TRACER.span("dotenv"):
+        load_dotenv(Path.cwd() / ".env", override=False)
 
 
 @cli.command()
@@ -43,6 +172,251 @@ def status(
     status_run(production, private_key, account_address)
 
 
+@cli.command()
+@click.option(
+    "--private-key",
+    "private_key",
+    type=str,
+    required=False,
+    help="Private key for signing transactions",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--address",
+    "account_address",
+    type=str,
+    required=False,
+    help="This the HL account address which the Action will be performed on",
+)
+@click.option(
+    "--days",
+    type=click.IntRange(min=1),
+    default=30,
+    show_default=True,
+    help="Number of days of history to aggregate",
+)
+@click.option(
+    "--bucket",
+    type=click.Choice(["hour", "day", "week"], case_sensitive=False),
+    default="day",
+    show_default=True,
+    help="Time bucket for the per-period breakdown",
+)
+@click.option(
+    "--offline",
+    "offline",
+    is_flag=True,
+    help="Use only the local store, without syncing new fills and funding",
+)
+def pnl(
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+    days: int,
+    bucket: str,
+    offline: bool,
+):
+    """Realized PnL, fees and funding by coin and period"""
+    pnl_run(
+        production,
+        private_key,
+        account_address,
+        days,
+        bucket.lower(),
+        offline,
+    )
+
+
+@cli.command()
+@click.option(
+    "--private-key",
+    "private_key",
+    type=str,
+    required=False,
+    help="Private key for signing transactions",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--address",
+    "account_address",
+    type=str,
+    required=False,
+    help="This the HL account address which the Action will be performed on",
+)
+@click.option(
+    "--days",
+    type=click.IntRange(min=1),
+    default=30,
+    show_default=True,
+    help="Number of days of funding history to report",
+)
+@click.option(
+    "--offline",
+    "offline",
+    is_flag=True,
+    help="Use only the local store, without syncing new funding payments",
+)
+def funding(
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+    days: int,
+    offline: bool,
+):
+    """Funding payments by coin and day"""
+    funding_run(production, private_key, account_address, days, offline)
+
+
+@cli.command()
+@click.argument("coins", nargs=-1, required=True)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--interval",
+    type=click.Choice(list(INTERVALS_MS)),
+    default="1h",
+    show_default=True,
+    help="Candle interval",
+)
+@click.option(
+    "--from",
+    "start",
+    type=str,
+    required=False,
+    help="Start time: epoch seconds/ms or ISO date/datetime, UTC (default: 24h before --to)",
+)
+@click.option(
+    "--to",
+    "end",
+    type=str,
+    required=False,
+    help="End time: epoch seconds/ms or ISO date/datetime, UTC (default: now)",
+)
+@click.option(
+    "--out",
+    type=click.Path(dir_okay=False, writable=True),
+    required=False,
+    help="Save the candles as NumPy arrays (.npz, keys like 'BTC.c')",
+)
+@click.option(
+    "--csv",
+    "csv",
+    is_flag=True,
+    help="Stream the candles to stdout as CSV instead of a summary table",
+)
+def candles(
+    coins: tuple[str, ...],
+    production: bool,
+    interval: str,
+    start: str | None,
+    end: str | None,
+    out: str | None,
+    csv: bool,
+):
+    """OHLCV candles for one or more coins, served from a local cache"""
+    candles_run(
+        production,
+        list(dict.fromkeys(coins)),
+        interval,
+        parse_time(start) if start else None,
+        parse_time(end) if end else None,
+        out,
+        csv,
+    )
+
+
+@cli.command()
+@click.argument("coin", type=str)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--depth",
+    type=click.IntRange(1, MAX_LEVELS),
+    default=10,
+    show_default=True,
+    help="Number of levels to show per side",
+)
+@click.option(
+    "--stream",
+    "stream",
+    is_flag=True,
+    help="Keep the book updated from the websocket until interrupted",
+)
+@click.option(
+    "--refresh",
+    type=click.FloatRange(min=0.1, max=30),
+    default=4.0,
+    show_default=True,
+    help="Maximum redraws per second in --stream mode",
+)
+def book(
+    coin: str,
+    production: bool,
+    depth: int,
+    stream: bool,
+    refresh: float,
+):
+    """L2 order book with spread, depth and imbalance"""
+    book_run(production, coin, depth, stream, refresh)
+
+
+@cli.command()
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--coin",
+    "coins",
+    type=str,
+    multiple=True,
+    help="Also publish mark/oracle price, funding and best bid/ask for this coin (repeatable)",
+)
+def feed(production: bool, coins: tuple[str, ...]):
+    """Publish live mids and marks to a shared-memory segment for other commands"""
+    feed_run(production, list(dict.fromkeys(coins)))
+
+
+@cli.command()
+@click.option(
+    "--chain",
+    "chain",
+    type=click.Choice(sorted(CHAINS)),
+    default="arb",
+    show_default=True,
+    help="Chain whose RPC pool to probe",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+def rpc(chain: str, production: bool):
+    """Probe the RPC pool endpoints and show their latency"""
+    rpc_run(production, chain)
+
+
 @cli.group()
 def order():
     """Limit order operations"""
@@ -100,6 +474,20 @@ def order():
     is_flag=True,
     help="Reduce only order",
 )
+@click.option(
+    "--risk-check",
+    "risk_check",
+    is_flag=True,
+    help="Check price band, Alo crossing and margin locally before signing",
+)
+@click.option(
+    "--price-band",
+    "price_band",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_PRICE_BAND_PCT,
+    show_default=True,
+    help="Maximum distance of the price from the mark/mid, in % (with --risk-check)",
+)
 def new(
     coin: str,
     direction: str,
@@ -112,6 +500,8 @@ def new(
     client_order_id: str | None,
     post_only: bool,
     reduce_only: bool,
+    risk_check: bool,
+    price_band: float,
 ):
     """Place a new limit order"""
     new_order_run(
@@ -126,6 +516,8 @@ def new(
         client_order_id,
         post_only,
         reduce_only,
+        risk_check,
+        price_band,
     )
 
 
@@ -249,11 +641,44 @@ def cancel(
     )
 
 
-@cli.command()
-@click.argument(
-    "amount",
+@order.command()
+@click.argument("oid_or_cloid", type=str)
+@click.option(
+    "--private-key",
+    "private_key",
+    type=str,
+    required=False,
+    help="Private key for signing transactions",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--address",
+    "account_address",
     type=str,
+    required=False,
+    help="This the HL account address which the Action will be performed on",
 )
+def show(
+    oid_or_cloid: str,
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+):
+    """Show an order and its fills by OID or CLOID"""
+    show_order_run(
+        oid_or_cloid,
+        private_key,
+        production,
+        account_address,
+    )
+
+
+@order.command()
 @click.option(
     "--private-key",
     "private_key",
@@ -274,28 +699,213 @@ def cancel(
     required=False,
     help="This the HL account address which the Action will be performed on",
 )
-def deposit(
-    amount: str,
+def sync(
     private_key: str | None,
     production: bool,
     account_address: str | None,
 ):
+    """Sync historical orders and fills into the local store"""
+    sync_order_run(
+        private_key,
+        production,
+        account_address,
+    )
+
+
+@cli.group(cls=DefaultGroup, default_command="send")
+def deposit():
     """Deposit Funds from ARB -> Core"""
+    pass
+
+
+@deposit.command()
+@click.argument(
+    "amounts",
+    type=str,
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    "--private-key",
+    "private_key",
+    type=str,
+    required=False,
+    help="Private key for signing transactions",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--address",
+    "account_address",
+    type=str,
+    required=False,
+    help="This the HL account address which the Action will be performed on",
+)
+@click.option(
+    "--confirmations",
+    "confirmations",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CONFIRMATIONS,
+    show_default=True,
+    help="Blocks the Arbitrum transaction must be buried under",
+)
+def send(
+    amounts: tuple[str, ...],
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+    confirmations: int,
+):
+    """Deposit from the signer's Arbitrum wallet (the default)
+
+    Several amounts are sent back-to-back without waiting for each receipt.
+    """
     deposit_run(
         production,
         private_key,
         account_address,
-        amount,
+        amounts,
+        confirmations,
     )
 
 
-@cli.command()
-def leverage():
-    """Change the leverage of a market"""
-    click.echo("Welcome to the Withdraw Funds from Core -> EVM command!")
+@deposit.command()
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--private-key",
+    "private_key",
+    type=str,
+    required=False,
+    help="Private key of the wallet submitting the batch and paying the gas",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--address",
+    "account_address",
+    type=str,
+    required=False,
+    help="This the HL account address which the Action will be performed on",
+)
+@click.option(
+    "--confirmations",
+    "confirmations",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CONFIRMATIONS,
+    show_default=True,
+    help="Blocks the Arbitrum transaction must be buried under",
+)
+def batch(
+    path: str,
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+    confirmations: int,
+):
+    """Deposit for several accounts with one Bridge2 permit transaction"""
+    deposit_batch_run(
+        production,
+        private_key,
+        account_address,
+        path,
+        confirmations,
+    )
 
 
 @cli.command()
+@click.argument("coins", nargs=-1)
+@click.option(
+    "--all",
+    "all_coins",
+    is_flag=True,
+    help="Apply to every listed perp market",
+)
+@click.option(
+    "--set",
+    "leverage",
+    type=click.IntRange(min=1),
+    required=False,
+    help="Target leverage, capped at each market's maximum",
+)
+@click.option(
+    "--isolated",
+    "isolated",
+    is_flag=True,
+    help="Use isolated margin (default is cross)",
+)
+@click.option(
+    "--margin",
+    "margin",
+    type=str,
+    required=False,
+    help="USDC to add to (or, if negative, remove from) isolated positions",
+)
+@click.option(
+    "--private-key",
+    "private_key",
+    type=str,
+    required=False,
+    help="Private key for signing transactions",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--address",
+    "account_address",
+    type=str,
+    required=False,
+    help="This the HL account address which the Action will be performed on",
+)
+def leverage(
+    coins: tuple[str, ...],
+    all_coins: bool,
+    leverage: int | None,
+    isolated: bool,
+    margin: str | None,
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+):
+    """Change the leverage and isolated margin of one or more markets
+
+    \b
+    Examples:
+      hlexec leverage BTC ETH                 Show current settings
+      hlexec leverage BTC ETH --set 5         Cross 5x on BTC and ETH
+      hlexec leverage --all --set 3 --isolated
+      hlexec leverage SOL --margin 25         Add $25 to the isolated SOL position
+    """
+    leverage_run(
+        production,
+        private_key,
+        account_address,
+        coins,
+        all_coins,
+        leverage,
+        not isolated,
+        margin,
+    )
+
+
+@cli.group(cls=DefaultGroup, default_command="send")
+def withdraw():
+    """Withdraw Funds from Core -> EVM"""
+    pass
+
+
+@withdraw.command("send")
 @click.argument(
     "amount",
     type=str,
@@ -331,15 +941,22 @@ def leverage():
     is_flag=True,
     help="Skip confirmation prompt and proceed directly with withdrawal",
 )
-def withdraw(
+@click.option(
+    "--wait",
+    "wait",
+    is_flag=True,
+    help="Wait until the bridge pays the withdrawal out on Arbitrum",
+)
+def withdraw_send(
     amount: str,
     private_key: str | None,
     production: bool,
     account_address: str | None,
     no_confirm: bool,
     destination: str | None,
+    wait: bool,
 ):
-    """Withdraw Funds from Core -> EVM"""
+    """Withdraw to Arbitrum (the default)"""
     withdraw_run(
         production,
         private_key,
@@ -347,13 +964,143 @@ def withdraw(
         amount,
         no_confirm,
         destination,
+        wait,
     )
 
 
+@withdraw.command("batch")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--private-key",
+    "private_key",
+    type=str,
+    required=False,
+    help="Private key for signing transactions",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--address",
+    "account_address",
+    type=str,
+    required=False,
+    help="This the HL account address which the Action will be performed on",
+)
+@click.option(
+    "--no-confirm",
+    "no_confirm",
+    is_flag=True,
+    help="Skip confirmation prompt and proceed directly with withdrawal",
+)
+@click.option(
+    "--wait",
+    "wait",
+    is_flag=True,
+    help="Wait until the bridge pays every withdrawal out on Arbitrum",
+)
+def withdraw_batch(
+    path: str,
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+    no_confirm: bool,
+    wait: bool,
+):
+    """Withdraw to several destinations listed in a file"""
+    withdraw_batch_run(
+        production,
+        private_key,
+        account_address,
+        path,
+        no_confirm,
+        wait,
+    )
+
+
+@withdraw.command()
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--timeout",
+    "timeout",
+    type=click.FloatRange(min=0),
+    default=FINALIZE_TIMEOUT,
+    show_default=True,
+    help="Seconds to wait for the pending withdrawals",
+)
+def track(production: bool, timeout: float):
+    """Wait for recorded withdrawals to be paid out on Arbitrum"""
+    withdraw_track_run(production, timeout)
+
+
 @cli.command()
-def transfer():
-    """Transfer funds between vaults"""
-    click.echo("Welcome to the Vault Transfer command!")
+@click.argument("row", type=str, nargs=-1)
+@click.option(
+    "--file",
+    "path",
+    type=click.Path(exists=True, dir_okay=False),
+    required=False,
+    help="File with one transfer per line, e.g. 'usd,<destination>,<amount>'",
+)
+@click.option(
+    "--private-key",
+    "private_key",
+    type=str,
+    required=False,
+    help="Private key for signing transactions",
+)
+@click.option(
+    "--production",
+    "production",
+    is_flag=True,
+    help="Connect to the production environment (default is testnet)",
+)
+@click.option(
+    "--address",
+    "account_address",
+    type=str,
+    required=False,
+    help="This the HL account address which the Action will be performed on",
+)
+@click.option(
+    "--no-confirm",
+    "no_confirm",
+    is_flag=True,
+    help="Skip confirmation prompt and proceed directly with the transfers",
+)
+def transfer(
+    row: tuple[str, ...],
+    path: str | None,
+    private_key: str | None,
+    production: bool,
+    account_address: str | None,
+    no_confirm: bool,
+):
+    """Transfer USD/spot tokens, between perp and spot, or with vaults
+
+    \b
+    ROW is one of:
+      usd <destination> <amount>
+      spot <destination> <token> <amount>
+      to-perp <amount> | to-spot <amount>
+      vault-deposit <vault> <amount> | vault-withdraw <vault> <amount>
+    """
+    transfer_run(
+        production,
+        private_key,
+        account_address,
+        row,
+        path,
+        no_confirm,
+    )
 
 
 if __name__ == "__main__":
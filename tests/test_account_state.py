@@ -0,0 +1,104 @@
+import io
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import click
+from rich.console import Console
+
+from handlers.account_state import (
+    AccountStateService,
+    load_state,
+    load_state_after_action,
+)
+
+ADDRESS = "0xb764428a29EAEbe8e2301F5924746F818b331F5A"
+
+STATE = {
+    "marginSummary": {
+        "accountValue": "1234.5",
+        "totalNtlPos": "100.0",
+        "totalRawUsd": "1134.5",
+        "totalMarginUsed": "10.0",
+    },
+    "withdrawable": "1200.25",
+    "assetPositions": [{"position": {"coin": "ETH", "szi": "0.1"}}],
+}
+
+
+class SlowInfo:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def user_state(self, address):
+        self.calls += 1
+        time.sleep(self.delay)
+        return STATE
+
+
+class TestAccountStateService(unittest.TestCase):
+    def test_typed_views(self):
+        state = AccountStateService(SlowInfo()).get(ADDRESS)
+        self.assertEqual(state.account_value, 1234.5)
+        self.assertEqual(state.withdrawable, 1200.25)
+        self.assertEqual(state.margin_summary["totalMarginUsed"], 10.0)
+        self.assertEqual(len(state.asset_positions), 1)
+
+    def test_duplicate_reads_share_one_fetch(self):
+        info = SlowInfo()
+        states = AccountStateService(info)
+        states.get(ADDRESS)
+        states.get(ADDRESS.lower())
+        self.assertEqual(info.calls, 1)
+
+        states.get(ADDRESS, max_age=0)
+        self.assertEqual(info.calls, 2)
+        states.invalidate(ADDRESS)
+        states.get(ADDRESS)
+        self.assertEqual(info.calls, 3)
+
+    def test_concurrent_reads_are_coalesced(self):
+        info = SlowInfo(delay=0.1)
+        states = AccountStateService(info)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(states.get(ADDRESS)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(info.calls, 1)
+        self.assertEqual(len({id(state) for state in results}), 1)
+
+    def test_failures_are_raised_and_not_cached(self):
+        info = MagicMock()
+        info.user_state.side_effect = [ConnectionError("reset"), STATE]
+        states = AccountStateService(info)
+        with self.assertRaises(click.ClickException):
+            load_state(states, ADDRESS)
+        self.assertEqual(load_state(states, ADDRESS).account_value, 1234.5)
+        self.assertEqual(info.user_state.call_count, 2)
+
+    def test_failure_after_an_action_is_a_warning(self):
+        info = MagicMock()
+        info.user_state.side_effect = ConnectionError("reset")
+        out = io.StringIO()
+        state = load_state_after_action(
+            Console(file=out), AccountStateService(info), ADDRESS
+        )
+        self.assertIsNone(state)
+        self.assertIn("Could not fetch the balance", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
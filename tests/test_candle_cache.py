@@ -0,0 +1,127 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.candles import (
+    CANDLES_PAGE_SIZE,
+    CandleCache,
+    align,
+    parse_time,
+    subtract_ranges,
+    sync_candles,
+    union_ranges,
+)
+
+MIN = 60_000
+
+
+class FakeApi:
+    """Answers candleSnapshot with one candle per minute and records requests."""
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def post(self, path, payload):
+        req = payload["req"]
+        with self.lock:
+            self.requests.append((req["coin"], req["startTime"], req["endTime"]))
+        first = -(-req["startTime"] // MIN) * MIN
+        return [
+            {
+                "t": t,
+                "T": t + MIN - 1,
+                "s": req["coin"],
+                "i": req["interval"],
+                "o": "1.0",
+                "h": "2.0",
+                "l": "0.5",
+                "c": str(t / MIN),
+                "v": "10",
+                "n": 3,
+            }
+            for t in range(first, req["endTime"] + 1, MIN)
+        ][:CANDLES_PAGE_SIZE]
+
+
+class TestRanges(unittest.TestCase):
+    def test_subtract_ranges(self):
+        covered = [(10, 20), (30, 40)]
+        self.assertEqual(subtract_ranges(covered, 0, 50), [(0, 10), (20, 30), (40, 50)])
+        self.assertEqual(subtract_ranges(covered, 12, 18), [])
+        self.assertEqual(subtract_ranges(covered, 15, 35), [(20, 30)])
+        self.assertEqual(subtract_ranges([], 5, 6), [(5, 6)])
+
+    def test_union_ranges(self):
+        self.assertEqual(
+            union_ranges([(30, 40), (10, 20), (20, 25), (35, 50), (60, 60)]),
+            [(10, 25), (30, 50)],
+        )
+
+    def test_align_and_parse_time(self):
+        self.assertEqual(align("1m", 61_000, 119_999), (60_000, 120_000))
+        self.assertEqual(parse_time("1700000000"), 1_700_000_000_000)
+        self.assertEqual(parse_time("1700000000000"), 1_700_000_000_000)
+        self.assertEqual(parse_time("1970-01-02"), 86_400_000)
+
+
+class TestCandleCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = CandleCache(self.tmp.name)
+        self.api = FakeApi()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_warm_query_makes_no_requests(self):
+        lo, hi = 0, 100 * MIN
+        now = 1000 * MIN
+        sync_candles(self.api, self.cache, ["BTC", "ETH"], "1m", lo, hi, now)
+        self.assertEqual(len(self.api.requests), 2)
+
+        self.api.requests = []
+        counts = sync_candles(self.api, self.cache, ["BTC", "ETH"], "1m", lo, hi, now)
+        self.assertEqual(self.api.requests, [])
+        self.assertEqual(counts, {"BTC": 0, "ETH": 0})
+        self.assertEqual(self.cache.query("BTC", "1m", lo, hi)["t"].size, 100)
+
+    def test_only_gaps_are_fetched(self):
+        now = 1000 * MIN
+        sync_candles(self.api, self.cache, ["BTC"], "1m", 20 * MIN, 40 * MIN, now)
+        self.api.requests = []
+
+        sync_candles(self.api, self.cache, ["BTC"], "1m", 0, 60 * MIN, now)
+
+        self.assertEqual(
+            sorted(self.api.requests),
+            [("BTC", 0, 20 * MIN - 1), ("BTC", 40 * MIN, 60 * MIN - 1)],
+        )
+        candles = self.cache.query("BTC", "1m", 0, 60 * MIN)
+        self.assertEqual(list(candles["t"]), [i * MIN for i in range(60)])
+
+    def test_large_gap_is_paged(self):
+        hi = (2 * CANDLES_PAGE_SIZE + 10) * MIN
+        sync_candles(self.api, self.cache, ["BTC"], "1m", 0, hi, hi)
+        self.assertEqual(len(self.api.requests), 3)
+        self.assertEqual(self.cache.query("BTC", "1m", 0, hi)["t"].size, hi // MIN)
+
+    def test_open_candle_is_refetched(self):
+        now = 50 * MIN + 30_000
+        sync_candles(self.api, self.cache, ["BTC"], "1m", 40 * MIN, 51 * MIN, now)
+        self.api.requests = []
+
+        sync_candles(self.api, self.cache, ["BTC"], "1m", 40 * MIN, 51 * MIN, now)
+
+        self.assertEqual(self.api.requests, [("BTC", 50 * MIN, 51 * MIN - 1)])
+        self.assertEqual(self.cache.query("BTC", "1m", 0, 51 * MIN)["t"].size, 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from typing import Any
+from unittest.mock import patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from web3 import HTTPProvider, Web3
+
+import handlers.confirmations as confirmations
+from handlers.confirmations import ConfirmationTracker, arb_ws_url
+
+TX = ["0x" + f"{i:064x}" for i in range(1, 4)]
+
+
+class FakeChain(HTTPProvider):
+    """Advances one block per batch; `mined` maps tx hash -> block number."""
+
+    def __init__(self, head, mined):
+        super().__init__("http://127.0.0.1:1")
+        self.head = head
+        self.mined = mined
+        self.batches = []
+
+    def make_request(self, method: Any, params: Any) -> Any:
+        raise AssertionError(f"unexpected single request {method}")
+
+    def make_batch_request(self, batch_requests: Any) -> Any:
+        self.head += 1
+        self.batches.append([method for method, _ in batch_requests])
+        responses = []
+        for i, (method, params) in enumerate(batch_requests):
+            if method == "eth_blockNumber":
+                result: Any = hex(self.head)
+            else:
+                block = self.mined.get(params[0])
+                result = None
+                if block is not None and block <= self.head:
+                    result = {
+                        "transactionHash": params[0],
+                        "blockNumber": hex(block),
+                        "status": "0x1",
+                        "gasUsed": "0x5208",
+                    }
+            responses.append({"jsonrpc": "2.0", "id": i, "result": result})
+        return responses
+
+
+class TestConfirmationTracker(unittest.TestCase):
+    def setUp(self):
+        self.intervals = [
+            patch.object(confirmations, "MIN_POLL_INTERVAL", 0.001),
+            patch.object(confirmations, "MAX_POLL_INTERVAL", 0.004),
+        ]
+        for p in self.intervals:
+            p.start()
+
+    def tearDown(self):
+        for p in self.intervals:
+            p.stop()
+
+    def test_resolves_every_hash_in_one_batch_per_pass(self):
+        chain = FakeChain(100, {TX[0]: 101, TX[1]: 101, TX[2]: 103})
+        tracker = ConfirmationTracker(Web3(chain))
+        receipts = tracker.wait(TX, timeout=5)
+
+        self.assertEqual(receipts[TX[0]]["blockNumber"], 101)
+        self.assertEqual(receipts[TX[2]]["gasUsed"], 21000)
+        self.assertEqual(tracker.passes, 3)
+        self.assertEqual(len(chain.batches[0]), 4)
+        # Resolved hashes drop out of later passes
+        self.assertEqual(
+            chain.batches[-1], ["eth_blockNumber"] + ["eth_getTransactionReceipt"]
+        )
+
+    def test_waits_for_confirmation_depth(self):
+        chain = FakeChain(100, {TX[0]: 101})
+        tracker = ConfirmationTracker(Web3(chain), confirmations=3)
+        receipt = tracker.wait([TX[0]], timeout=5)[TX[0]]
+        self.assertEqual(receipt["blockNumber"], 101)
+        self.assertGreaterEqual(chain.head, 103)
+
+    def test_reorged_receipt_goes_back_to_pending(self):
+        chain = FakeChain(100, {TX[0]: 101})
+        original = chain.make_batch_request
+
+        def reorg(batch_requests):
+            # The tx moves from block 101 to 104 once it has been seen
+            if len(chain.batches) == 1:
+                chain.mined[TX[0]] = 104
+            return original(batch_requests)
+
+        chain.make_batch_request = reorg
+        receipt = ConfirmationTracker(Web3(chain), confirmations=2).wait(
+            [TX[0]], timeout=5
+        )[TX[0]]
+        self.assertEqual(receipt["blockNumber"], 104)
+
+    def test_timeout_is_reported_per_hash(self):
+        chain = FakeChain(100, {TX[0]: 101})
+        receipts = ConfirmationTracker(Web3(chain)).wait(TX[:2], timeout=0.02)
+        self.assertEqual(receipts[TX[0]]["status"], 1)
+        self.assertIsInstance(receipts[TX[1]], TimeoutError)
+
+    def test_new_heads_wake_the_tracker(self):
+        chain = FakeChain(100, {TX[0]: 102})
+        tracker = ConfirmationTracker(Web3(chain), ws_url="ws://heads")
+        tracker._subscribe = lambda url: setattr(tracker, "_ws", _NullWs())
+
+        with (
+            patch.object(confirmations, "MIN_POLL_INTERVAL", 5.0),
+            patch.object(confirmations, "MAX_POLL_INTERVAL", 5.0),
+        ):
+            tracker.on_head(101)
+            threading.Timer(0.05, tracker.on_head, args=(102,)).start()
+            started = time.monotonic()
+            receipt = tracker.wait([TX[0]], timeout=10)[TX[0]]
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(receipt["blockNumber"], 102)
+
+    def test_ws_url_follows_rpc_override(self):
+        with patch.dict(os.environ, {"HLEXEC_ARB_WS": "", "HLEXEC_ARB_RPC": ""}):
+            self.assertIsNone(arb_ws_url(False))
+        env = {"HLEXEC_ARB_RPC": "http://127.0.0.1:8545"}
+        with patch.dict(os.environ, env):
+            os.environ.pop("HLEXEC_ARB_WS", None)
+            self.assertIsNone(arb_ws_url(False))
+            os.environ["HLEXEC_ARB_WS"] = "ws://127.0.0.1:8545"
+            self.assertEqual(arb_ws_url(False), "ws://127.0.0.1:8545")
+
+
+class _NullWs:
+    def close(self):
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+from typing import Any
+from unittest.mock import patch
+
+import click
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from rich.console import Console
+from web3 import HTTPProvider, Web3
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.constants import BRIDGE2_ABI, BRIDGE2_TEST_ADDR, USDC_ARB_TEST_ADDR
+from handlers.deposit_batch import PERMIT_TYPES, load_batch, submit_batch
+
+KEYS = ["0x" + f"{i:064x}" for i in (0xA1, 0xA2, 0xA3)]
+SUBMITTER = Account.from_key("0x" + "5" * 64)
+BRIDGE = Web3.to_checksum_address(BRIDGE2_TEST_ADDR)
+USDC = Web3.to_checksum_address(USDC_ARB_TEST_ADDR)
+CHAIN_ID = 421614
+
+
+def _selector(signature):
+    return "0x" + Web3.keccak(text=signature)[:4].hex()
+
+
+def _word(value):
+    return "0x" + value.to_bytes(32, "big").hex()
+
+
+class Revert(Exception):
+    pass
+
+
+class FakeChain(HTTPProvider):
+    """A local EVM stand-in: serves the reads the batch deposit makes and
+    checks each permit like USDC's `permit` would before accepting it."""
+
+    def __init__(self, balances, nonces):
+        super().__init__("http://127.0.0.1:1")
+        self.balances = balances
+        self.nonces = nonces
+        self.batches = []
+        self.sent = []
+        self.bridge = Web3().eth.contract(address=BRIDGE, abi=BRIDGE2_ABI)
+
+    def _call(self, data: str) -> str:
+        if data.startswith(_selector("decimals()")):
+            return _word(6)
+        owner = Web3.to_checksum_address("0x" + data[-40:])
+        if data.startswith(_selector("balanceOf(address)")):
+            return _word(self.balances.get(owner, 0))
+        if data.startswith(_selector("nonces(address)")):
+            return _word(self.nonces.get(owner, 0))
+        raise AssertionError(f"unexpected call {data[:10]}")
+
+    def _check_permits(self, data: str) -> None:
+        _, args = self.bridge.decode_function_input(data)
+        for deposit in args["deposits"]:
+            user, usd, sig = deposit["user"], deposit["usd"], deposit["signature"]
+            message = {
+                "owner": user,
+                "spender": BRIDGE,
+                "value": usd,
+                "nonce": self.nonces.get(user, 0),
+                "deadline": deposit["deadline"],
+            }
+            domain = {
+                "name": "USDC2",
+                "version": "1",
+                "chainId": CHAIN_ID,
+                "verifyingContract": USDC,
+            }
+            signable = encode_typed_data(domain, PERMIT_TYPES, message)
+            vrs = (sig["v"], sig["r"], sig["s"])
+            if Account.recover_message(signable, vrs=vrs) != user:
+                raise Revert("EIP2612: invalid signature")
+            if self.balances.get(user, 0) < usd:
+                raise Revert("ERC20: transfer amount exceeds balance")
+
+    def make_batch_request(self, batch_requests: Any) -> Any:
+        self.batches.append([method for method, _ in batch_requests])
+        responses = []
+        for i, (method, params) in enumerate(batch_requests):
+            response: dict = {"jsonrpc": "2.0", "id": i}
+            try:
+                if method == "eth_call":
+                    response["result"] = self._call(params[0]["data"])
+                elif method == "eth_getTransactionReceipt":
+                    response["result"] = self._receipt(params[0])
+                elif method == "eth_estimateGas":
+                    self._check_permits(params[0]["data"])
+                    response["result"] = hex(90_000)
+                else:
+                    response["result"] = {
+                        "eth_getBalance": hex(10**18),
+                        "eth_getTransactionCount": "0x3",
+                        "eth_feeHistory": {
+                            "baseFeePerGas": ["0x989680"] * 11,
+                            "reward": [["0x0"]] * 10,
+                        },
+                        "eth_chainId": hex(CHAIN_ID),
+                        "eth_blockNumber": "0x10",
+                    }[method]
+            except Revert as e:
+                response["error"] = {"code": 3, "message": str(e)}
+            responses.append(response)
+        return responses
+
+    def _receipt(self, tx_hash: str) -> Any:
+        if not self.sent:
+            return None
+        return {
+            "transactionHash": tx_hash,
+            "blockNumber": "0x10",
+            "status": "0x1",
+            "gasUsed": hex(80_000),
+            "logs": [],
+        }
+
+    def make_request(self, method: Any, params: Any) -> Any:
+        if method == "eth_sendRawTransaction":
+            self.sent.append(params[0])
+            return {"jsonrpc": "2.0", "id": 0, "result": "0x" + "cd" * 32}
+        raise AssertionError(f"unexpected single request {method}")
+
+
+class TestLoadBatch(unittest.TestCase):
+    def _load(self, text, env=None):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(text)
+        try:
+            with patch.dict(os.environ, env or {}):
+                return load_batch(f.name)
+        finally:
+            os.unlink(f.name)
+
+    def test_parses_lines_comments_and_env_keys(self):
+        deposits = self._load(
+            f"# key,amount\n{KEYS[0]}, 10\n\n$DEPOSITOR_KEY,5.5\n",
+            {"DEPOSITOR_KEY": KEYS[1]},
+        )
+        self.assertEqual(
+            [(d.key.hex(), a) for d, a in deposits],
+            [(KEYS[0][2:], Decimal("10")), (KEYS[1][2:], Decimal("5.5"))],
+        )
+
+    def test_rejects_bad_entries(self):
+        for text in (
+            f"{KEYS[0]},4.99\n",
+            f"{KEYS[0]},ten\n",
+            "0x1234,10\n",
+            f"{KEYS[0]},10\n{KEYS[0]},20\n",
+            "$MISSING_DEPOSITOR_KEY,10\n",
+            "# nothing\n",
+        ):
+            with self.assertRaises(click.ClickException):
+                self._load(text)
+
+
+class TestSubmitBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(
+            os.environ, {"HLEXEC_CACHE_DIR": self.tmp.name, "HLEXEC_ARB_WS": ""}
+        )
+        self.env.start()
+        self.depositors = [Account.from_key(k) for k in KEYS]
+        self.deposits = [
+            (d, Decimal(a)) for d, a in zip(self.depositors, ("5", "12.5", "100"))
+        ]
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def _submit(self, chain):
+        return submit_batch(
+            Console(file=io.StringIO()),
+            Web3(chain),
+            False,
+            SUBMITTER,
+            self.deposits,
+        )
+
+    def test_one_transaction_carries_every_permit(self):
+        chain = FakeChain(
+            {d.address: 200_000_000 for d in self.depositors},
+            {self.depositors[1].address: 4},
+        )
+        tx_hash, since_ms = self._submit(chain)
+
+        self.assertEqual(tx_hash, "0x" + "cd" * 32)
+        self.assertEqual(len(chain.sent), 1)
+        # Reads in one batch (cold cache), the gas estimate, then the receipt
+        self.assertEqual(len(chain.batches), 3)
+        self.assertEqual(chain.batches[1], ["eth_estimateGas"])
+        self.assertEqual(
+            chain.batches[2], ["eth_blockNumber", "eth_getTransactionReceipt"]
+        )
+
+        self.assertEqual(Account.recover_transaction(chain.sent[0]), SUBMITTER.address)
+        # EIP-1559 (type 2) rather than a legacy gasPrice transaction
+        self.assertEqual(Web3.to_bytes(hexstr=chain.sent[0])[0], 2)
+
+    def test_insufficient_balance_is_reported_per_depositor(self):
+        chain = FakeChain({self.depositors[0].address: 200_000_000}, {})
+        with self.assertRaises(click.ClickException) as ctx:
+            self._submit(chain)
+        self.assertIn(self.depositors[1].address, ctx.exception.message)
+        self.assertIn(self.depositors[2].address, ctx.exception.message)
+        self.assertEqual(chain.sent, [])
+
+    def test_stale_permit_nonce_fails_estimation(self):
+        chain = FakeChain({d.address: 200_000_000 for d in self.depositors}, {})
+        original = chain._call
+
+        def lagging_nonce(data):
+            # The RPC reports nonce 0 while the token expects 1
+            if data.startswith(_selector("nonces(address)")):
+                chain.nonces = {self.depositors[2].address: 1}
+                return _word(0)
+            return original(data)
+
+        chain._call = lagging_nonce
+        with self.assertRaises(click.ClickException) as ctx:
+            self._submit(chain)
+        self.assertIn("invalid signature", ctx.exception.message)
+        self.assertEqual(chain.sent, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
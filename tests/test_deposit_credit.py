@@ -0,0 +1,177 @@
+import io
+import os
+import sys
+import unittest
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from rich.console import Console
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import handlers.deposit as deposit
+from handlers.deposit import _match_deposit, _wait_for_hl_credits
+
+USER = "0xb764428a29EAEbe8e2301F5924746F818b331F5A"
+TX = "0x" + "ab" * 32
+
+
+def _console():
+    return Console(file=io.StringIO())
+
+
+def _found(entry):
+    assert entry is not None
+    return entry
+
+
+def _update(time, usdc, tx_hash="0x" + "00" * 32, kind="deposit"):
+    return {"time": time, "hash": tx_hash, "delta": {"type": kind, "usdc": usdc}}
+
+
+class FakeWs:
+    """Stands in for WebsocketManager; replays `messages` on subscribe."""
+
+    messages = []
+
+    def __init__(self, base_url):
+        self.stopped = False
+
+    def start(self):
+        pass
+
+    def subscribe(self, subscription, callback):
+        for msg in self.messages:
+            callback(msg)
+        return 1
+
+    def stop(self):
+        self.stopped = True
+
+
+class TestMatchDeposit(unittest.TestCase):
+    def test_hash_match_wins(self):
+        updates = [
+            _update(2000, "10.0"),
+            _update(500, "10.0", TX.upper().replace("0X", "0x")),
+        ]
+        self.assertEqual(
+            _found(_match_deposit(updates, TX, Decimal("10"), 1000))["time"], 500
+        )
+
+    def test_amount_and_time_fallback(self):
+        updates = [
+            _update(900, "10.0"),
+            _update(1100, "9.99"),
+            _update(1200, "10.0", kind="withdraw"),
+            _update(1300, "10.000000"),
+        ]
+        self.assertEqual(
+            _found(_match_deposit(updates, TX, Decimal("10"), 1000))["time"], 1300
+        )
+
+    def test_no_match(self):
+        self.assertIsNone(_match_deposit([_update(900, "10")], TX, Decimal("10"), 1000))
+
+
+class TestWaitForCredit(unittest.TestCase):
+    def test_websocket_update_confirms_without_polling(self):
+        FakeWs.messages = [
+            {
+                "channel": "userNonFundingLedgerUpdates",
+                "data": {
+                    "user": USER,
+                    "isSnapshot": True,
+                    "nonFundingLedgerUpdates": [_update(1, "25.0", TX)],
+                },
+            }
+        ]
+        info = Mock()
+        with patch.object(deposit, "WebsocketManager", FakeWs):
+            entry = _wait_for_hl_credits(
+                _console(),
+                info,
+                "http://x",
+                [(USER, TX, Decimal("25"))],
+                0,
+                timeout=5,
+            ).get(0)
+        self.assertEqual(_found(entry)["delta"]["usdc"], "25.0")
+        info.user_non_funding_ledger_updates.assert_not_called()
+
+    def test_polls_with_backoff_when_websocket_is_silent(self):
+        FakeWs.messages = []
+        info = Mock()
+        info.user_non_funding_ledger_updates.side_effect = [
+            [],
+            [_update(1, "25.0", "0x01")],
+            [_update(1, "25.0", "0x01"), _update(5, "25.0", TX)],
+        ]
+        sleeps = []
+        with (
+            patch.object(deposit, "WebsocketManager", FakeWs),
+            patch.object(deposit, "MIN_POLL_INTERVAL", 0.001),
+            patch.object(deposit, "MAX_POLL_INTERVAL", 0.003),
+            patch.object(
+                deposit.threading.Event,
+                "wait",
+                lambda self, t=None: sleeps.append(t) or False,
+            ),
+        ):
+            entry = _wait_for_hl_credits(
+                _console(),
+                info,
+                "http://x",
+                [(USER, TX, Decimal("25"))],
+                2,
+                timeout=5,
+            ).get(0)
+        self.assertEqual(_found(entry)["time"], 5)
+        # Ignore waits made by rich's refresh thread
+        self.assertEqual([t for t in sleeps if t and t < 0.01], [0.001, 0.002, 0.003])
+        info.user_non_funding_ledger_updates.assert_called_with(USER, 2)
+
+    def test_timeout_returns_none(self):
+        FakeWs.messages = []
+        info = Mock()
+        info.user_non_funding_ledger_updates.return_value = []
+        with patch.object(deposit, "WebsocketManager", FakeWs):
+            entry = _wait_for_hl_credits(
+                _console(),
+                info,
+                "http://x",
+                [(USER, TX, Decimal("25"))],
+                0,
+                timeout=0.01,
+            ).get(0)
+        self.assertIsNone(entry)
+
+    def test_pipelined_deposits_claim_distinct_updates(self):
+        FakeWs.messages = []
+        other = "0x" + "ef" * 32
+        info = Mock()
+        # Neither update carries a matching hash: both fall back to amount
+        info.user_non_funding_ledger_updates.return_value = [
+            _update(10, "5.0"),
+            _update(11, "5.0"),
+        ]
+        with (
+            patch.object(deposit, "WebsocketManager", FakeWs),
+            patch.object(deposit, "MIN_POLL_INTERVAL", 0.001),
+        ):
+            credits = _wait_for_hl_credits(
+                _console(),
+                info,
+                "http://x",
+                [(USER, TX, Decimal("5")), (USER, other, Decimal("5"))],
+                0,
+                timeout=5,
+            )
+        self.assertEqual(sorted(e["time"] for e in credits.values()), [10, 11])
+        self.assertEqual(info.user_non_funding_ledger_updates.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+from typing import Any
+from unittest.mock import patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from web3 import HTTPProvider, Web3
+
+from handlers.constants import BRIDGE2_TEST_ADDR, ERC20_ABI, USDC_ARB_TEST_ADDR
+from handlers.deposit import _presend_reads
+from handlers.evm import RpcError, rpc_batch, to_int
+from handlers.fees import eip1559_fees
+
+SIGNER = "0x57FbAe717f5712C3Bd612f34482832c86D9b17f2"
+
+ANSWERS = {
+    "eth_getBalance": "0xde0b6b3a7640000",  # 1 ETH
+    "eth_getTransactionCount": "0x7",
+    "eth_feeHistory": {
+        "baseFeePerGas": ["0x5f5e100"] * 4 + ["0x6b49d200"],
+        "reward": [["0x0"], ["0x3b9aca00"], ["0x1"], ["0x3b9aca00"]],
+    },
+    "eth_chainId": "0x66eee",
+    "eth_estimateGas": "0xc350",
+}
+
+
+class FakeProvider(HTTPProvider):
+    """Answers JSON-RPC batches locally and records each round trip."""
+
+    def __init__(self):
+        super().__init__("http://127.0.0.1:1")
+        self.batches = []
+        self.override: Any = None
+
+    def make_request(self, method: Any, params: Any) -> Any:
+        raise AssertionError(f"unexpected single request {method}")
+
+    def make_batch_request(self, batch_requests: Any) -> Any:
+        if self.override is not None:
+            return self.override
+        self.batches.append([method for method, _ in batch_requests])
+        responses = []
+        for i, (method, params) in enumerate(batch_requests):
+            if method == "eth_call":
+                selector = params[0]["data"][:10]
+                # decimals() -> 6, balanceOf() -> 100 USDC
+                result = (
+                    "0x"
+                    + (6 if selector == "0x313ce567" else 100_000_000)
+                    .to_bytes(32, "big")
+                    .hex()
+                )
+            else:
+                result = ANSWERS[method]
+            responses.append({"jsonrpc": "2.0", "id": i, "result": result})
+        return responses
+
+
+class TestDepositReads(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"HLEXEC_CACHE_DIR": self.tmp.name})
+        self.env.start()
+        self.provider = FakeProvider()
+        self.w3 = Web3(self.provider)
+        self.usdc = self.w3.eth.contract(
+            address=Web3.to_checksum_address(USDC_ARB_TEST_ADDR), abi=ERC20_ABI
+        )
+        self.bridge = Web3.to_checksum_address(BRIDGE2_TEST_ADDR)
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def _reads(self):
+        return _presend_reads(
+            self.w3, False, self.usdc, self.bridge, SIGNER, Decimal("12.5")
+        )
+
+    def test_cold_then_warm_round_trips(self):
+        cold = self._reads()
+        self.assertEqual(len(self.provider.batches), 1)
+        self.assertIn("eth_chainId", self.provider.batches[0])
+        self.assertIn("eth_estimateGas", self.provider.batches[0])
+        self.assertEqual(cold["decimals"], 6)
+        self.assertEqual(cold["chain_id"], 421614)
+        self.assertEqual(cold["amount_raw"], 12_500_000)
+        self.assertEqual(cold["usdc_balance"], 100_000_000)
+        self.assertEqual(cold["nonce"], 7)
+
+        self.provider.batches = []
+        warm = self._reads()
+        self.assertEqual(len(self.provider.batches), 1)
+        self.assertNotIn("eth_chainId", self.provider.batches[0])
+        # The transfer's gas estimate is cached too
+        self.assertNotIn("eth_estimateGas", self.provider.batches[0])
+        self.assertEqual(warm["gas_estimate"], 50_000)
+
+    def test_expired_gas_estimate_is_refreshed_in_the_batch(self):
+        self._reads()
+        self.provider.batches = []
+        with patch("handlers.evm.time.time", return_value=2e10):
+            reads = self._reads()
+        self.assertEqual(len(self.provider.batches), 1)
+        self.assertIn("eth_estimateGas", self.provider.batches[0])
+        self.assertEqual(to_int(reads["gas_estimate"]), 50_000)
+
+    def test_eip1559_fees_from_history(self):
+        fees = eip1559_fees(ANSWERS["eth_feeHistory"])
+        # Next block's base fee (1.8 gwei) doubled, plus the median tip
+        self.assertEqual(fees["maxPriorityFeePerGas"], 500_000_000)
+        self.assertEqual(fees["maxFeePerGas"], 2 * 1_800_000_000 + 500_000_000)
+        self.assertEqual(
+            eip1559_fees({"baseFeePerGas": ["0x64", "0x64"]}),
+            {"maxFeePerGas": 200, "maxPriorityFeePerGas": 0},
+        )
+        with self.assertRaises(RpcError):
+            eip1559_fees(RpcError("method not found"))
+
+    def test_transaction_builds_without_rpc_calls(self):
+        reads = self._reads()
+        tx = self.usdc.functions.transfer(
+            self.bridge, reads["amount_raw"]
+        ).build_transaction(
+            {
+                "from": SIGNER,
+                "nonce": reads["nonce"],
+                "type": 2,
+                **reads["fees"],
+                "gas": 60_000,
+                "chainId": reads["chain_id"],
+            }
+        )
+        self.assertEqual(tx["chainId"], 421614)
+        self.assertNotIn("gasPrice", tx)
+
+    def test_rpc_batch_item_errors(self):
+        provider = self.provider
+        provider.override = [
+            {"id": 0, "result": "0x1"},
+            {"id": 1, "error": {"code": 3, "message": "execution reverted"}},
+        ]
+        first, second = rpc_batch(
+            self.w3, [("eth_chainId", []), ("eth_estimateGas", [{}])]
+        )
+        self.assertEqual(to_int(first), 1)
+        self.assertIsInstance(second, RpcError)
+        with self.assertRaises(RpcError):
+            to_int(second)
+
+        provider.override = {"error": {"message": "rate limited"}}
+        with self.assertRaises(RpcError):
+            rpc_batch(self.w3, [("eth_chainId", [])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -147,6 +147,13 @@ class TestDisplayFunctions(unittest.TestCase):
         # Should print table with partial status
         self.assertEqual(self.mock_console.print.call_count, 2)
 
+    def test_render_summary_without_final_balance(self):
+        """Test deposit summary rendering when the final balance is unknown"""
+        _render_summary(self.mock_console, 100.0, 100.0, None)
+
+        table = self.mock_console.print.call_args[0][0]
+        self.assertNotIn("Final Balance", table.columns[0]._cells)
+
     # Tests for status display functions
     def test_render_positions_empty(self):
         """Test position rendering with no positions"""
@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.funding import funding_by_day
+from handlers.pnl import funding_arrays
+from handlers.store import (
+    FUNDING_LAG_MS,
+    FUNDING_PAGE_SIZE,
+    FUNDING_WINDOW_MS,
+    OrderStore,
+)
+
+USER = "0xb764428a29EAEbe8e2301F5924746F818b331F5A"
+HOUR = 3_600_000
+DAY = 24 * HOUR
+
+
+def _payment(time, coin="ETH", usdc=-0.5):
+    return {
+        "time": time,
+        "hash": "0x0",
+        "delta": {
+            "type": "funding",
+            "coin": coin,
+            "usdc": str(usdc),
+            "szi": "1.0",
+            "fundingRate": "0.0000125",
+        },
+    }
+
+
+class FakeInfo:
+    """Serves hourly funding for `coins` from a fixed history, honouring the
+    page size, and records the requested windows."""
+
+    def __init__(self, coins, until):
+        self.coins = coins
+        self.until = until
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def user_funding_history(self, user, startTime, endTime=None):
+        with self.lock:
+            self.calls.append((startTime, endTime))
+        end = min(self.until, endTime if endTime is not None else self.until)
+        first = -(-startTime // HOUR) * HOUR
+        page = [
+            _payment(t, coin)
+            for t in range(first, end + 1, HOUR)
+            for coin in self.coins
+        ]
+        return page[:FUNDING_PAGE_SIZE]
+
+
+class TestFundingSync(unittest.TestCase):
+    def setUp(self):
+        self.store = OrderStore(":memory:")
+
+    def _count(self):
+        return len(self.store.funding_rows(USER).fetchall())
+
+    def test_large_gap_is_split_into_windows(self):
+        # 30 coins * 48 payments per window exceeds one page, so each window
+        # also has to page forwards
+        end = 10 * DAY
+        info = FakeInfo([f"C{i}" for i in range(30)], end)
+
+        self.store.sync_funding(info, USER, 0, end)
+
+        self.assertEqual(self._count(), 30 * (end // HOUR + 1))
+        starts = {s for s, _e in info.calls}
+        for lo in range(0, end, FUNDING_WINDOW_MS):
+            self.assertIn(lo, starts)
+        self.assertTrue(
+            all(e is not None and e - s <= FUNDING_WINDOW_MS for s, e in info.calls)
+        )
+
+    def test_repeated_sync_is_one_small_request(self):
+        info = FakeInfo(["ETH"], 5 * DAY)
+        self.store.sync_funding(info, USER, 0, 5 * DAY)
+
+        info.until = 5 * DAY + 2 * HOUR
+        info.calls = []
+        self.store.sync_funding(info, USER, 0, 5 * DAY + 2 * HOUR)
+
+        self.assertEqual(info.calls, [(5 * DAY - FUNDING_LAG_MS, 5 * DAY + 2 * HOUR)])
+        self.assertEqual(self._count(), 5 * 24 + 3)
+
+    def test_longer_history_backfills_before_low_water(self):
+        info = FakeInfo(["ETH"], 10 * DAY)
+        self.store.sync_funding(info, USER, 8 * DAY, 10 * DAY)
+        self.assertEqual(self._count(), 2 * 24 + 1)
+
+        info.calls = []
+        self.store.sync_funding(info, USER, 6 * DAY, 10 * DAY)
+        self.assertEqual(self._count(), 4 * 24 + 1)
+        self.assertIn((6 * DAY, 8 * DAY), info.calls)
+        self.assertEqual(self.store.low_water(USER, "funding"), 6 * DAY)
+        self.assertEqual(
+            self.store.high_water(USER, "funding"), 10 * DAY - FUNDING_LAG_MS
+        )
+
+    def test_funding_by_day_pivot(self):
+        funding = funding_arrays(
+            [
+                ("ETH", 1 * DAY + HOUR, -1.0),
+                ("ETH", 1 * DAY + 2 * HOUR, -1.5),
+                ("BTC", 1 * DAY + HOUR, 0.25),
+                ("BTC", 3 * DAY, 0.5),
+            ]
+        )
+        report = funding_by_day(funding, DAY)
+
+        self.assertEqual(list(report["coins"]), ["ETH", "BTC"])
+        self.assertEqual(list(report["days"]), [1 * DAY, 3 * DAY])
+        np.testing.assert_allclose(report["grid"], [[-2.5, 0.25], [0.0, 0.5]])
+        np.testing.assert_allclose(report["totals"], [-2.5, 0.75])
+        self.assertEqual(list(report["counts"]), [2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.book import ASK, BID, L2Book
+
+
+def _levels(bids, asks):
+    return [
+        [{"px": str(px), "sz": str(sz), "n": 1} for px, sz in bids],
+        [{"px": str(px), "sz": str(sz), "n": 1} for px, sz in asks],
+    ]
+
+
+class TestL2Book(unittest.TestCase):
+    def setUp(self):
+        self.book = L2Book("ETH")
+        self.book.update(
+            _levels(
+                [(99.99, 1.0), (99.9, 2.0), (99.0, 4.0)],
+                [(100.01, 3.0), (100.5, 1.0)],
+            ),
+            1000,
+        )
+
+    def test_stats(self):
+        stats = self.book.stats(top=2)
+        self.assertAlmostEqual(stats["mid"], 100.0)
+        self.assertAlmostEqual(stats["spread"], 0.02)
+        self.assertAlmostEqual(stats["spread_bps"], 2.0)
+        # top 2: 3.0 bid vs 4.0 ask
+        self.assertAlmostEqual(stats["imbalance"], -1 / 7)
+        bid_10, ask_10 = stats["depth"][10]
+        self.assertAlmostEqual(bid_10, 99.99 + 2 * 99.9)
+        self.assertAlmostEqual(ask_10, 3 * 100.01)
+        self.assertAlmostEqual(stats["depth"][100][1], 3 * 100.01 + 100.5)
+        self.assertEqual(stats["seq"], 1)
+
+    def test_update_replaces_levels_in_place(self):
+        px = self.book.px
+        self.book.on_message(
+            {
+                "channel": "l2Book",
+                "data": {
+                    "coin": "ETH",
+                    "time": 2000,
+                    "levels": _levels([(99.5, 1.0)], [(100.2, 2.0), (100.3, 1.0)]),
+                },
+            }
+        )
+        self.assertIs(self.book.px, px)
+        self.assertEqual(list(self.book.count), [1, 2])
+        self.assertEqual(self.book.sz[BID, 1], 0.0)
+        self.assertEqual(self.book.cum_sz[ASK, 1], 3.0)
+        self.assertEqual(self.book.time, 2000)
+
+        # Other coins' messages are ignored
+        self.book.on_message(
+            {"data": {"coin": "BTC", "time": 3000, "levels": _levels([], [])}}
+        )
+        self.assertEqual(self.book.seq, 2)
+
+    def test_empty_side_has_no_mid(self):
+        book = L2Book("ETH")
+        book.update(_levels([(1.0, 1.0)], []), 1)
+        self.assertIsNone(book.stats()["mid"])
+
+    def test_levels_are_truncated(self):
+        book = L2Book("ETH", max_levels=2)
+        book.update(_levels([(3, 1), (2, 1), (1, 1)], [(4, 1)]), 1)
+        self.assertEqual(list(book.count), [2, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import io
+import os
+import sys
+import threading
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import click
+import eth_account
+from rich.console import Console
+
+import handlers.leverage as leverage
+from handlers.leverage import plan_updates
+
+ALICE = "0x57FbAe717f5712C3Bd612f34482832c86D9b17f2"
+WALLET = eth_account.Account.from_key("0x" + "33" * 32)
+
+UNIVERSE = [
+    {"name": "BTC", "maxLeverage": 40},
+    {"name": "ETH", "maxLeverage": 25},
+    {"name": "OLD", "maxLeverage": 10, "isDelisted": True},
+    {"name": "HYPE", "maxLeverage": 5, "onlyIsolated": True},
+]
+POSITIONS = [
+    {"coin": "BTC", "szi": "0.1", "leverage": {"type": "cross", "value": 10}},
+    {
+        "coin": "ETH",
+        "szi": "-2",
+        "leverage": {"type": "isolated", "value": 5, "rawUsd": "700"},
+    },
+]
+
+
+class FakeExchange:
+    base_url = "https://api.hyperliquid-testnet.xyz"
+    vault_address = None
+    expires_after = None
+
+    def __init__(self):
+        self.wallet = WALLET
+        self.posted = []
+        self.lock = threading.Lock()
+
+    def _post_action(self, action, signature, nonce):
+        with self.lock:
+            self.posted.append((action, nonce))
+        if action["type"] == "updateIsolatedMargin":
+            return {"status": "err", "response": "Insufficient margin"}
+        return {"status": "ok", "response": {"type": "default"}}
+
+
+class TestLeverage(unittest.TestCase):
+    def test_plan_skips_settings_already_in_place(self):
+        rows = plan_updates(UNIVERSE, POSITIONS, ["btc", "ETH"], 10, True, None)
+        self.assertEqual(rows[0]["actions"], [])
+        self.assertEqual(rows[0]["note"], "unchanged")
+        self.assertEqual(rows[1]["actions"], [("leverage", True, 10)])
+
+    def test_plan_all_caps_and_skips_delisted(self):
+        rows = plan_updates(UNIVERSE, POSITIONS, [], 30, True, None)
+        by_coin = {row["coin"]: row for row in rows}
+        self.assertEqual(set(by_coin), {"BTC", "ETH", "HYPE"})
+        self.assertEqual(by_coin["BTC"]["actions"], [("leverage", True, 30)])
+        self.assertEqual(by_coin["ETH"]["actions"], [("leverage", True, 25)])
+        self.assertEqual(by_coin["ETH"]["note"], "capped at 25x")
+        self.assertEqual(by_coin["HYPE"]["actions"], [])
+        self.assertEqual(by_coin["HYPE"]["note"], "isolated only")
+        self.assertEqual(by_coin["BTC"]["asset"], 0)
+        self.assertEqual(by_coin["HYPE"]["asset"], 3)
+
+    def test_plan_margin_only_for_isolated_positions(self):
+        rows = plan_updates(
+            UNIVERSE, POSITIONS, ["BTC", "ETH"], None, True, Decimal("-12.5")
+        )
+        self.assertEqual(rows[0]["actions"], [])
+        self.assertEqual(rows[0]["note"], "no isolated position")
+        self.assertEqual(rows[1]["actions"], [("margin", -12_500_000)])
+
+    def test_plan_uses_settings_of_coins_without_a_position(self):
+        settings = {"HYPE": {"type": "isolated", "value": 5}}
+        rows = plan_updates(UNIVERSE, POSITIONS, ["HYPE"], 5, False, None, settings)
+        self.assertEqual(rows[0]["actions"], [])
+        self.assertEqual(rows[0]["note"], "unchanged")
+
+        rows = plan_updates(UNIVERSE, POSITIONS, ["HYPE"], 5, False, None)
+        self.assertEqual(rows[0]["actions"], [("leverage", False, 5)])
+        self.assertEqual(rows[0]["note"], "unknown, resubmitted")
+
+    def test_run_looks_up_coins_without_a_position(self):
+        info = MagicMock()
+        info.meta.return_value = {"universe": UNIVERSE}
+        info.user_state.return_value = {
+            "assetPositions": [{"position": p} for p in POSITIONS]
+        }
+        info.post.return_value = {
+            "coin": "HYPE",
+            "leverage": {"type": "isolated", "value": 5},
+        }
+        exchange = FakeExchange()
+        setup = MagicMock(return_value=(info, exchange, ALICE, WALLET))
+        with (
+            patch.object(leverage, "setup", setup),
+            patch.object(leverage, "Console", lambda: Console(file=io.StringIO())),
+        ):
+            leverage.run(False, None, None, ("BTC", "HYPE"), False, 5, False)
+
+        (lookup,) = info.post.call_args_list
+        self.assertEqual(
+            lookup[0][1], {"type": "activeAssetData", "user": ALICE, "coin": "HYPE"}
+        )
+        # HYPE is already 5x isolated; only BTC changes
+        self.assertEqual([a["asset"] for a, _ in exchange.posted], [0])
+
+    def test_plan_rejects_unknown_coin(self):
+        with self.assertRaises(click.ClickException) as ctx:
+            plan_updates(UNIVERSE, POSITIONS, ["DOGE"], 3, True, None)
+        self.assertIn("DOGE", ctx.exception.message)
+
+    def test_run_submits_only_changes_with_unique_nonces(self):
+        info = MagicMock()
+        info.meta.return_value = {"universe": UNIVERSE}
+        info.user_state.return_value = {
+            "assetPositions": [{"position": p} for p in POSITIONS]
+        }
+        exchange = FakeExchange()
+        setup = MagicMock(return_value=(info, exchange, ALICE, WALLET))
+        with (
+            patch.object(leverage, "setup", setup),
+            patch.object(leverage, "Console", lambda: Console(file=io.StringIO())),
+        ):
+            with self.assertRaises(click.ClickException) as ctx:
+                leverage.run(False, None, None, (), True, 5, False, margin="10")
+
+        self.assertIn("2 of 3 coins failed", ctx.exception.message)
+        types = [action["type"] for action, _ in exchange.posted]
+        # ETH is already 5x isolated; margin moves after the leverage wave
+        self.assertEqual(types[:2], ["updateLeverage"] * 2)
+        self.assertEqual(types[2:], ["updateIsolatedMargin"] * 2)
+        changes = {a["asset"]: a for a, _ in exchange.posted[:2]}
+        self.assertEqual(set(changes), {0, 3})
+        self.assertEqual(changes[0]["leverage"], 5)
+        self.assertFalse(changes[0]["isCross"])
+        margins = {a["asset"]: a["ntli"] for a, _ in exchange.posted[2:]}
+        self.assertEqual(margins, {0: 10_000_000, 1: 10_000_000})
+        self.assertEqual(len({nonce for _, nonce in exchange.posted}), 4)
+        self.assertEqual(info.user_state.call_count, 1)
+
+    def test_run_needs_coins_or_all(self):
+        with self.assertRaises(click.ClickException):
+            leverage.run(False, None, None, ())
+        with self.assertRaises(click.ClickException):
+            leverage.run(False, None, None, ("BTC",), True)
+
+
+if __name__ == "__main__":
+    unittest.main()
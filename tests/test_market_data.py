@@ -0,0 +1,95 @@
+import math
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.market_data import MarketDataReader, MarketDataWriter
+from handlers.status import _render_positions
+
+
+class TestMarketDataSegment(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "market.mmap"
+        self.writer = MarketDataWriter(self.path, ["BTC", "ETH", "SOL"])
+        self.reader = MarketDataReader(self.path)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+        self.tmp.cleanup()
+
+    def test_reader_sees_writes_without_reopening(self):
+        self.assertIsNone(self.reader.quote("ETH"))
+
+        self.writer.on_all_mids(
+            {"channel": "allMids", "data": {"mids": {"ETH": "2500.5", "@1": "1"}}}
+        )
+        self.writer.on_asset_ctx(
+            {
+                "channel": "activeAssetCtx",
+                "data": {
+                    "coin": "ETH",
+                    "ctx": {"markPx": "2501", "oraclePx": "2499", "funding": "0.0001"},
+                },
+            }
+        )
+
+        quote = self.reader.quote("ETH")
+        assert quote is not None
+        self.assertEqual(quote["mid"], 2500.5)
+        self.assertEqual(quote["mark"], 2501.0)
+        self.assertEqual(quote["funding"], 0.0001)
+        self.assertIsNone(self.reader.quote("DOGE"))
+        self.assertTrue(self.reader.is_live())
+
+    def test_marks_fall_back_to_mid(self):
+        now = int(time.time() * 1000)
+        self.writer.write("BTC", now, mid=100.0)
+        self.writer.write("ETH", now, mid=10.0, mark=11.0)
+        self.assertEqual(
+            self.reader.marks(["BTC", "ETH", "SOL"]), {"BTC": 100.0, "ETH": 11.0}
+        )
+
+    def test_torn_slot_is_not_returned(self):
+        self.writer.write("BTC", 1, mid=100.0)
+        # Simulate a writer caught mid-update
+        self.writer.slots["seq"][0] += 1
+        self.assertIsNone(self.reader.quote("BTC", retries=3))
+
+    def test_stale_segment_is_not_live(self):
+        self.writer.write("BTC", int(time.time() * 1000) - 60_000, mid=1.0)
+        self.assertFalse(self.reader.is_live())
+
+
+class TestStatusMarks(unittest.TestCase):
+    def test_unrealized_pnl_uses_mark(self):
+        console = Mock()
+        positions = [
+            {
+                "coin": "BTC",
+                "szi": "-2",
+                "entryPx": "100",
+                "unrealizedPnl": "5",
+                "marginUsed": "20",
+            }
+        ]
+        _render_positions(console, positions, {"BTC": 90.0})
+
+        table = console.print.call_args[0][0]
+        headers = [c.header for c in table.columns]
+        self.assertIn("Mark Px", headers)
+        upnl = list(table.columns[headers.index("Unreal PnL")].cells)[0]
+        self.assertTrue(math.isclose(float(str(upnl)), 20.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import eth_account
+from click.testing import CliRunner
+
+from hl_executor import cli
+from mock_hl import MockServer
+
+KEY = "0x" + "42" * 32
+
+
+class TestMockApi(unittest.TestCase):
+    def setUp(self):
+        self.user = eth_account.Account.from_key(KEY).address
+        self.server = MockServer(user=self.user).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        env = {
+            "HLEXEC_API_URL": self.server.url,
+            "HLEXEC_ARB_RPC": f"{self.server.url}/rpc",
+            "HLEXEC_CACHE_DIR": self.tmp.name,
+            "PRIVATE_KEY": KEY,
+            "ACCOUNT_ADDRESS": self.user,
+        }
+        patcher = patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def invoke(self, *args):
+        result = CliRunner().invoke(cli, list(args), catch_exceptions=False)
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def test_order_lifecycle(self):
+        self.invoke("order", "new", "BTC", "buy", "0.001", "50000")
+        (order,) = self.server.state.orders.values()
+        oid = str(order["order"]["oid"])
+        self.assertIn("BTC", self.invoke("status"))
+
+        self.invoke("order", "modify", oid, "--price", "51000")
+        self.assertEqual(order["status"], "canceled")
+        (replacement,) = [
+            o for o in self.server.state.orders.values() if o["status"] == "open"
+        ]
+        self.assertEqual(replacement["order"]["limitPx"], "51000")
+
+        self.invoke("order", "cancel", str(replacement["order"]["oid"]))
+        self.assertEqual(replacement["status"], "canceled")
+
+    def test_withdraw_debits_account(self):
+        self.invoke("withdraw", "5", "--no-confirm")
+        self.assertEqual(self.server.state.account(self.user)["value"], 99_995.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
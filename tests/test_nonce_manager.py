@@ -0,0 +1,50 @@
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import Mock
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.nonce import NonceManager
+
+SIGNER = "0x57FbAe717f5712C3Bd612f34482832c86D9b17f2"
+
+
+class TestNonceManager(unittest.TestCase):
+    def test_allocates_consecutively_from_one_read(self):
+        w3 = Mock()
+        w3.eth.get_transaction_count.return_value = 7
+        nonces = NonceManager(w3, SIGNER)
+        self.assertEqual([nonces.next() for _ in range(3)], [7, 8, 9])
+        w3.eth.get_transaction_count.assert_called_once_with(SIGNER, "pending")
+
+    def test_start_skips_the_read_and_reset_rereads(self):
+        w3 = Mock()
+        w3.eth.get_transaction_count.return_value = 12
+        nonces = NonceManager(w3, SIGNER, start=10)
+        self.assertEqual((nonces.next(), nonces.next()), (10, 11))
+        w3.eth.get_transaction_count.assert_not_called()
+        nonces.reset()
+        self.assertEqual(nonces.next(), 12)
+
+    def test_concurrent_allocation_is_unique(self):
+        nonces = NonceManager(Mock(), SIGNER, start=0)
+        allocated = []
+
+        def take():
+            for _ in range(100):
+                allocated.append(nonces.next())
+
+        threads = [threading.Thread(target=take) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(allocated), list(range(400)))
+
+
+if __name__ == "__main__":
+    unittest.main()
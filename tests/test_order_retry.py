@@ -0,0 +1,207 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import click
+import eth_account
+import requests
+from click.testing import CliRunner
+from hyperliquid.utils.error import ClientError, ServerError
+from hyperliquid.utils.types import Cloid
+
+from hl_executor import cli
+from mock_hl import MockServer
+from handlers import place_order as po
+from handlers import retry
+from handlers.retry import submit_idempotent
+
+OK = {"status": "ok", "response": {"type": "order", "data": {"statuses": []}}}
+CLOID = Cloid.from_int(0xDEADBEEF)
+KEY = "0x" + "42" * 32
+
+
+class Calls:
+    """Answers calls in order: exceptions are raised, other values returned."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@patch("handlers.retry.time.sleep", lambda _: None)
+class TestSubmitIdempotent(unittest.TestCase):
+    def test_found_after_timeout_is_not_resubmitted(self):
+        submit = Calls(requests.exceptions.ReadTimeout("read timed out"))
+        lookup = Calls({"found": 1})
+        self.assertEqual(submit_idempotent(submit, lookup), {"found": 1})
+        self.assertEqual(submit.count, 1)
+
+    def test_absent_after_server_error_is_resubmitted(self):
+        submit = Calls(ServerError(502, "bad gateway"), OK)
+        lookup = Calls(None, None)
+        self.assertEqual(submit_idempotent(submit, lookup), OK)
+        self.assertEqual((submit.count, lookup.count), (2, 2))
+
+    def test_absence_is_confirmed_after_a_delay(self):
+        sleeps = []
+        submit = Calls(requests.exceptions.ReadTimeout("read timed out"))
+        # Not visible at first, found on the confirming lookup
+        lookup = Calls(None, {"found": 1})
+        with patch("handlers.retry.time.sleep", sleeps.append):
+            self.assertEqual(submit_idempotent(submit, lookup), {"found": 1})
+        self.assertEqual(submit.count, 1)
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(all(s >= retry.LOOKUP_MIN_DELAY_S for s in sleeps))
+
+    def test_lookup_is_retried_before_giving_up(self):
+        submit = Calls(requests.exceptions.ConnectionError("reset"))
+        lookup = Calls(
+            requests.exceptions.ConnectionError("down"),
+            requests.exceptions.ConnectionError("down"),
+            {"found": 1},
+        )
+        self.assertEqual(submit_idempotent(submit, lookup), {"found": 1})
+
+        submit = Calls(requests.exceptions.ReadTimeout("read timed out"))
+        lookup = Calls(*[requests.exceptions.ConnectionError("down")] * 3)
+        with self.assertRaises(click.ClickException) as ctx:
+            submit_idempotent(submit, lookup)
+        self.assertIn("outcome unknown", ctx.exception.message)
+        self.assertEqual(submit.count, 1)
+
+    def test_unsent_requests_retry_without_lookup(self):
+        submit = Calls(
+            requests.exceptions.ConnectTimeout("connect timed out"),
+            requests.exceptions.ConnectTimeout("connect timed out"),
+            OK,
+        )
+        self.assertEqual(submit_idempotent(submit, None), OK)
+        self.assertEqual(submit.count, 3)
+
+    def test_rate_limits_are_left_to_the_rate_limiter(self):
+        submit = Calls(ClientError(429, None, "rate limited", None))
+        with self.assertRaises(ClientError):
+            submit_idempotent(submit, None)
+        self.assertEqual(submit.count, 1)
+
+    def test_unknown_outcome_without_lookup_is_not_retried(self):
+        submit = Calls(requests.exceptions.ReadTimeout("read timed out"))
+        with self.assertRaises(click.ClickException):
+            submit_idempotent(submit, None)
+        self.assertEqual(submit.count, 1)
+
+    def test_rejections_and_exhaustion_propagate(self):
+        submit = Calls(ClientError(400, None, "bad request", None))
+        with self.assertRaises(ClientError):
+            submit_idempotent(submit, Calls())
+
+        submit = Calls(*[ServerError(503, "unavailable")] * 2)
+        with self.assertRaises(ServerError):
+            submit_idempotent(submit, Calls(*[None] * 4), attempts=2)
+        self.assertEqual(submit.count, 2)
+
+
+class TestOrderByCloid(unittest.TestCase):
+    def test_maps_order_status_to_placement_response(self):
+        info = MagicMock()
+        info.query_order_by_cloid.return_value = {
+            "status": "order",
+            "order": {"order": {"oid": 42}, "status": "open"},
+        }
+        response = po._order_by_cloid(info, "0xabc", CLOID)
+        self.assertEqual(
+            po._parse_order_response(response),
+            [{"resting": {"oid": 42, "cloid": CLOID.to_raw()}}],
+        )
+
+        info.query_order_by_cloid.return_value = {"status": "unknownOid"}
+        self.assertIsNone(po._order_by_cloid(info, "0xabc", CLOID))
+
+        info.query_order_by_cloid.return_value = {"status": "error"}
+        with self.assertRaises(ValueError):
+            po._order_by_cloid(info, "0xabc", CLOID)
+
+    @patch("handlers.retry.time.sleep", lambda _: None)
+    @patch("handlers.place_order.Console")
+    def test_resubmission_reposts_the_same_signed_order(self, _console):
+        info = MagicMock()
+        info.query_order_by_cloid.return_value = {"status": "unknownOid"}
+        exchange = MagicMock()
+        exchange.wallet = eth_account.Account.from_key(KEY)
+        exchange.vault_address = None
+        exchange.expires_after = None
+        exchange.base_url = "http://127.0.0.1:1"
+        exchange.info.name_to_asset.return_value = 0
+        exchange._post_action.side_effect = [ServerError(502, "bad gateway"), OK]
+        setup = MagicMock(return_value=(info, exchange, "0xabc", None))
+        with (
+            patch.object(po, "setup", setup),
+            patch.object(po, "_open_store", lambda _: None),
+        ):
+            po.new_order_run(
+                "BTC", True, 1.0, 100.0, None, False, None, "Gtc", None, False, False
+            )
+
+        first, second = exchange._post_action.call_args_list
+        self.assertEqual(first, second)
+        # A CLOID was generated, and the lookup used that same one
+        action, _, _ = first[0]
+        cloid = info.query_order_by_cloid.call_args[0][1]
+        self.assertIsInstance(cloid, Cloid)
+        self.assertEqual(action["orders"][0]["c"], cloid.to_raw())
+
+
+class TestOrderTimeout(unittest.TestCase):
+    """A real read timeout, from the clients `setup` builds, against the
+    mock API."""
+
+    def setUp(self):
+        self.user = eth_account.Account.from_key(KEY).address
+        self.server = MockServer(user=self.user).start()
+        self.addCleanup(self.server.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        env = {
+            "HLEXEC_API_URL": self.server.url,
+            "HLEXEC_CACHE_DIR": self.tmp.name,
+            "PRIVATE_KEY": KEY,
+            "ACCOUNT_ADDRESS": self.user,
+        }
+        for patcher in (
+            patch.dict(os.environ, env),
+            patch("handlers.setup.REQUEST_TIMEOUT_S", 0.3),
+            patch.object(retry, "LOOKUP_MIN_DELAY_S", 0.01),
+            patch.object(retry, "RETRY_BASE_S", 0.01),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_timed_out_order_that_landed_is_not_duplicated(self):
+        # The order is placed, but its response takes longer than the timeout
+        self.server.stall_s["/exchange"] = 1.0
+        started = time.monotonic()
+        result = CliRunner().invoke(
+            cli, ["order", "new", "BTC", "buy", "0.001", "50000"]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertLess(time.monotonic() - started, 1.0)
+        (order,) = self.server.state.orders.values()
+        self.assertEqual(order["status"], "open")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import sys
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import click
+from hyperliquid.utils.types import Cloid
+from handlers.store import OrderStore, FILLS_PAGE_SIZE, is_final
+from handlers import place_order
+from handlers.place_order import _query_order
+
+USER = "0xb764428a29EAEbe8e2301F5924746F818b331F5A"
+
+
+def _entry(oid, status, status_ts, cloid=None, coin="ETH"):
+    order = {"oid": oid, "coin": coin, "side": "B", "sz": "1", "timestamp": 1000}
+    if cloid:
+        order["cloid"] = cloid
+    return {"order": order, "status": status, "statusTimestamp": status_ts}
+
+
+def _fill(tid, time, oid=1):
+    return {
+        "tid": tid,
+        "oid": oid,
+        "coin": "ETH",
+        "time": time,
+        "side": "B",
+        "px": "100",
+        "sz": "1",
+        "startPosition": "0",
+        "closedPnl": "0",
+        "fee": "0.01",
+    }
+
+
+class TestOrderStore(unittest.TestCase):
+    def setUp(self):
+        self.store = OrderStore(":memory:")
+
+    def _get(self, oid_or_cloid):
+        result = self.store.get_order(USER, oid_or_cloid)
+        assert result is not None
+        return result
+
+    def test_get_order_by_oid_and_cloid(self):
+        cloid = "0x000000000000000000000000deadbeef"
+        self.store.put_orders(USER, [_entry(7, "filled", 5, cloid=cloid)])
+
+        by_oid = self._get(7)
+        self.assertEqual(by_oid["status"], "order")
+        self.assertEqual(by_oid["order"]["status"], "filled")
+
+        by_cloid = self._get(Cloid.from_int(0xDEADBEEF))
+        self.assertEqual(by_cloid["order"]["order"]["oid"], 7)
+
+        self.assertIsNone(self.store.get_order(USER, 8))
+        self.assertIsNone(self.store.get_order(USER.replace("b7", "c7"), 7))
+
+    def test_older_status_does_not_overwrite(self):
+        self.store.put_orders(USER, [_entry(7, "filled", 10)])
+        self.store.put_orders(USER, [_entry(7, "open", 5)])
+        self.assertEqual(self._get(7)["order"]["status"], "filled")
+
+    def test_sync_fills_pages_from_high_water(self):
+        first_page = [_fill(i, 1000 + i) for i in range(FILLS_PAGE_SIZE)]
+        last_time = first_page[-1]["time"]
+        second_page = [_fill(FILLS_PAGE_SIZE - 1, last_time), _fill(99999, 5000)]
+        info = Mock()
+        info.user_fills_by_time.side_effect = [first_page, second_page]
+        info.historical_orders.return_value = [_entry(1, "filled", 4000)]
+
+        written = self.store.sync(info, USER)
+
+        self.assertEqual(written["orders"], 1)
+        self.assertEqual(info.user_fills_by_time.call_args_list[1][0][1], last_time)
+        self.assertEqual(self.store.high_water(USER, "fills"), 5000)
+        self.assertEqual(len(self.store.fills_for_order(USER, 1)), FILLS_PAGE_SIZE + 1)
+
+        # A second sync only asks for fills from the high-water mark onwards
+        info.user_fills_by_time.side_effect = None
+        info.user_fills_by_time.return_value = []
+        info.historical_orders.return_value = [_entry(1, "filled", 4000)]
+        self.store.sync(info, USER)
+        info.user_fills_by_time.assert_called_with(USER, 5000)
+
+    def test_query_order_serves_final_from_store(self):
+        self.store.put_orders(USER, [_entry(7, "canceled", 5)])
+        info = Mock()
+        result = _query_order(info, self.store, USER, 7)
+        self.assertEqual(result["order"]["status"], "canceled")
+        info.query_order_by_oid.assert_not_called()
+
+    def test_query_order_refreshes_live_orders(self):
+        self.store.put_orders(USER, [_entry(7, "open", 5)])
+        info = Mock()
+        info.query_order_by_oid.return_value = {
+            "status": "order",
+            "order": _entry(7, "filled", 9),
+        }
+        result = _query_order(info, self.store, USER, 7)
+        self.assertEqual(result["order"]["status"], "filled")
+        self.assertTrue(is_final(self._get(7)["order"]))
+
+    def test_cancel_final_order_error_is_not_rewrapped(self):
+        self.store.put_orders(USER, [_entry(7, "filled", 5)])
+        exchange = Mock()
+        setup = Mock(return_value=(Mock(), exchange, USER, None))
+        with (
+            patch.object(place_order, "setup", setup),
+            patch.object(place_order, "_open_store", lambda _: self.store),
+        ):
+            with self.assertRaises(click.ClickException) as ctx:
+                place_order.cancel_order_run("7", None, False, None)
+        self.assertEqual(
+            ctx.exception.message,
+            "Order is already filled and cannot be cancelled.",
+        )
+        exchange.cancel.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
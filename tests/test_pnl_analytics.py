@@ -0,0 +1,162 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.pnl import (
+    BUCKET_ORIGINS_MS,
+    BUCKETS_MS,
+    average_entry,
+    fill_columns,
+    fill_window,
+    funding_arrays,
+    group_sum,
+    load_fills,
+    pnl_breakdown,
+)
+from handlers.store import OrderStore
+
+DAY = BUCKETS_MS["day"]
+USER = "0xb764428a29EAEbe8e2301F5924746F818b331F5A"
+
+# (coin, time, tid, is_buy, px, sz, start_position, closed_pnl, fee)
+FILL_ROWS = [
+    ("BTC", 1 * DAY, 1, True, 50.0, 1.0, 2.0, 0.0, 0.05),
+    ("ETH", 2 * DAY + 1, 5, False, 130.0, 2.5, 1.5, 37.5, 0.2),
+    ("ETH", 1 * DAY, 2, True, 100.0, 1.0, 0.0, 0.0, 0.1),
+    ("ETH", 1 * DAY + 1, 3, True, 110.0, 1.0, 1.0, 0.0, 0.1),
+    ("ETH", 2 * DAY, 4, False, 120.0, 0.5, 2.0, 7.5, 0.1),
+]
+
+
+def _fills(rows):
+    vocab = []
+    columns = fill_columns(rows, vocab)
+    return fill_window({"coins": np.array(vocab, dtype=object), **columns}, 0, 10 * DAY)
+
+
+def _api_fill(row):
+    coin, time, tid, is_buy, px, sz, start, closed, fee = row
+    return {
+        "coin": coin,
+        "time": time,
+        "tid": tid,
+        "oid": tid,
+        "side": "B" if is_buy else "A",
+        "px": str(px),
+        "sz": str(sz),
+        "startPosition": str(start),
+        "closedPnl": str(closed),
+        "fee": str(fee),
+    }
+
+
+class TestPnlAnalytics(unittest.TestCase):
+    def test_average_entry_tracks_segments(self):
+        fills = _fills(FILL_ROWS)
+        result = average_entry(fills)
+
+        self.assertEqual(list(fills["coins"][result["coin_idx"]]), ["BTC", "ETH"])
+        # BTC position predates the window: entry only reflects loaded fills
+        self.assertEqual(result["position"][0], 3.0)
+        self.assertAlmostEqual(result["entry"][0], 50.0)
+        self.assertFalse(result["exact"][0])
+        # ETH flipped short on the last fill, which opens a fresh entry
+        self.assertEqual(result["position"][1], -1.0)
+        self.assertAlmostEqual(result["entry"][1], 130.0)
+        self.assertTrue(result["exact"][1])
+
+    def test_average_entry_ignores_reducing_fills(self):
+        result = average_entry(_fills(FILL_ROWS[2:]))
+        self.assertAlmostEqual(result["position"][0], 1.5)
+        self.assertAlmostEqual(result["entry"][0], 105.0)
+
+    def test_flat_position_has_no_entry(self):
+        rows = [
+            ("SOL", 1, 1, True, 10.0, 2.0, 0.0, 0.0, 0.0),
+            ("SOL", 2, 2, False, 12.0, 2.0, 2.0, 4.0, 0.0),
+        ]
+        result = average_entry(_fills(rows))
+        self.assertEqual(result["position"][0], 0.0)
+        self.assertTrue(np.isnan(result["entry"][0]))
+
+    def test_group_sum_multiple_keys(self):
+        (a, b), sums = group_sum(
+            [np.array([5, 3, 5, 3]), np.array([1, 0, 1, 2])],
+            {"x": np.array([1.0, 2.0, 3.0, 4.0])},
+        )
+        self.assertEqual(list(zip(a, b)), [(3, 0), (3, 2), (5, 1)])
+        self.assertEqual(list(sums["x"]), [2.0, 4.0, 4.0])
+
+    def test_pnl_breakdown_by_coin_and_bucket(self):
+        funding = funding_arrays(
+            [("ETH", 1 * DAY + 5, -1.0), ("SOL", 2 * DAY + 5, 0.5)]
+        )
+        result = pnl_breakdown(_fills(FILL_ROWS), funding, DAY)
+
+        coins = list(result["coins"])
+        self.assertEqual(coins, ["BTC", "ETH", "SOL"])
+        by_coin = result["by_coin"]
+        self.assertEqual(list(by_coin["coin"]), [0, 1, 2])
+        self.assertAlmostEqual(by_coin["realized"][1], 45.0)
+        self.assertAlmostEqual(by_coin["fees"][1], 0.5)
+        self.assertAlmostEqual(by_coin["funding"][1], -1.0)
+        self.assertAlmostEqual(by_coin["net"][1], 43.5)
+        self.assertAlmostEqual(by_coin["entry"][1], 130.0)
+        self.assertAlmostEqual(by_coin["funding"][2], 0.5)
+        self.assertTrue(np.isnan(by_coin["entry"][2]))
+
+        by_bucket = result["by_bucket"]
+        keys = list(zip(by_bucket["start"] // DAY, by_bucket["coin"]))
+        self.assertEqual(keys, [(1, 0), (1, 1), (2, 1), (2, 2)])
+        self.assertAlmostEqual(by_bucket["realized"][2], 45.0)
+        self.assertAlmostEqual(by_bucket["funding"][1], -1.0)
+
+    def test_week_buckets_start_on_monday(self):
+        def ms(*day):
+            return int(datetime(*day, tzinfo=timezone.utc).timestamp() * 1000)
+
+        sunday_night = ms(2024, 1, 7, 23, 59, 59)
+        monday = ms(2024, 1, 8)
+        funding = funding_arrays([("ETH", sunday_night, 1.0), ("ETH", monday, 2.0)])
+        result = pnl_breakdown(
+            _fills([]), funding, BUCKETS_MS["week"], BUCKET_ORIGINS_MS["week"]
+        )
+        by_bucket = result["by_bucket"]
+        self.assertEqual(list(by_bucket["start"]), [ms(2024, 1, 1), monday])
+        self.assertEqual(list(by_bucket["funding"]), [1.0, 2.0])
+
+    def test_pnl_breakdown_empty(self):
+        result = pnl_breakdown(_fills([]), funding_arrays([]), DAY)
+        self.assertIsNone(result["by_coin"])
+
+    def test_load_fills_appends_to_sidecar(self):
+        store = OrderStore(":memory:")
+        # Syncs only ever add fills at or after the previous newest fill
+        chronological = sorted(FILL_ROWS, key=lambda r: r[1])
+        store.put_fills(USER, [_api_fill(r) for r in chronological[:3]])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "fills.npz"
+            first = load_fills(store, USER, path)
+            self.assertEqual(first["time"].size, 3)
+            self.assertTrue(path.exists())
+
+            store.put_fills(USER, [_api_fill(r) for r in chronological[3:]])
+            second = load_fills(store, USER, path)
+            self.assertEqual(sorted(second["tid"]), [1, 2, 3, 4, 5])
+            # Still grouped by coin, then ordered by time
+            coins = second["coins"][second["coin"]]
+            self.assertEqual(list(coins), ["BTC", "ETH", "ETH", "ETH", "ETH"])
+            self.assertEqual(list(second["tid"][1:]), [2, 3, 4, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.profiling import Profiler, parse_importtime, split_spans, summary
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       500 |        500 |   _io
+import time:      1000 |       1500 | encodings
+import time:      2000 |       2000 |     web3.types
+import time:      3000 |       5000 |   web3
+import time:       400 |       8000 | hl_executor
+"""
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+class TestProfiling(unittest.TestCase):
+    def test_parse_importtime_groups_by_package(self):
+        imports = parse_importtime(IMPORTTIME)
+        self.assertEqual(imports["total_ms"], 9.5)
+        self.assertEqual(
+            imports["packages"][0], {"package": "web3", "self_ms": 5.0, "modules": 2}
+        )
+        self.assertEqual(
+            [row["package"] for row in imports["packages"]],
+            ["web3", "encodings", "_io", "hl_executor"],
+        )
+
+    def test_split_counts_outermost_matching_span(self):
+        tree = {
+            "name": "order",
+            "duration_ms": 1000,
+            "children": [
+                {
+                    "name": "setup",
+                    "duration_ms": 300,
+                    "children": [
+                        {"name": "setup.info", "duration_ms": 250},
+                    ],
+                },
+                {"name": "sign.l1_action", "duration_ms": 50},
+                {
+                    "name": "exchange.order",
+                    "duration_ms": 200,
+                    "children": [
+                        {"name": "rate_limit.wait", "duration_ms": 100},
+                    ],
+                },
+                {"name": "render", "duration_ms": 40},
+            ],
+        }
+        self.assertEqual(
+            split_spans(tree, 1.0),
+            {
+                "network": 0.45,
+                "rate limit wait": 0.0,
+                "sign": 0.05,
+                "render": 0.04,
+                "other": 0.46,
+            },
+        )
+        self.assertEqual(split_spans(None, 0.5)["other"], 0.5)
+
+    @patch("handlers.profiling.import_times")
+    def test_report_and_summary(self, import_times):
+        import_times.return_value = parse_importtime(IMPORTTIME)
+        profiler = Profiler("status")
+        busy(200_000)
+        report = profiler.finish(None)
+
+        functions = [row["function"] for row in report["functions_by_cumulative"]]
+        self.assertTrue(any("(busy)" in name for name in functions))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = profiler.write(report, Path(tmp))
+            self.assertTrue(path.with_suffix(".prof").exists())
+            text = summary(report, path)
+        self.assertIn("Profile of `hlexec status`", text)
+        self.assertIn("web3", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
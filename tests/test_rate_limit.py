@@ -0,0 +1,139 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.rate_limit import (
+    RateLimiter,
+    rate_limited,
+    request_weight,
+    response_weight,
+)
+from hyperliquid.utils.error import ClientError
+
+ALICE = "0x57FbAe717f5712C3Bd612f34482832c86D9b17f2"
+
+
+class FakeClient:
+    def __init__(self, responses=None):
+        self.calls = []
+        self.responses = list(responses or [])
+
+    def post(self, url_path, payload=None):
+        self.calls.append((url_path, payload))
+        if payload and payload.get("type") == "userRateLimit":
+            return {"cumVlm": "0", "nRequestsUsed": 9998, "nRequestsCap": 10000}
+        response = self.responses.pop(0) if self.responses else {"status": "ok"}
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class TestRateLimit(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "rate_limit.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_request_weights(self):
+        self.assertEqual(request_weight("/info", {"type": "allMids"}), 2)
+        self.assertEqual(request_weight("/info", {"type": "userFills"}), 20)
+        self.assertEqual(request_weight("/info", {"type": "userRole"}), 60)
+        self.assertEqual(request_weight("/exchange", {"action": {"type": "x"}}), 1)
+        orders = {"action": {"type": "order", "orders": [{}] * 85}}
+        self.assertEqual(request_weight("/exchange", orders), 3)
+
+    def test_large_responses_are_charged_extra(self):
+        self.assertEqual(response_weight("/info", {"type": "userFills"}, [{}] * 45), 2)
+        self.assertEqual(response_weight("/info", {"type": "allMids"}, [{}] * 45), 0)
+        limiter = RateLimiter(self.path, per_minute=600)
+        client = rate_limited(FakeClient([[{}] * 100]), limiter)
+        client.post("/info", {"type": "userFunding"})
+        # 20 for the request, 5 for 100 payments
+        self.assertAlmostEqual(limiter.snapshot()[0], 575, delta=1)
+
+    def test_reads_and_unchanged_state_do_not_rewrite_the_file(self):
+        limiter = RateLimiter(self.path)
+        limiter.acquire(1)
+        with patch("handlers.rate_limit.os.replace") as replace:
+            limiter.snapshot(ALICE)
+            limiter.needs_seed(ALICE)
+            with limiter._locked():
+                pass
+        replace.assert_not_called()
+
+    def test_budget_is_shared_through_the_state_file(self):
+        # Two limiters on one file stand in for two hlexec processes
+        first = RateLimiter(self.path, per_minute=600)
+        second = RateLimiter(self.path, per_minute=600)
+        first.acquire(590)
+        started = time.monotonic()
+        second.acquire(12)
+        # 2 weight short at 10/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertLess(first.snapshot()[0], 1)
+
+    def test_bursts_queue_instead_of_failing(self):
+        limiter = RateLimiter(self.path, per_minute=6000)
+        limiter.acquire(6000)
+        started = time.monotonic()
+        threads = [
+            threading.Thread(target=limiter.acquire, args=(5,)) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 20 weight at 100/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+    def test_actions_seed_and_count_down_the_address_allowance(self):
+        limiter = RateLimiter(self.path)
+        client = rate_limited(FakeClient(), limiter, ALICE)
+        client.post("/exchange", {"action": {"type": "order", "orders": [{}]}})
+        client.post("/info", {"type": "allMids"})
+        self.assertEqual(limiter.snapshot(ALICE)[1], 1)
+        seeds = [c for c in client.calls if c[1].get("type") == "userRateLimit"]
+        self.assertEqual(len(seeds), 1)
+
+        # Out of allowance: one action per interval
+        client.post("/exchange", {"action": {"type": "cancel", "cancels": [{}]}})
+        with patch("handlers.rate_limit.THROTTLED_ACTION_INTERVAL_S", 0.2):
+            client.post("/exchange", {"action": {"type": "cancel", "cancels": [{}]}})
+            started = time.monotonic()
+            client.post("/exchange", {"action": {"type": "cancel", "cancels": [{}]}})
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+    def test_429_drains_the_bucket_and_retries(self):
+        limiter = RateLimiter(self.path, per_minute=600)
+        client = rate_limited(
+            FakeClient([ClientError(429, None, "rate limited", None), {"ok": 1}]),
+            limiter,
+        )
+        started = time.monotonic()
+        self.assertEqual(client.post("/info", {"type": "allMids"}), {"ok": 1})
+        self.assertEqual(len(client.calls), 2)
+        # Second attempt waits for 2 weight at 10/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+    def test_other_errors_are_not_retried(self):
+        client = rate_limited(
+            FakeClient([ClientError(400, None, "bad request", None)]),
+            RateLimiter(self.path),
+        )
+        with self.assertRaises(ClientError):
+            client.post("/info", {"type": "meta"})
+        self.assertEqual(len(client.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import click
+import requests
+
+from handlers.recording import Player, Recorder, request_key, request_kind
+
+HL = "https://api.hyperliquid.xyz"
+RPC = "https://arb.example/rpc"
+
+
+def prepared(url, body):
+    return requests.Request("POST", url, json=body).prepare()
+
+
+class FakeServer:
+    """A `Session.send` stand-in answering from a list, in order."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+
+    def __call__(self, session, request, **kwargs):
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(answer).encode()
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+
+def rpc(method, id, *params):
+    return {"jsonrpc": "2.0", "method": method, "params": list(params), "id": id}
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "run.jsonl.gz")
+
+    def record(self, exchanges):
+        recorder = Recorder(self.path)
+        for url, body, answer in exchanges:
+            try:
+                recorder.send(FakeServer(answer), None, prepared(url, body))
+            except requests.exceptions.RequestException:
+                pass
+        recorder.close()
+
+    def replay(self, player, url, body):
+        return player.send(None, None, prepared(url, body))
+
+    def test_kind_and_key_ignore_volatile_fields(self):
+        order = {"action": {"type": "order"}, "nonce": 1, "signature": "0xa"}
+        self.assertEqual(request_kind(f"{HL}/exchange", order), "exchange:order")
+        self.assertEqual(
+            request_kind(RPC, [rpc("eth_blockNumber", 1), rpc("eth_call", 2)]),
+            "rpc:eth_blockNumber,eth_call",
+        )
+        self.assertEqual(
+            request_key(f"{HL}/exchange", order),
+            request_key(f"{HL}/exchange", dict(order, nonce=2, signature="0xb")),
+        )
+
+    def test_replays_in_order_and_repeats_last_of_kind(self):
+        self.record(
+            [
+                (f"{HL}/info", {"type": "meta"}, {"universe": []}),
+                (f"{HL}/info", {"type": "clearinghouseState", "user": "a"}, {"v": 1}),
+                (f"{HL}/info", {"type": "clearinghouseState", "user": "a"}, {"v": 2}),
+            ]
+        )
+        player = Player(self.path, latency_scale=0)
+        state = {"type": "clearinghouseState", "user": "a"}
+        answers = [self.replay(player, f"{HL}/info", state).json() for _ in range(3)]
+        self.assertEqual(answers, [{"v": 1}, {"v": 2}, {"v": 2}])
+        # Another host and user still match by kind
+        other = self.replay(player, "http://127.0.0.1:1/info", {"type": "meta"})
+        self.assertEqual(other.json(), {"universe": []})
+        with self.assertRaises(click.ClickException):
+            self.replay(player, f"{HL}/info", {"type": "allMids"})
+
+    def test_rpc_ids_follow_the_request(self):
+        self.record(
+            [
+                (
+                    RPC,
+                    [rpc("eth_chainId", 7), rpc("eth_getBalance", 8, "0xa")],
+                    [
+                        {"jsonrpc": "2.0", "id": 8, "result": "0x5"},
+                        {"jsonrpc": "2.0", "id": 7, "result": "0x66eee"},
+                    ],
+                ),
+            ]
+        )
+        player = Player(self.path, latency_scale=0)
+        same = self.replay(
+            player, RPC, [rpc("eth_chainId", 1), rpc("eth_getBalance", 2, "0xa")]
+        ).json()
+        self.assertEqual({r["id"]: r["result"] for r in same}, {1: "0x66eee", 2: "0x5"})
+
+        # A batch recorded in another shape is answered call by call
+        player = Player(self.path, latency_scale=0)
+        single = self.replay(player, RPC, rpc("eth_getBalance", 40, "0xa")).json()
+        self.assertEqual(single, {"jsonrpc": "2.0", "id": 40, "result": "0x5"})
+
+    def test_errors_are_replayed(self):
+        self.record(
+            [
+                (
+                    f"{HL}/exchange",
+                    {"action": {"type": "order"}},
+                    requests.exceptions.ReadTimeout("read timed out"),
+                ),
+            ]
+        )
+        player = Player(self.path, latency_scale=0)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.replay(player, f"{HL}/exchange", {"action": {"type": "order"}})
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not gzip")
+        with self.assertRaises(click.ClickException):
+            Player(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
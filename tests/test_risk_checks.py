@@ -0,0 +1,112 @@
+import math
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.risk import check_order, load_snapshot
+
+USER = "0xb764428a29EAEbe8e2301F5924746F818b331F5A"
+
+SNAPSHOT = {
+    "mids": {"ETH": "2000", "DOGE": "0.1"},
+    "max_leverage": {"ETH": 25, "DOGE": 10},
+    "user_state": {
+        "withdrawable": "100",
+        "assetPositions": [
+            {
+                "type": "oneWay",
+                "position": {
+                    "coin": "ETH",
+                    "szi": "-1.0",
+                    "leverage": {"type": "cross", "value": 5},
+                },
+            }
+        ],
+    },
+}
+
+NAN = math.nan
+
+
+def _quote(mid=NAN, mark=NAN, bid=NAN, ask=NAN):
+    return {"mid": mid, "mark": mark, "bid": bid, "ask": ask}
+
+
+def _check(coin, is_buy, size, price, alo=False, reduce_only=False, quote=None):
+    return check_order(
+        coin, is_buy, size, price, alo, reduce_only, SNAPSHOT, quote, 5.0
+    )
+
+
+class TestRiskChecks(unittest.TestCase):
+    def test_passes_within_band_and_margin(self):
+        self.assertEqual(_check("DOGE", True, 1000, 0.101), [])
+
+    def test_price_band_uses_snapshot_mid(self):
+        problems = _check("DOGE", True, 10, 0.2)
+        self.assertEqual(len(problems), 1)
+        self.assertIn("100.00% from the reference", problems[0])
+
+    def test_live_mark_overrides_snapshot(self):
+        quote = _quote(mid=0.19, mark=0.2)
+        self.assertEqual(_check("DOGE", True, 10, 0.2, quote=quote), [])
+
+    def test_unknown_coin_has_no_reference(self):
+        self.assertIn("No reference price for XYZ", _check("XYZ", True, 1, 1.0))
+
+    def test_alo_crossing(self):
+        quote = _quote(mid=2000, bid=1999, ask=2001)
+        self.assertIn(
+            "cross the best ask", _check("ETH", True, 1, 2001, True, quote=quote)[0]
+        )
+        self.assertIn(
+            "cross the best bid", _check("ETH", False, 1, 1998, True, quote=quote)[0]
+        )
+        self.assertEqual(_check("ETH", True, 1, 2000.5, True, quote=quote), [])
+
+    def test_margin_only_counts_position_increase(self):
+        # Buying 1.05 against a 1.0 short only opens 0.05 at 5x
+        self.assertEqual(_check("ETH", True, 1.05, 2000), [])
+        # Buying 1.5 opens 0.5 long at 5x: 200 USDC > 100 available
+        problems = _check("ETH", True, 1.5, 2000)
+        self.assertEqual(len(problems), 1)
+        self.assertIn("200.00 USDC margin at 5x", problems[0])
+
+    def test_new_position_uses_capped_default_leverage(self):
+        problems = _check("DOGE", True, 20_000, 0.1)
+        self.assertIn("at 10x", problems[0])
+
+    def test_reduce_only_cannot_increase(self):
+        self.assertIn(
+            "would increase", _check("ETH", False, 0.5, 2000, reduce_only=True)[0]
+        )
+        self.assertEqual(_check("ETH", True, 0.5, 2000, reduce_only=True), [])
+
+
+class TestRiskSnapshot(unittest.TestCase):
+    def test_snapshot_is_reused_while_fresh(self):
+        info = Mock()
+        info.user_state.return_value = {"withdrawable": "1"}
+        info.all_mids.return_value = {"ETH": "1"}
+        info.meta.return_value = {"universe": [{"name": "ETH", "maxLeverage": 25}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch.dict(os.environ, {"HLEXEC_CACHE_DIR": tmp}):
+                first = load_snapshot(info, False, USER)
+                second = load_snapshot(info, False, USER)
+                self.assertEqual(info.user_state.call_count, 1)
+                self.assertEqual(second["max_leverage"], {"ETH": 25})
+                self.assertEqual(first["time"], second["time"])
+
+                load_snapshot(info, False, USER, max_age_ms=-1)
+                self.assertEqual(info.user_state.call_count, 2)
+                self.assertEqual(info.meta.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
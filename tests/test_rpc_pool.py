@@ -0,0 +1,220 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from web3 import Web3
+from web3.types import RPCEndpoint
+
+import handlers.rpc_pool as rpc_pool
+from handlers.evm import rpc_batch, to_int
+from handlers.rpc_pool import PoolProvider, RpcPool, rpc_urls
+
+SEND = RPCEndpoint("eth_sendRawTransaction")
+
+# url -> (delay in seconds, failure or None, batch response override)
+NODES = {}
+
+
+class FakeNode:
+    def __init__(self, url, timeout):
+        self.url = url
+        self.calls = []
+
+    def _answer(self, method):
+        delay, failure, _ = NODES[self.url]
+        self.calls.append(method)
+        time.sleep(delay)
+        if failure is not None:
+            raise failure
+
+    def make_request(self, method, params):
+        self._answer(method)
+        return {"jsonrpc": "2.0", "id": 0, "result": hex(len(self.url))}
+
+    def make_batch_request(self, requests):
+        self._answer("batch")
+        override = NODES[self.url][2]
+        if override is not None:
+            return override
+        return [
+            {"jsonrpc": "2.0", "id": i, "result": hex(len(self.url))}
+            for i in range(len(requests))
+        ]
+
+
+def _pool(nodes, stats_path=None):
+    NODES.clear()
+    NODES.update(nodes)
+    return RpcPool(list(nodes), make_provider=FakeNode, stats_path=stats_path)
+
+
+def _calls(pool, url):
+    return next(e.provider.calls for e in pool.endpoints if e.url == url)
+
+
+class TestRpcPool(unittest.TestCase):
+    def setUp(self):
+        self.hedge = patch.object(rpc_pool, "HEDGE_MIN_S", 0.02)
+        self.hedge.start()
+
+    def tearDown(self):
+        self.hedge.stop()
+
+    def test_probe_ranks_by_latency(self):
+        pool = _pool(
+            {
+                "http://slow": (0.06, None, None),
+                "http://down": (0, ConnectionError("refused"), None),
+                "http://fast": (0.0, None, None),
+            }
+        )
+        pool.probe(wait_all=True)
+        self.assertEqual(
+            [e.url for e in pool.ranked()],
+            ["http://fast", "http://slow", "http://down"],
+        )
+        w3 = Web3(PoolProvider(pool))
+        self.assertEqual(w3.eth.block_number, len("http://fast"))
+
+    def test_slow_read_is_hedged(self):
+        pool = _pool({"http://a": (0.0, None, None), "http://bb": (0.0, None, None)})
+        pool.probe(wait_all=True)
+        primary = pool.ranked()[0]
+        NODES[primary.url] = (0.3, None, None)
+        other = next(e for e in pool.endpoints if e is not primary)
+
+        started = time.monotonic()
+        response = pool.request(lambda p: p.make_request("eth_chainId", []))
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertEqual(response["result"], hex(len(other.url)))
+        self.assertEqual(other.hedges_won, 1)
+
+    def test_writes_are_not_hedged_but_fail_over(self):
+        pool = _pool({"http://a": (0.0, None, None), "http://bb": (0.0, None, None)})
+        pool.probe(wait_all=True)
+        primary, backup = pool.ranked()
+        NODES[primary.url] = (0.1, None, None)
+        provider = PoolProvider(pool)
+        provider.make_request(SEND, ["0x00"])
+        self.assertNotIn(SEND, _calls(pool, backup.url))
+
+        # The slow answer moved it down the ranking
+        self.assertEqual(pool.ranked()[0], backup)
+        primary, backup = pool.ranked()
+        NODES[primary.url] = (0.0, ConnectionError("reset"), None)
+        provider.make_request(SEND, ["0x00"])
+        self.assertIn(SEND, _calls(pool, backup.url))
+        self.assertFalse(primary.healthy(time.monotonic()))
+        self.assertEqual(pool.ranked()[-1], primary)
+
+    def test_failed_over_raw_transaction_already_known_is_sent(self):
+        raw = "0x02f86c0180"
+        already_known = {
+            "jsonrpc": "2.0",
+            "id": 7,
+            "error": {"message": "already known"},
+        }
+        pool = _pool({"http://a": (0.0, None, None), "http://bb": (0.0, None, None)})
+        pool.probe(wait_all=True)
+        primary, backup = pool.ranked()
+        NODES[primary.url] = (0.0, TimeoutError("read timed out"), None)
+        backup.provider.make_request = lambda method, params: already_known
+
+        response = PoolProvider(pool).make_request(SEND, [raw])
+        self.assertEqual(response["result"], Web3.to_hex(Web3.keccak(hexstr=raw)))
+        self.assertEqual(response["id"], 7)
+
+        # Without a failover, the node's answer stands
+        response = PoolProvider(pool).make_request(SEND, [raw])
+        self.assertEqual(response, already_known)
+
+    def test_failed_over_nonce_too_low_needs_the_hash_known(self):
+        raw = "0x02f86c0180"
+        tx_hash = Web3.to_hex(Web3.keccak(hexstr=raw))
+        nonce_used = {"jsonrpc": "2.0", "id": 7, "error": {"message": "nonce too low"}}
+        pool = _pool({"http://a": (0.0, None, None), "http://bb": (0.0, None, None)})
+        pool.probe(wait_all=True)
+        primary, backup = pool.ranked()
+        known = {}
+
+        def answer(method, params):
+            if method == "eth_getTransactionByHash":
+                return {"jsonrpc": "2.0", "id": 8, "result": known.get(params[0])}
+            return nonce_used
+
+        backup.provider.make_request = answer
+
+        # Another transaction used the nonce
+        NODES[primary.url] = (0.0, TimeoutError("read timed out"), None)
+        response = PoolProvider(pool).make_request(SEND, [raw])
+        self.assertEqual(response, nonce_used)
+
+        # Ours did
+        known[tx_hash] = {"hash": tx_hash}
+        primary.down_until = 0.0
+        response = PoolProvider(pool).make_request(SEND, [raw])
+        self.assertEqual(response["result"], tx_hash)
+
+    def test_other_writes_do_not_fail_over(self):
+        pool = _pool({"http://a": (0.0, None, None), "http://bb": (0.0, None, None)})
+        pool.probe(wait_all=True)
+        primary, backup = pool.ranked()
+        NODES[primary.url] = (0.0, ConnectionError("reset"), None)
+        with self.assertRaises(ConnectionError):
+            PoolProvider(pool).make_request(
+                RPCEndpoint("eth_sendTransaction"), [{"to": "0x00"}]
+            )
+        self.assertEqual(_calls(pool, backup.url), ["eth_blockNumber"])
+
+    def test_rejected_batch_fails_over(self):
+        rejected = {"jsonrpc": "2.0", "id": None, "error": {"message": "rate limited"}}
+        pool = _pool(
+            {
+                "http://a": (0.0, None, rejected),
+                "http://bbbb": (0.01, None, None),
+            }
+        )
+        pool.probe(wait_all=True)
+        w3 = Web3(PoolProvider(pool))
+        (result,) = rpc_batch(w3, [("eth_chainId", [])])
+        self.assertEqual(to_int(result), len("http://bbbb"))
+
+    def test_all_failing_raises_last_error(self):
+        pool = _pool(
+            {
+                "http://a": (0, ConnectionError("a"), None),
+                "http://b": (0, TimeoutError("b"), None),
+            }
+        )
+        with self.assertRaises((ConnectionError, TimeoutError)):
+            pool.request(lambda p: p.make_request("eth_chainId", []))
+
+    def test_persisted_latency_skips_the_probe(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "rpc-arb.json"
+            nodes = {"http://a": (0.03, None, None), "http://b": (0.0, None, None)}
+            _pool(nodes, stats_path=path).probe(wait_all=True)
+
+            pool = _pool(nodes, stats_path=path)
+            self.assertEqual(pool.ranked()[0].url, "http://b")
+            pool.request(lambda p: p.make_request("eth_chainId", []))
+            self.assertEqual(_calls(pool, "http://b"), ["eth_chainId"])
+            self.assertEqual(_calls(pool, "http://a"), [])
+
+    def test_env_override(self):
+        with patch.dict(os.environ, {"HLEXEC_ARB_RPC": "http://127.0.0.1:8545, "}):
+            self.assertEqual(rpc_urls("arb", True), ["http://127.0.0.1:8545"])
+        with patch.dict(os.environ, {"HLEXEC_ARB_RPC": ""}):
+            self.assertGreater(len(rpc_urls("arb", True)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import unittest
+import urllib.request
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from handlers.tracing import METRICS, TRACER, Metrics, serve_metrics, traced
+
+
+class FakeClient:
+    def post(self, url_path, payload=None):
+        if (payload or {}).get("type") == "broken":
+            raise ValueError("boom")
+        return {"ok": True}
+
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        TRACER.finish()
+
+    def test_span_tree_nests_per_thread(self):
+        TRACER.start("order")
+        with TRACER.span("setup"):
+            with TRACER.span("setup.info"):
+                pass
+        worker = threading.Thread(target=lambda: TRACER.span("sign").__enter__())
+        worker.start()
+        worker.join()
+        with self.assertRaises(KeyError):
+            with TRACER.span("verify", oid=7):
+                raise KeyError("oid")
+        tree = TRACER.finish()
+
+        assert tree is not None
+        self.assertEqual(tree["name"], "order")
+        setup, sign, verify = tree["children"]
+        self.assertEqual(setup["children"][0]["name"], "setup.info")
+        self.assertIn("thread", sign)
+        self.assertEqual(verify["attrs"], {"oid": 7})
+        self.assertIn("KeyError", verify["error"])
+        self.assertIsNone(TRACER.finish())
+
+    def test_disabled_tracer_records_nothing(self):
+        with TRACER.span("setup") as span:
+            self.assertIsNone(span)
+        self.assertIsNone(TRACER.finish())
+
+    def test_traced_client_spans_and_metrics(self):
+        client = traced(FakeClient(), "info")
+        TRACER.start("status")
+        client.post("/info", {"type": "clearinghouseState"})
+        with self.assertRaises(ValueError):
+            client.post("/info", {"type": "broken"})
+        tree = TRACER.finish()
+
+        assert tree is not None
+        names = [child["name"] for child in tree["children"]]
+        self.assertEqual(names, ["info.clearinghouseState", "info.broken"])
+        text = METRICS.render()
+        self.assertIn('hlexec_request_errors_total{api="info",method="broken"} 1', text)
+
+    def test_prometheus_histogram(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.observe("rpc", "eth_call", 0.05, False)
+        metrics.observe("rpc", "eth_call", 0.5, True)
+        metrics.observe("rpc", "eth_call", 3.0, False)
+        lines = metrics.render().splitlines()
+        labels = 'api="rpc",method="eth_call"'
+        for line in [
+            f"hlexec_requests_total{{{labels}}} 3",
+            f"hlexec_request_errors_total{{{labels}}} 1",
+            f'hlexec_request_duration_seconds_bucket{{{labels},le="0.1"}} 1',
+            f'hlexec_request_duration_seconds_bucket{{{labels},le="1"}} 2',
+            f'hlexec_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3',
+            f"hlexec_request_duration_seconds_sum{{{labels}}} 3.550000",
+            f"hlexec_request_duration_seconds_count{{{labels}}} 3",
+            "# TYPE hlexec_request_duration_seconds histogram",
+        ]:
+            self.assertIn(line, lines)
+
+    def test_metrics_endpoint(self):
+        METRICS.observe("exchange", "order", 0.2, False)
+        server = serve_metrics(0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as r:
+                body = r.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn('hlexec_requests_total{api="exchange",method="order"}', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import click
+import eth_account
+from rich.console import Console
+
+import handlers.transfer as transfer
+from handlers.transfer import load_transfers, parse_transfer, transfer_stages
+
+ALICE = "0x57FbAe717f5712C3Bd612f34482832c86D9b17f2"
+VAULT = "0xa15099a30bbf2e68942d6f4c43d70d04faeab0a0"
+WALLET = eth_account.Account.from_key("0x" + "22" * 32)
+
+
+class FakeExchange:
+    base_url = "https://api.hyperliquid-testnet.xyz"
+    vault_address = None
+    expires_after = None
+
+    def __init__(self):
+        self.wallet = WALLET
+        self.posted = []
+        self.lock = threading.Lock()
+
+    def _post_action(self, action, signature, nonce):
+        with self.lock:
+            self.posted.append((action, signature, nonce))
+        if action["type"] == "vaultTransfer":
+            return {"status": "err", "response": "Vault is locked"}
+        return {"status": "ok", "response": {"type": "default"}}
+
+
+class TestTransfer(unittest.TestCase):
+    def test_parse_rows(self):
+        usd = parse_transfer(["usd", ALICE.lower(), "12.5"], "cli")
+        self.assertEqual((usd.kind, usd.destination), ("usd", ALICE))
+        self.assertEqual(usd.amount, Decimal("12.5"))
+        self.assertEqual(parse_transfer(["TO-PERP", "3"], "cli").kind, "to-perp")
+        self.assertEqual(
+            parse_transfer(["spot", ALICE, "PURR", "100"], "cli").token, "PURR"
+        )
+
+        for fields, message in [
+            (["bridge", ALICE, "1"], "unknown transfer kind"),
+            (["usd", ALICE], "expected 'usd,<destination>,<amount>'"),
+            (["usd", "0x12", "1"], "invalid address"),
+            (["to-spot", "-1"], "must be positive"),
+            (["vault-deposit", VAULT, "1.0000001"], "at most 6 decimals"),
+        ]:
+            with self.assertRaises(click.ClickException) as ctx:
+                parse_transfer(fields, "cli")
+            self.assertIn(message, ctx.exception.message)
+
+    def test_load_file_reports_line(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "transfers.csv")
+            with open(path, "w") as f:
+                f.write(f"# rebalance\nusd,{ALICE},5\n\nto-perp,oops\n")
+            with self.assertRaises(click.ClickException) as ctx:
+                load_transfers(path)
+            self.assertIn(f"{path}:4", ctx.exception.message)
+
+    def test_bulk_run_signs_each_kind_with_its_own_nonce(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "transfers.csv")
+            with open(path, "w") as f:
+                f.write(
+                    f"usd,{ALICE},5\n"
+                    f"spot,{ALICE},purr,100\n"
+                    "to-spot,2\n"
+                    f"vault-deposit,{VAULT},1.5\n"
+                )
+            info = MagicMock()
+            info.spot_meta.return_value = {
+                "tokens": [
+                    {"name": "PURR", "tokenId": "0xc1fb593aeffbeb02f85e0308e9956a90"}
+                ]
+            }
+            exchange = FakeExchange()
+            setup = MagicMock(return_value=(info, exchange, ALICE, WALLET))
+            with (
+                patch.object(transfer, "setup", setup),
+                patch.object(transfer, "Console", lambda: Console(file=io.StringIO())),
+            ):
+                with self.assertRaises(click.ClickException) as ctx:
+                    transfer.run(False, None, None, (), path, no_confirm=True)
+
+        self.assertIn("1 of 4 transfers failed", ctx.exception.message)
+        actions = {action["type"]: action for action, _, _ in exchange.posted}
+        self.assertEqual(
+            set(actions), {"usdSend", "spotSend", "usdClassTransfer", "vaultTransfer"}
+        )
+        self.assertEqual(
+            actions["spotSend"]["token"], "PURR:0xc1fb593aeffbeb02f85e0308e9956a90"
+        )
+        self.assertFalse(actions["usdClassTransfer"]["toPerp"])
+        self.assertEqual(actions["vaultTransfer"]["usd"], 1_500_000)
+        self.assertEqual(actions["usdSend"]["amount"], "5")
+        self.assertEqual(len({nonce for _, _, nonce in exchange.posted}), 4)
+        self.assertEqual(info.spot_meta.call_count, 1)
+
+    def test_dependent_rows_run_in_file_order(self):
+        rows = [
+            ["to-perp", "10"],
+            ["usd", ALICE, "4"],
+            ["spot", ALICE, "PURR:0x01", "1"],
+            ["vault-withdraw", VAULT, "2"],
+            ["vault-deposit", VAULT, "1"],
+            ["usd", ALICE, "1"],
+        ]
+        transfers = [parse_transfer(row, "test") for row in rows]
+        self.assertEqual(transfer_stages(transfers), [[0], [1, 2], [3], [4], [5]])
+
+        exchange = FakeExchange()
+        setup = MagicMock(return_value=(MagicMock(), exchange, ALICE, WALLET))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "transfers.csv")
+            with open(path, "w") as f:
+                f.write(f"to-perp,10\nusd,{ALICE},4\nto-spot,1\nusd,{ALICE},1\n")
+            with (
+                patch.object(transfer, "setup", setup),
+                patch.object(transfer, "Console", lambda: Console(file=io.StringIO())),
+            ):
+                transfer.run(False, None, None, (), path, no_confirm=True)
+        self.assertEqual(
+            [action["type"] for action, _, _ in exchange.posted],
+            ["usdClassTransfer", "usdSend", "usdClassTransfer", "usdSend"],
+        )
+
+    def test_row_and_file_are_exclusive(self):
+        with self.assertRaises(click.ClickException):
+            transfer.run(False, None, None, ("to-perp", "1"), "rows.csv")
+        with self.assertRaises(click.ClickException):
+            transfer.run(False, None, None, ())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+import click
+import eth_account
+from rich.console import Console
+from web3 import HTTPProvider
+
+import handlers.withdraw_batch as withdraw_batch
+from handlers.actions import ActionNonces, ActionQueue
+from handlers.withdraw_batch import load_batch
+from handlers.withdrawals import load_withdrawals
+from hyperliquid.utils.error import ClientError
+
+ALICE = "0x57FbAe717f5712C3Bd612f34482832c86D9b17f2"
+BOB = "0xb764428a29EAEbe8e2301F5924746F818b331F5A"
+WALLET = eth_account.Account.from_key("0x" + "11" * 32)
+
+
+class FakeExchange:
+    base_url = "https://api.hyperliquid-testnet.xyz"
+
+    def __init__(self, fail=()):
+        self.wallet = WALLET
+        self.fail = set(fail)
+        self.posted = []
+        self.lock = threading.Lock()
+
+    def _post_action(self, action, signature, nonce):
+        time.sleep(0.01)
+        with self.lock:
+            self.posted.append((action, nonce))
+        if action["destination"] in self.fail:
+            return {"status": "err", "response": "Insufficient balance"}
+        return {"status": "ok", "response": {"type": "default"}}
+
+
+class TestWithdrawBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"HLEXEC_CACHE_DIR": self.tmp.name})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def _file(self, text):
+        path = os.path.join(self.tmp.name, "withdrawals.csv")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_load_batch(self):
+        rows = load_batch(self._file(f"# payouts\n{ALICE.lower()}, 10\n\n{BOB},2.5\n"))
+        self.assertEqual(rows, [(ALICE, Decimal("10")), (BOB, Decimal("2.5"))])
+
+        for text, message in [
+            (f"{ALICE},1.5\n", "minimum withdrawal"),
+            ("0x1234,5\n", "invalid address"),
+            (f"{ALICE},five\n", "invalid amount"),
+            (f"{ALICE}\n", "expected"),
+            ("# nothing\n", "No withdrawals"),
+        ]:
+            with self.assertRaises(click.ClickException) as ctx:
+                load_batch(self._file(text))
+            self.assertIn(message, ctx.exception.message)
+
+    def test_nonces_are_unique_across_threads(self):
+        nonces = ActionNonces()
+        seen = []
+        threads = [
+            threading.Thread(
+                target=lambda: seen.extend(nonces.next() for _ in range(50))
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(seen)), 200)
+
+    def test_queue_keeps_order_and_retries_rate_limits(self):
+        calls = []
+
+        def fn(item):
+            calls.append(item)
+            if item == 2 and calls.count(2) == 1:
+                raise ClientError(429, None, "rate limited", None)
+            if item == 3:
+                raise ValueError("boom")
+            return item * 10
+
+        with patch("handlers.actions.RATE_LIMIT_BACKOFF_S", 0.01):
+            results = ActionQueue(max_in_flight=3, per_second=1000).run(fn, [1, 2, 3])
+        self.assertEqual(results[:2], [10, 20])
+        self.assertIsInstance(results[2], ValueError)
+        self.assertEqual(calls.count(2), 2)
+
+    def test_queue_paces_submissions(self):
+        started = time.monotonic()
+        ActionQueue(max_in_flight=8, per_second=100).run(lambda item: item, range(6))
+        self.assertGreaterEqual(time.monotonic() - started, 0.045)
+
+    def test_run_submits_concurrently_and_records_each_withdrawal(self):
+        path = self._file(f"{ALICE},10\n{BOB},3\n{ALICE},4\n")
+        info = MagicMock()
+        info.user_state.return_value = {
+            "marginSummary": {"accountValue": "100"},
+            "withdrawable": "50",
+        }
+        exchange = FakeExchange(fail=[BOB])
+        setup = MagicMock(return_value=(info, exchange, ALICE, WALLET))
+        scanner = MagicMock()
+        scanner.return_value.head.return_value = 1234
+
+        with (
+            patch.object(withdraw_batch, "setup", setup),
+            patch.object(withdraw_batch, "WithdrawalScanner", scanner),
+            patch.object(
+                withdraw_batch,
+                "pool_provider",
+                lambda *_: HTTPProvider("http://127.0.0.1:1"),
+            ),
+            patch.object(
+                withdraw_batch, "Console", lambda: Console(file=io.StringIO())
+            ),
+        ):
+            with self.assertRaises(click.ClickException) as ctx:
+                withdraw_batch.run(False, None, None, path, no_confirm=True)
+
+        self.assertIn("1 of 3 withdrawals failed", ctx.exception.message)
+        self.assertEqual(info.user_state.call_count, 1)
+        nonces = [nonce for _, nonce in exchange.posted]
+        self.assertEqual(len(set(nonces)), 3)
+        self.assertTrue(
+            all(action["time"] == nonce for action, nonce in exchange.posted)
+        )
+
+        recorded = load_withdrawals(False)
+        self.assertEqual(sorted(w["amount"] for w in recorded), ["3", "9"])
+        self.assertTrue(all(w["from_block"] == 1234 for w in recorded))
+
+    def test_run_rejects_batch_above_withdrawable(self):
+        path = self._file(f"{ALICE},30\n{BOB},30\n")
+        info = MagicMock()
+        info.user_state.return_value = {"withdrawable": "50"}
+        exchange = FakeExchange()
+        setup = MagicMock(return_value=(info, exchange, ALICE, WALLET))
+        with (
+            patch.object(withdraw_batch, "setup", setup),
+            patch.object(
+                withdraw_batch, "Console", lambda: Console(file=io.StringIO())
+            ),
+        ):
+            with self.assertRaises(click.ClickException) as ctx:
+                withdraw_batch.run(False, None, None, path, no_confirm=True)
+        self.assertIn("Insufficient withdrawable balance", ctx.exception.message)
+        self.assertEqual(exchange.posted, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,277 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from decimal import Decimal
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+from rich.console import Console
+from web3 import HTTPProvider, Web3
+
+import handlers.withdraw as withdraw
+from handlers.constants import BRIDGE2_TEST_ADDR, USDC_ARB_TEST_ADDR
+from handlers.withdrawals import (
+    WithdrawalScanner,
+    load_withdrawals,
+    record_withdrawal,
+    save_withdrawals,
+    track,
+)
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ALICE = "0x57FbAe717f5712C3Bd612f34482832c86D9b17f2"
+BOB = "0xb764428a29EAEbe8e2301F5924746F818b331F5A"
+OTHER = "0x" + "77" * 20
+
+
+def _topic(address):
+    return "0x" + address.lower()[2:].rjust(64, "0")
+
+
+def _log(block, index, sender, to, usdc):
+    return {
+        "address": Web3.to_checksum_address(USDC_ARB_TEST_ADDR),
+        "topics": [TRANSFER_TOPIC, _topic(sender), _topic(to)],
+        "data": "0x" + int(usdc * 10**6).to_bytes(32, "big").hex(),
+        "blockNumber": hex(block),
+        "logIndex": hex(index),
+        "transactionIndex": "0x0",
+        "transactionHash": "0x" + f"{block:04x}{index:02x}".rjust(64, "0"),
+        "blockHash": "0x" + "cd" * 32,
+        "removed": False,
+    }
+
+
+class FakeArb(HTTPProvider):
+    """Serves eth_getLogs by range and topics from a list of logs."""
+
+    def __init__(self, head, logs):
+        super().__init__("http://127.0.0.1:1")
+        self.head = head
+        self.logs = logs
+        self.ranges = []
+        self.batches = 0
+        self.failing = set()
+
+    def make_request(self, method: Any, params: Any) -> Any:
+        raise AssertionError(f"unexpected single request {method}")
+
+    def make_batch_request(self, batch_requests: Any) -> Any:
+        self.batches += 1
+        responses = []
+        for i, (method, params) in enumerate(batch_requests):
+            response: dict = {"jsonrpc": "2.0", "id": i}
+            if method == "eth_getLogs" and params[0]["fromBlock"] in self.failing:
+                response["error"] = {"code": -32005, "message": "too many results"}
+            elif method == "eth_getLogs":
+                response["result"] = self._logs(params[0])
+            elif method == "eth_call":
+                response["result"] = "0x" + (6).to_bytes(32, "big").hex()
+            else:
+                response["result"] = {
+                    "eth_blockNumber": hex(self.head),
+                    "eth_chainId": hex(421614),
+                }[method]
+            responses.append(response)
+        return responses
+
+    def _logs(self, query):
+        lo, hi = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+        self.ranges.append((lo, hi))
+        topic0, sender, receivers = query["topics"]
+        return [
+            log
+            for log in self.logs
+            if lo <= int(log["blockNumber"], 16) <= hi
+            and log["topics"][0] == topic0
+            and log["topics"][1] == sender
+            and log["topics"][2] in receivers
+        ]
+
+
+class TestWithdrawalScanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"HLEXEC_CACHE_DIR": self.tmp.name})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_one_scan_finalizes_several_withdrawals(self):
+        bridge = BRIDGE2_TEST_ADDR
+        alice = record_withdrawal(False, ALICE, Decimal("9"), "0xaa", 1_000)
+        bob = record_withdrawal(False, BOB, Decimal("4.5"), "0xbb", 1_000)
+        provider = FakeArb(
+            head=26_000,
+            logs=[
+                _log(1_500, 0, OTHER, ALICE, 9),  # not from the bridge
+                _log(2_000, 3, bridge, ALICE, 8),  # a different amount
+                _log(12_345, 1, bridge, ALICE, 9),
+                _log(25_000, 0, bridge, BOB, 4.5),
+            ],
+        )
+        scanner = WithdrawalScanner(Web3(provider), False, chunk=5_000)
+        found = scanner.scan([alice, bob], scanner.head())
+
+        self.assertEqual([w["destination"] for w in found], [ALICE, BOB])
+        self.assertEqual(alice["block"], 12_345)
+        self.assertEqual(bob["block"], 25_000)
+        self.assertEqual(alice["tx_hash"], "0x" + "303901".rjust(64, "0"))
+        # 1000..26000 in 5000-block chunks, in two batches of at most five
+        self.assertEqual(len(provider.ranges), 6)
+        self.assertEqual(provider.ranges[0], (1_000, 5_999))
+        self.assertEqual(provider.ranges[-1], (26_000, 26_000))
+        self.assertEqual(scanner.requests, 2)
+
+    def test_scan_resumes_and_does_not_reuse_a_payout(self):
+        bridge = BRIDGE2_TEST_ADDR
+        first = record_withdrawal(False, ALICE, Decimal("9"), None, 100)
+        second = record_withdrawal(False, ALICE, Decimal("9"), None, 100)
+        provider = FakeArb(head=200, logs=[_log(150, 0, bridge, ALICE, 9)])
+        scanner = WithdrawalScanner(Web3(provider), False, chunk=1_000)
+
+        self.assertEqual(scanner.scan([first, second], 200), [first])
+        self.assertIsNone(second["block"])
+        self.assertEqual(second["scanned"], 200)
+
+        # Only the new blocks are searched, and the old payout stays claimed
+        provider.ranges = []
+        provider.logs.append(_log(260, 2, bridge, ALICE, 9))
+        self.assertEqual(scanner.scan([first, second], 300), [second])
+        self.assertEqual(provider.ranges, [(201, 300)])
+        self.assertEqual(second["block"], 260)
+
+    def test_failed_chunk_is_retried_by_the_next_scan(self):
+        entry = record_withdrawal(False, BOB, Decimal("3"), None, 0)
+        provider = FakeArb(head=3_000, logs=[_log(2_500, 0, BRIDGE2_TEST_ADDR, BOB, 3)])
+        provider.failing.add(hex(2_000))
+        scanner = WithdrawalScanner(Web3(provider), False, chunk=1_000)
+
+        self.assertEqual(scanner.scan([entry], 3_000), [])
+        self.assertEqual(entry["scanned"], 1_999)
+
+        provider.failing.clear()
+        provider.ranges = []
+        self.assertEqual(scanner.scan([entry], 3_000), [entry])
+        self.assertEqual(provider.ranges, [(2_000, 2_999), (3_000, 3_000)])
+
+    def test_withdrawals_are_persisted(self):
+        record_withdrawal(False, ALICE, Decimal("9"), "0xaa", 10)
+        (stored,) = load_withdrawals(False)
+        self.assertEqual(stored["destination"], ALICE)
+        self.assertEqual(stored["amount"], "9")
+        self.assertEqual(stored["scanned"], 9)
+        self.assertIsNone(stored["block"])
+
+    def test_old_entries_expire_when_the_store_is_written(self):
+        day = 86_400_000
+        now = int(time.time() * 1000)
+        pending = dict(record_withdrawal(False, ALICE, Decimal("2"), None, 1))
+        save_withdrawals(
+            False,
+            [
+                dict(pending, amount="2", time_ms=now - 2 * day),
+                dict(pending, amount="3", time_ms=now - 2 * day, block=5),
+                dict(pending, amount="4", time_ms=now - 8 * day, block=5),
+            ],
+        )
+        self.assertEqual([w["amount"] for w in load_withdrawals(False)], ["3"])
+
+        # Recording the next withdrawal prunes the store too
+        save_withdrawals(False, [dict(pending, time_ms=now - 2 * day)])
+        record_withdrawal(False, BOB, Decimal("5"), None, 1)
+        self.assertEqual([w["amount"] for w in load_withdrawals(False)], ["5"])
+
+    def test_concurrent_records_are_all_kept(self):
+        threads = [
+            threading.Thread(
+                target=record_withdrawal,
+                args=(False, ALICE, Decimal(i + 2), None, 10),
+            )
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            sorted(int(w["amount"]) for w in load_withdrawals(False)),
+            list(range(2, 10)),
+        )
+
+    def test_track_keeps_withdrawals_recorded_meanwhile(self):
+        alice = record_withdrawal(False, ALICE, Decimal("9"), None, 100)
+        provider = FakeArb(head=200, logs=[_log(150, 0, BRIDGE2_TEST_ADDR, ALICE, 9)])
+        scan = provider.make_batch_request
+
+        def record_during_scan(batch_requests):
+            if provider.batches == 1:
+                record_withdrawal(False, BOB, Decimal("4"), None, 190)
+            return scan(batch_requests)
+
+        with patch.object(provider, "make_batch_request", record_during_scan):
+            pending = track(
+                Console(file=io.StringIO()), Web3(provider), False, [alice], timeout=0
+            )
+
+        self.assertEqual(pending, [])
+        stored = {w["destination"]: w for w in load_withdrawals(False)}
+        self.assertEqual(stored[ALICE]["block"], 150)
+        self.assertIsNone(stored[BOB]["block"])
+
+
+class TestWithdrawRun(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"HLEXEC_CACHE_DIR": self.tmp.name})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_failed_balance_read_after_withdrawal_is_a_warning(self):
+        info = MagicMock()
+        info.user_state.side_effect = [
+            {"marginSummary": {"accountValue": "100"}, "withdrawable": "50"},
+            ConnectionError("reset"),
+        ]
+        exchange = MagicMock()
+        exchange.withdraw_from_bridge.return_value = {
+            "status": "ok",
+            "response": {"type": "default"},
+        }
+        pool_provider = MagicMock(side_effect=AssertionError("Arbitrum used"))
+        out = io.StringIO()
+        with (
+            patch.object(
+                withdraw, "setup", MagicMock(return_value=(info, exchange, ALICE, None))
+            ),
+            patch.object(withdraw, "pool_provider", pool_provider),
+            patch.object(withdraw, "Console", lambda: Console(file=out, width=200)),
+        ):
+            withdraw.run(False, None, None, "10", no_confirm=True)
+
+        printed = out.getvalue()
+        self.assertIn("Could not fetch the balance", printed)
+        self.assertIn("Withdrawal Summary", printed)
+        self.assertNotIn("Final Balance", printed)
+        (stored,) = load_withdrawals(False)
+        self.assertEqual(stored["amount"], "9")
+        # Without --wait, Arbitrum is not needed at all
+        pool_provider.assert_not_called()
+        self.assertIsNone(stored["from_block"])
+
+
+if __name__ == "__main__":
+    unittest.main()